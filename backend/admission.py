@@ -0,0 +1,215 @@
+"""Admission control for expensive endpoints: per-client rate limits and concurrency caps"""
+
+import functools
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from flask import jsonify, request
+
+from metrics import admission_rejections
+
+# Use the first X-Forwarded-For address as the client (only behind a trusted proxy)
+TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', '').lower() in ('1', 'true', 'yes')
+
+
+def client_id() -> str:
+    if TRUST_PROXY_HEADERS and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr or 'unknown'
+
+
+class TokenBucket:
+    """
+    Per-client buckets of `burst` tokens, refilled at `rate` tokens per second.
+    Each request takes one token; a client with an empty bucket is told how
+    long until the next one.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def take(self, client: str) -> float:
+        """0 if admitted, otherwise seconds until a token is available"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[client] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self._buckets[client] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            self._prune(now)
+        return wait
+
+    def _prune(self, now: float):
+        # Forget clients whose buckets have refilled; they'd start full anyway
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        full_after = self.burst / self.rate
+        self._buckets = {client: state for client, state in self._buckets.items()
+                         if now - state[1] < full_after}
+
+
+class ConcurrencyLimit:
+    """
+    At most `limit` requests run at once. Up to `queue_size` more wait (for
+    at most `queue_timeout` seconds) for a slot; beyond that requests are
+    rejected immediately.
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        # Moving average of how long admitted requests take, for Retry-After
+        self.average_seconds = 5.0
+
+    def acquire(self) -> Optional[str]:
+        """None once a slot is held, otherwise why not ('queue_full' or 'queue_timeout')"""
+        with self._cond:
+            if self.active < self.limit:
+                self.active += 1
+                return None
+            if self.waiting >= self.queue_size:
+                return 'queue_full'
+            self.waiting += 1
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.limit, self.queue_timeout)
+            finally:
+                self.waiting -= 1
+            if not admitted:
+                return 'queue_timeout'
+            self.active += 1
+            return None
+
+    def release(self, seconds: float):
+        with self._cond:
+            self.active -= 1
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+            self._cond.notify()
+
+
+class AdmissionPolicy:
+    """Rate limit per client plus a concurrency cap for one endpoint (per worker process)"""
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int,
+                 max_concurrent: int, queue_size: int, queue_timeout: float):
+        self.name = name
+        self.bucket = TokenBucket(rate_per_minute / 60, burst)
+        self.concurrency = ConcurrencyLimit(max_concurrent, queue_size, queue_timeout)
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, rate_per_minute: float, burst: int,
+                 max_concurrent: int, queue_size: int, queue_timeout: float) -> 'AdmissionPolicy':
+        """Defaults overridable with <prefix>_RATE_PER_MINUTE, _BURST, _MAX_CONCURRENT, _QUEUE_SIZE, _QUEUE_TIMEOUT"""
+        return cls(name,
+                   float(os.getenv(f'{prefix}_RATE_PER_MINUTE', rate_per_minute)),
+                   int(os.getenv(f'{prefix}_BURST', burst)),
+                   int(os.getenv(f'{prefix}_MAX_CONCURRENT', max_concurrent)),
+                   int(os.getenv(f'{prefix}_QUEUE_SIZE', queue_size)),
+                   float(os.getenv(f'{prefix}_QUEUE_TIMEOUT', queue_timeout)))
+
+    def _reject(self, reason: str, retry_after: float, message: str):
+        admission_rejections.inc(endpoint=self.name, reason=reason)
+        response = jsonify({'status': 'error', 'message': message})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def __call__(self, view):
+        """Decorate a view; CORS preflight requests are never limited"""
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method == 'OPTIONS':
+                return view(*args, **kwargs)
+
+            wait = self.bucket.take(client_id())
+            if wait:
+                return self._reject('rate_limited', wait,
+                                    'Too many requests for this endpoint; please retry later')
+
+            reason = self.concurrency.acquire()
+            if reason:
+                return self._reject(reason, self.concurrency.average_seconds,
+                                    'Server is busy with other requests like this one; please retry later')
+            start = time.monotonic()
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.concurrency.release(time.monotonic() - start)
+
+        return wrapper
+
+
+class StreamLimit:
+    """
+    At most `limit` long-lived responses (Server-Sent Events streams) open at
+    once in this worker process. Each open stream holds one of the worker's
+    threads (GUNICORN_THREADS) for as long as it lasts, so without a cap
+    enough subscribers would leave none for ordinary requests. Streams over
+    the cap get 503 with Retry-After.
+    """
+
+    def __init__(self, limit: int, retry_after: float = 30):
+        self.limit = limit
+        self.retry_after = retry_after
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def hold(self, events: Iterable[str]) -> Optional['_HeldStream']:
+        """`events` wrapped to hold a slot until the response is closed, or None if all are taken"""
+        with self._lock:
+            if self.open >= self.limit:
+                return None
+            self.open += 1
+        return _HeldStream(events, self._release)
+
+    def _release(self):
+        with self._lock:
+            self.open -= 1
+
+    def reject(self, endpoint: str):
+        admission_rejections.inc(endpoint=endpoint, reason='streams_full')
+        response = jsonify({'status': 'error', 'message': 'Too many open streams; please retry later'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, math.ceil(self.retry_after)))
+        return response
+
+
+class _HeldStream:
+    """
+    Iterates over a stream and releases its slot on close(), which the WSGI
+    server calls however the response ends, even if it was never iterated.
+    """
+
+    def __init__(self, events: Iterable[str], release):
+        self._events = events
+        self._release = release
+        self._released = False
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._events)
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            if hasattr(self._events, 'close'):
+                self._events.close()
+        finally:
+            self._release()
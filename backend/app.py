@@ -1,25 +1,45 @@
-from flask import Flask, jsonify, request, send_file
+from flask import Flask, Response, jsonify, make_response, request, send_file
 from flask_cors import CORS, cross_origin
 from news_scraper import NewsScraper
 from news_processor import NewsProcessor
 from stock_prediction import StockPredictor
 from portfolio_predictor import PortfolioPredictor
 from company_data import CompanyDataProvider
+from atomic_file import write_json_atomic
+from async_runtime import run_coroutine
+from job_queue import JobQueue
+from http_caching import make_etag, conditional_response, COMPANIES_CACHE_CONTROL
+from compression import init_compression
+from json_provider import FastJSONProvider
+from singleflight import SingleFlight
+from metrics import init_metrics, load_yfinance, upstream_call
+from tracing import init_tracing, traced
+from server_timing import server_timing
+from admission import AdmissionPolicy, StreamLimit
+from price_stream import PriceStream, MAX_STREAM_SYMBOLS
+from pagination import paginate, parse_limit, parse_fields, project_fields
+from lazy import Lazy
+from warmup import Warmup
 import os
-import asyncio
 import json
+import math
 import hashlib
 import secrets
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_clients import openai_client
 import tempfile
 import subprocess
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
 
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
+# First, so request timings include the other hooks below
+init_metrics(app)
+init_tracing(app)
 # Configure CORS to allow requests from React dev server
 # In development, allow all origins for easier testing
 CORS(app, 
@@ -28,13 +48,57 @@ CORS(app,
      allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
      supports_credentials=False
 )
+init_compression(app)
 
 # Initialize components
-scraper = NewsScraper()
-processor = NewsProcessor()
-stock_predictor = StockPredictor()
-portfolio_predictor = PortfolioPredictor()
-company_data_provider = CompanyDataProvider()
+# These are created once per process, on first use, so importing the app
+# (and restarting a worker) stays fast. Under gunicorn (see gunicorn.conf.py)
+# every worker imports this module after forking, so each worker gets its
+# own instances and nothing is shared between processes except data files.
+scraper = Lazy(NewsScraper)
+processor = Lazy(NewsProcessor)
+stock_predictor = Lazy(StockPredictor)
+portfolio_predictor = Lazy(PortfolioPredictor)
+company_data_provider = Lazy(CompanyDataProvider)
+job_queue = JobQueue('jobs', max_workers=int(os.getenv('JOB_WORKERS', 2)))
+# Coalesces concurrent identical upstream calls (stock prices, knowledge graphs)
+flights = SingleFlight()
+
+# Loads what the first requests would otherwise pay for; /api/ready reports
+# ready only once it is done. Started per worker by gunicorn's
+# post_worker_init hook (see gunicorn.conf.py), or by the first readiness probe
+warmup = Warmup([
+    ('article_store', lambda: processor.get()),
+    ('geocoding_cache', lambda: (processor.geocoding_cache, processor.places_cache)),
+    ('market_data_client', lambda: load_yfinance()),
+    ('top_companies', lambda: company_data_provider.get_top_companies()),
+    ('lesser_known_companies', lambda: company_data_provider.get_lesser_known_companies()),
+])
+
+# Admission control for the LLM-heavy endpoints: a per-client rate limit and
+# a cap on concurrent requests per endpoint, so they can't take every worker
+# thread; excess requests get 429 with Retry-After (see admission.py)
+LLM_ADMISSION = dict(rate_per_minute=6, burst=3, max_concurrent=2, queue_size=4, queue_timeout=10)
+knowledge_graph_admission = AdmissionPolicy.from_env('knowledge_graph', 'LLM', **LLM_ADMISSION)
+article_impact_admission = AdmissionPolicy.from_env('article_impact', 'LLM', **LLM_ADMISSION)
+portfolio_predictions_admission = AdmissionPolicy.from_env('portfolio_predictions', 'LLM', **LLM_ADMISSION)
+portfolio_planner_admission = AdmissionPolicy.from_env('portfolio_planner', 'LLM', **LLM_ADMISSION)
+recommendations_admission = AdmissionPolicy.from_env('recommendations', 'LLM', **LLM_ADMISSION)
+daily_digest_admission = AdmissionPolicy.from_env('daily_digest', 'DIGEST', rate_per_minute=2, burst=1,
+                                                  max_concurrent=1, queue_size=2, queue_timeout=30)
+# Seconds a request thread waits for an LLM coroutine on the shared event loop
+# before giving up with 504 (the coroutine is cancelled)
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', 120))
+# Server-Sent Events streams (news events, stock prices) open at once in this
+# worker; each holds a worker thread, so keep the rest for ordinary requests
+open_streams = StreamLimit(int(os.getenv('MAX_OPEN_STREAMS', 4)))
+
+@app.before_request
+def sync_article_store():
+    """Pick up articles another worker processed since this one last looked"""
+    # Not loaded yet means it will read the current store when it is
+    if processor.created:
+        processor.reload_if_changed()
 
 # DEPRECATED: Authentication and portfolio storage moved to Firebase
 # Keeping these for backward compatibility, but they're no longer used
@@ -45,6 +109,9 @@ tokens_db = {}
 # Portfolio storage file (DEPRECATED - now using Firebase Firestore)
 PORTFOLIOS_FILE = 'portfolios.json'
 
+# JSON parsing of model replies, as its own trace span
+parse_llm_json = traced('json.parse')(json.loads)
+
 def generate_token():
     return secrets.token_urlsafe(32)
 
@@ -65,8 +132,7 @@ def load_portfolios():
 def save_portfolios(portfolios):
     """Save portfolios to JSON file"""
     try:
-        with open(PORTFOLIOS_FILE, 'w') as f:
-            json.dump(portfolios, f, indent=2)
+        write_json_atomic(PORTFOLIOS_FILE, portfolios, indent=2)
         return True
     except Exception as e:
         print(f"Error saving portfolios: {e}")
@@ -100,19 +166,53 @@ def get_user_from_token():
         }
     return None
 
-@app.route('/api/news', methods=['GET', 'OPTIONS'])
-@cross_origin()
-def get_news():
-    """Get all news articles with locations"""
-    if request.method == 'OPTIONS':
-        return jsonify({'status': 'ok'}), 200
-    category = request.args.get('category', 'all')  # 'financial', 'political', or 'all'
-    mode = request.args.get('mode', 'economic')  # 'economic' or 'political'
-    articles = processor.get_articles_by_category(category)
-    
-    # Transform titles based on mode if needed
+# Largest near= radius; a wider search is what bbox (or the full list) is for
+MAX_RADIUS_KM = 1000
+
+def _parse_numbers(value, count, name):
+    """Parse a comma-separated list of numbers from a query parameter"""
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise ValueError(f'{name} must be {count} comma-separated numbers')
+    return numbers
+
+def _check_lat_lng(lat, lng, name):
+    if not -90 <= lat <= 90 or not -180 <= lng <= 180:
+        raise ValueError(f'{name} contains out-of-range coordinates')
+
+def parse_bbox(value):
+    """Parse 'west,south,east,north' into (south, west, north, east)"""
+    west, south, east, north = _parse_numbers(value, 4, 'bbox')
+    _check_lat_lng(south, west, 'bbox')
+    _check_lat_lng(north, east, 'bbox')
+    return south, west, north, east
+
+def parse_point(value):
+    """Parse 'lat,lng' into (lat, lng)"""
+    lat, lng = _parse_numbers(value, 2, 'near')
+    _check_lat_lng(lat, lng, 'near')
+    return lat, lng
+
+def parse_radius(value):
+    """Parse a radius in km, finite and at most MAX_RADIUS_KM so the result stays bounded"""
+    try:
+        radius_km = float(value)
+    except ValueError:
+        raise ValueError('radius must be a number')
+    if not math.isfinite(radius_km) or radius_km <= 0:
+        raise ValueError('radius must be a positive number')
+    if radius_km > MAX_RADIUS_KM:
+        raise ValueError(f'radius must be at most {MAX_RADIUS_KM}km')
+    return radius_km
+
+def apply_mode_titles(articles, mode):
+    """Transform titles based on mode if needed; returns new dicts for changed articles"""
     # Only transform if the mode doesn't match the current title orientation
     if mode == 'political':
+        transformed = []
         for article in articles:
             title = article.get('title', '')
             # Check if title is already political-oriented
@@ -127,58 +227,233 @@ def get_news():
                     if original_title.startswith(prefix):
                         original_title = original_title[len(prefix):]
                         break
-                article['title'] = processor._make_title_political_oriented(original_title)
+                # Copy so the stored article keeps its title for other modes
+                article = dict(article, title=processor._make_title_political_oriented(original_title))
+            transformed.append(article)
+        return transformed
     # For economic mode, titles are already finance-oriented by default
+    return articles
+
+def _article_list_response(articles, mode, *etag_parts):
+    """
+    Serialize an ordered article list, honoring the paging and projection
+    query parameters.
+    
+    Without limit/cursor the response is the plain list, as before. With them
+    it is wrapped as {'articles': [...], 'next_cursor': ...}; pass next_cursor
+    back as cursor= to get the following page.
+    
+    The ETag covers the store version, the query string and any etag_parts,
+    and a matching If-None-Match gets a 304 without serializing anything.
+    """
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        paged = 'limit' in request.args or 'cursor' in request.args
+        next_cursor = None
+        if paged:
+            articles, next_cursor = paginate(articles, parse_limit(request.args.get('limit')),
+                                             request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    def build():
+        # Titles are only rewritten for the page being returned
+        page = project_fields(apply_mode_titles(articles, mode), fields)
+        if not paged:
+            return jsonify(page)
+        return jsonify({
+            'status': 'success',
+            'articles': page,
+            'count': len(page),
+            'next_cursor': next_cursor
+        })
     
-    return jsonify(articles)
+    return conditional_response(make_etag(processor.store_version, *etag_parts), build)
+
+@app.route('/api/news', methods=['GET', 'OPTIONS'])
+@cross_origin(expose_headers=['X-Events-Seq'])
+def get_news():
+    """
+    Get news articles with locations.
+    
+    The X-Events-Seq header is the article event log's head when the list was
+    read; pass it as last_event_id to /api/news/events to follow changes from
+    exactly this list on.
+    
+    Optional viewport filters (use one):
+        bbox=west,south,east,north    only articles inside the box
+        near=lat,lng&radius=km        articles within radius (default 50km, max 1000), nearest first
+    
+    Paging and projection (see _article_list_response):
+        limit, cursor                 cursor-based pages in store order
+        fields=id,title,coordinates   only return these fields
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    category = request.args.get('category', 'all')  # 'financial', 'political', or 'all'
+    mode = request.args.get('mode', 'economic')  # 'economic' or 'political'
+    bbox = request.args.get('bbox')  # 'west,south,east,north' (Mapbox getBounds order)
+    near = request.args.get('near')  # 'lat,lng', with optional radius in km
+    
+    # Read the head before picking up the store: a worker writes the store
+    # before appending its events, so a client resuming from this seq may
+    # replay changes already in the list, but never misses one
+    events_seq = processor.events.head()
+    processor.reload_if_changed()
+    
+    try:
+        if bbox:
+            articles = processor.get_articles_in_bbox(*parse_bbox(bbox), category=category)
+        elif near:
+            lat, lng = parse_point(near)
+            radius_km = parse_radius(request.args.get('radius', 50))
+            articles = processor.get_articles_near(lat, lng, radius_km, category)
+        else:
+            articles = processor.get_articles_by_category(category)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    response = make_response(_article_list_response(articles, mode))
+    response.headers['X-Events-Seq'] = str(events_seq)
+    return response
 
 @app.route('/api/news/popular', methods=['GET', 'OPTIONS'])
 @cross_origin()
 def get_popular_news():
-    """Get most popular news articles (for the blurred list)"""
+    """
+    Get most popular news articles (for the blurred list).
+    
+    Supports the same limit/cursor/fields parameters as /api/news.
+    """
     if request.method == 'OPTIONS':
         return jsonify({'status': 'ok'}), 200
     category = request.args.get('category', 'all')
     mode = request.args.get('mode', 'economic')  # 'economic' or 'political'
-    articles = processor.get_popular_articles(category, limit=20)
+    if 'limit' in request.args or 'cursor' in request.args:
+        # Paged clients walk the full popularity ordering
+        articles = processor.get_popular_articles(category, limit=None)
+    else:
+        articles = processor.get_popular_articles(category, limit=20)
     
-    # Transform titles based on mode if needed
-    # Only transform if the mode doesn't match the current title orientation
-    if mode == 'political':
-        for article in articles:
-            title = article.get('title', '')
-            # Check if title is already political-oriented
-            political_keywords = ['geopolitical', 'political', 'diplomatic', 'strategic', 'international relations', 'crisis', 'tensions']
-            if not any(keyword.lower() in title.lower() for keyword in political_keywords):
-                # Extract original title (remove finance prefixes if present)
-                original_title = title
-                finance_prefixes = ['Market Impact: ', 'Financial Analysis: ', 'Investment Outlook: ', 
-                                   'Market Trends: ', 'Economic Impact: ', 'Trading Implications: ', 
-                                   'Financial Markets: ']
-                for prefix in finance_prefixes:
-                    if original_title.startswith(prefix):
-                        original_title = original_title[len(prefix):]
-                        break
-                article['title'] = processor._make_title_political_oriented(original_title)
-    # For economic mode, titles are already finance-oriented by default
+    # Scores decay over time, so the popular list also changes per scoring window
+    return _article_list_response(articles, mode, processor.popularity_window())
+
+@app.route('/api/news/clusters', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def get_news_clusters():
+    """
+    Get article markers clustered for a map zoom level.
     
-    return jsonify(articles)
+    Query parameters:
+        zoom      map zoom level (default 0)
+        bbox      optional 'west,south,east,north' viewport
+        category  'financial', 'political', or 'all'
+    
+    Clusters are maintained incrementally as articles are processed, so the
+    cost of this call depends on the number of visible clusters only.
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    category = request.args.get('category', 'all')
+    try:
+        zoom = int(request.args.get('zoom', 0))
+        bbox = request.args.get('bbox')
+        clusters = processor.get_marker_clusters(zoom, parse_bbox(bbox) if bbox else None, category)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    
+    return jsonify({
+        'status': 'success',
+        'zoom': max(0, min(processor.marker_clusters.max_zoom, zoom)),
+        'clusters': clusters,
+        'count': len(clusters)
+    })
+
+@app.route('/api/news/events', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def stream_news_events():
+    """
+    Article store changes as Server-Sent Events.
+    
+    Events are `add` and `update` ({seq, type, id, article}) and `remove`
+    ({seq, type, id}), with the seq as the event id. A reconnecting
+    EventSource sends Last-Event-ID and resumes where it left off; a new
+    client can pass ?last_event_id= instead (the X-Events-Seq header of its
+    /api/news response). A `reset` event means that point is no longer in the
+    log and the full list should be fetched again. Counts against
+    MAX_OPEN_STREAMS like the price stream.
+    
+    Query parameters:
+        mode      'economic' or 'political' titles, as for /api/news
+        fields    only send these article fields
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    mode = request.args.get('mode', 'economic')  # 'economic' or 'political'
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        fields = parse_fields(request.args.get('fields'))
+        after = int(last_event_id) if last_event_id else None
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'Invalid parameter: {e}'}), 400
+    
+    def transform(article):
+        return project_fields(apply_mode_titles([article], mode), fields)[0]
+    
+    events = open_streams.hold(processor.events.stream(after, app.json.dumps, transform))
+    if events is None:
+        return open_streams.reject('news_events')
+    
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/api/news/refresh', methods=['POST', 'OPTIONS'])
 @cross_origin()
 def refresh_news():
-    """Trigger a news refresh/scrape"""
+    """Start a news refresh/scrape in the background; poll /api/jobs/<id> for progress"""
     if request.method == 'OPTIONS':
         return jsonify({'status': 'ok'}), 200
     try:
-        data = request.get_json() or {}
-        mode = data.get('mode', 'economic')  # 'economic' or 'political'
-        articles = scraper.scrape_all_sources()
-        processor.process_articles(articles, mode=mode)
-        return jsonify({'status': 'success', 'message': 'News refreshed successfully'})
+        data = request.get_json(silent=True) or {}
+        # 'economic' or 'political'; anything else gets the economic titles
+        mode = 'political' if data.get('mode') == 'political' else 'economic'
+        
+        def run_refresh(progress):
+            progress(0, None, 'Scraping news sources')
+            articles = scraper.scrape_all_sources()
+            progress(0, len(articles), f'Processing {len(articles)} articles')
+            processed = processor.process_articles(
+                articles, mode=mode,
+                progress_callback=lambda done, total: progress(done, total, f'Processed {done}/{total} articles')
+            )
+            return {'articles_processed': len(processed)}
+        
+        # A refresh already running for this mode is returned instead of starting another
+        job, created = job_queue.submit('news_refresh', run_refresh, dedupe_key=f'news_refresh_{mode}')
+        response = jsonify({
+            'status': 'accepted',
+            'message': 'News refresh started' if created else 'News refresh already in progress',
+            'job': job
+        })
+        response.headers['Location'] = f"/api/jobs/{job['id']}"
+        return response, 202
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def get_job_status(job_id):
+    """Status and progress of a background job (e.g. a news refresh)"""
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify({'status': 'success', 'job': job}), 200
+
 # DEPRECATED: Authentication endpoints - now using Firebase
 # Keeping for backward compatibility
 @app.route('/api/auth/signup', methods=['POST', 'OPTIONS'])
@@ -421,8 +696,102 @@ def health_check():
         return jsonify({'status': 'ok'}), 200
     return jsonify({'status': 'healthy', 'cors': 'enabled'})
 
+@app.route('/api/live', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def liveness_check():
+    """Liveness probe: the process is up and serving requests (restart it if not)"""
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    return jsonify({'status': 'alive'})
+
+@app.route('/api/ready', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def readiness_check():
+    """
+    Readiness probe: 200 once warm-up has loaded the article store, caches
+    and company data in every worker, 503 until then, so a load balancer
+    only routes users to a warm instance whichever worker takes the request.
+    The body shows this worker's warm-up steps and every worker's status.
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    # Under a server without the gunicorn hook, the first probe starts it
+    warmup.start()
+    workers = warmup.workers()
+    body = {
+        'warmup': warmup.state(),
+        'workers': {str(pid): worker['status'] for pid, worker in sorted(workers.items())}
+    }
+    if all(worker['ready'] for worker in workers.values()):
+        return jsonify(dict(body, status='ready')), 200
+    return jsonify(dict(body, status='warming_up')), 503
+
+@traced('market_data.stock_prices')
+def _fetch_stock_prices(symbols):
+    """Current price and daily change for each symbol, in order"""
+    from datetime import datetime, timedelta
+    yf = load_yfinance()
+    
+    results = []
+    for symbol in symbols:
+        try:
+            ticker = yf.Ticker(symbol)
+            # Get current info and recent history
+            info = ticker.info
+            hist = ticker.history(period='5d')
+            
+            if hist.empty:
+                results.append({
+                    'symbol': symbol,
+                    'price': None,
+                    'change': None,
+                    'name': info.get('longName', symbol),
+                    'error': 'No data available'
+                })
+                continue
+            
+            # Get current price (most recent close)
+            current_price = float(hist['Close'].iloc[-1])
+            
+            # Calculate percentage change from previous close
+            if len(hist) > 1:
+                previous_price = float(hist['Close'].iloc[-2])
+                change_percent = ((current_price - previous_price) / previous_price) * 100
+            else:
+                # If only one day of data, try to get previous close from info
+                previous_close = info.get('previousClose')
+                if previous_close:
+                    change_percent = ((current_price - previous_close) / previous_close) * 100
+                else:
+                    change_percent = 0.0
+            
+            # Get company name
+            company_name = info.get('longName') or info.get('shortName') or symbol
+            
+            results.append({
+                'symbol': symbol,
+                'price': round(current_price, 2),
+                'change': round(change_percent, 2),
+                'name': company_name
+            })
+        except Exception as e:
+            results.append({
+                'symbol': symbol,
+                'price': None,
+                'change': None,
+                'name': symbol,
+                'error': str(e)
+            })
+    return results
+
+
+# Polls each distinct streamed symbol once per interval for /api/stocks/stream
+price_stream = PriceStream(_fetch_stock_prices)
+
+
 @app.route('/api/stocks/prices', methods=['POST', 'OPTIONS'])
 @cross_origin()
+@server_timing
 def get_stock_prices():
     """
     Get real-time stock prices for multiple symbols.
@@ -463,60 +832,8 @@ def get_stock_prices():
                 'message': 'symbols list cannot be empty'
             }), 400
         
-        # Fetch current prices for all symbols
-        import yfinance as yf
-        from datetime import datetime, timedelta
-        
-        results = []
-        for symbol in symbols:
-            try:
-                ticker = yf.Ticker(symbol)
-                # Get current info and recent history
-                info = ticker.info
-                hist = ticker.history(period='5d')
-                
-                if hist.empty:
-                    results.append({
-                        'symbol': symbol,
-                        'price': None,
-                        'change': None,
-                        'name': info.get('longName', symbol),
-                        'error': 'No data available'
-                    })
-                    continue
-                
-                # Get current price (most recent close)
-                current_price = float(hist['Close'].iloc[-1])
-                
-                # Calculate percentage change from previous close
-                if len(hist) > 1:
-                    previous_price = float(hist['Close'].iloc[-2])
-                    change_percent = ((current_price - previous_price) / previous_price) * 100
-                else:
-                    # If only one day of data, try to get previous close from info
-                    previous_close = info.get('previousClose')
-                    if previous_close:
-                        change_percent = ((current_price - previous_close) / previous_close) * 100
-                    else:
-                        change_percent = 0.0
-                
-                # Get company name
-                company_name = info.get('longName') or info.get('shortName') or symbol
-                
-                results.append({
-                    'symbol': symbol,
-                    'price': round(current_price, 2),
-                    'change': round(change_percent, 2),
-                    'name': company_name
-                })
-            except Exception as e:
-                results.append({
-                    'symbol': symbol,
-                    'price': None,
-                    'change': None,
-                    'name': symbol,
-                    'error': str(e)
-                })
+        # Identical symbol lists requested at the same time share one round of lookups
+        results = flights.do(('stock_prices', tuple(symbols)), lambda: _fetch_stock_prices(symbols))
         
         return jsonify({
             'status': 'success',
@@ -529,8 +846,50 @@ def get_stock_prices():
             'message': f'Error fetching stock prices: {str(e)}'
         }), 500
 
+
+@app.route('/api/stocks/stream', methods=['GET', 'OPTIONS'])
+@cross_origin()
+def stream_stock_prices():
+    """
+    Live stock prices as Server-Sent Events.
+    
+    Query parameters:
+    - symbols: comma-separated stock symbols, e.g. ?symbols=AAPL,MSFT
+    
+    Sends a `prices` event ({"stocks": [...]}, same entries as /api/stocks/prices)
+    with the current quotes on connect, then whenever a quote changes. All
+    subscribers share one poller, which fetches each distinct symbol once per
+    PRICE_STREAM_INTERVAL seconds. Answers 503 with Retry-After when the
+    worker already has MAX_OPEN_STREAMS streams open.
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    
+    symbols = sorted({s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()})
+    if not symbols:
+        return jsonify({
+            'status': 'error',
+            'message': 'symbols must be a comma-separated list of stock symbols'
+        }), 400
+    if len(symbols) > MAX_STREAM_SYMBOLS:
+        return jsonify({
+            'status': 'error',
+            'message': f'At most {MAX_STREAM_SYMBOLS} symbols can be streamed'
+        }), 400
+    
+    events = open_streams.hold(price_stream.events(symbols, app.json.dumps))
+    if events is None:
+        return open_streams.reject('stocks_stream')
+    
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/portfolio/predictions', methods=['POST', 'OPTIONS'])
 @cross_origin()
+@portfolio_predictions_admission
 def get_portfolio_predictions():
     """
     Scrape news and generate predictions for portfolio stocks.
@@ -578,13 +937,14 @@ def get_portfolio_predictions():
                 'message': 'Maximum 10 stocks allowed per request'
             }), 400
         
-        # Run async prediction
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        # Run async prediction on the shared event loop
         try:
-            predictions = loop.run_until_complete(
-                portfolio_predictor.predict_portfolio_stocks(symbols)
-            )
+            predictions = run_coroutine(portfolio_predictor.predict_portfolio_stocks(symbols), LLM_TIMEOUT)
+        except FutureTimeoutError:
+            return jsonify({
+                'status': 'error',
+                'message': f'Predictions timed out after {LLM_TIMEOUT:g}s'
+            }), 504
         except Exception as e:
             import traceback
             error_trace = traceback.format_exc()
@@ -594,8 +954,6 @@ def get_portfolio_predictions():
                 'message': f'Error generating predictions: {str(e)}',
                 'details': str(e)
             }), 500
-        finally:
-            loop.close()
         
         return jsonify(predictions), 200
         
@@ -616,6 +974,8 @@ def get_portfolio_predictions():
 
 @app.route('/api/predict/article-impact', methods=['POST', 'OPTIONS'])
 @cross_origin()
+@server_timing
+@article_impact_admission
 def predict_article_impact():
     """
     Predict the impact of an article on multiple asset prices.
@@ -687,15 +1047,14 @@ def predict_article_impact():
                 'message': 'article must contain either "content" or "title" field'
             }), 400
         
-        # Generate predictions (call async function using asyncio)
+        # Generate predictions on the shared event loop
         try:
-            # Use a fresh event loop for this request to avoid event loop issues
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                predictions = loop.run_until_complete(stock_predictor.predict_article_impact(assets, article))
-            finally:
-                loop.close()
+            predictions = run_coroutine(stock_predictor.predict_article_impact(assets, article), LLM_TIMEOUT)
+        except FutureTimeoutError:
+            return jsonify({
+                'status': 'error',
+                'message': f'Prediction timed out after {LLM_TIMEOUT:g}s'
+            }), 504
         except Exception as e:
             return jsonify({
                 'status': 'error',
@@ -760,7 +1119,7 @@ def search_articles():
                 'explanation': None
             }), 200
         
-        client = OpenAI(api_key=api_key)
+        client = openai_client(api_key)
         
         # Create article summaries for AI
         article_summaries = []
@@ -792,7 +1151,7 @@ Format:
             max_tokens=300
         )
         
-        result = json.loads(response.choices[0].message.content)
+        result = parse_llm_json(response.choices[0].message.content)
         indices = result.get('indices', [])
         explanation = result.get('explanation', '')
         
@@ -818,6 +1177,8 @@ Format:
 
 @app.route('/api/video/daily-digest', methods=['POST', 'OPTIONS'])
 @cross_origin()
+@server_timing
+@daily_digest_admission
 def generate_daily_digest_video():
     """Generate a financial daily digest video"""
     if request.method == 'OPTIONS':
@@ -837,7 +1198,7 @@ def generate_daily_digest_video():
                 'message': 'OpenAI API key not configured'
             }), 500
         
-        client = OpenAI(api_key=api_key)
+        client = openai_client(api_key)
         
         # Build portfolio summary
         portfolio_summary = []
@@ -1127,7 +1488,9 @@ def search_places():
             'maxResultCount': 1
         }
         
-        response = requests.post(url, headers=headers, json=body, timeout=10)
+        with upstream_call('google_places') as call:
+            response = requests.post(url, headers=headers, json=body, timeout=10)
+            call.error = response.status_code != 200
         
         if response.status_code != 200:
             error_data = response.json() if response.text else {}
@@ -1189,7 +1552,7 @@ def check_article_impact():
                 'impacts_holdings': impacts
             }), 200
         
-        client = OpenAI(api_key=api_key)
+        client = openai_client(api_key)
         
         prompt = f"""Determine if this financial news article might impact the user's stock holdings.
 
@@ -1222,7 +1585,7 @@ Respond with ONLY a JSON object:
             max_tokens=150
         )
         
-        result = json.loads(response.choices[0].message.content)
+        result = parse_llm_json(response.choices[0].message.content)
         
         return jsonify({
             'status': 'success',
@@ -1621,6 +1984,8 @@ def generate_demo_properties(query):
 
 @app.route('/api/portfolio/planner', methods=['POST', 'OPTIONS'])
 @cross_origin()
+@server_timing
+@portfolio_planner_admission
 def portfolio_planner():
     """
     Portfolio Planner endpoint - analyzes news impact on temporary holdings
@@ -1672,7 +2037,7 @@ def portfolio_planner():
         stock_prices = {}
         if stock_symbols:
             try:
-                import yfinance as yf
+                yf = load_yfinance()
                 for symbol in stock_symbols[:10]:  # Limit to 10 stocks
                     try:
                         ticker = yf.Ticker(symbol)
@@ -1691,7 +2056,7 @@ def portfolio_planner():
 
         if api_key:
             try:
-                client = OpenAI(api_key=api_key)
+                client = openai_client(api_key)
 
                 # Get recent articles from processor
                 recent_articles = processor.get_popular_articles('all', limit=10)
@@ -1749,7 +2114,7 @@ Return ONLY valid JSON:
                     if result_text.startswith('json'):
                         result_text = result_text[4:]
 
-                result = json.loads(result_text)
+                result = parse_llm_json(result_text)
                 predicted_change_percent = result.get('predicted_change_percent', 0)
 
                 # Build news references from AI response
@@ -1834,75 +2199,55 @@ Return ONLY valid JSON:
         }), 500
 
 
-@app.route('/api/knowledge-graph', methods=['POST', 'OPTIONS'])
-@cross_origin()
-def generate_knowledge_graph():
-    """
-    Generate a knowledge graph from an article URL.
-    Analyzes the article and creates a graph showing events, impacts, and reasoning.
+@traced('knowledge_graph.build')
+def _build_knowledge_graph(article_url, portfolio_stocks):
     """
-    if request.method == 'OPTIONS':
-        return jsonify({'status': 'ok'}), 200
+    Scrape an article and have the LLM build its knowledge graph.
     
+    Returns (payload, status) rather than a response so that concurrent
+    identical requests can share one result (see generate_knowledge_graph).
+    """
+    # Scrape article content
     try:
-        data = request.get_json()
+        import requests
+        from bs4 import BeautifulSoup
         
-        if not data:
-            return jsonify({
-                'status': 'error',
-                'message': 'Request body must contain JSON data'
-            }), 400
+        headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+        }
+        response = requests.get(article_url, headers=headers, timeout=10)
+        response.raise_for_status()
         
-        article_url = data.get('article_url')
-        portfolio_stocks = data.get('portfolio_stocks', [])
+        soup = BeautifulSoup(response.content, 'html.parser')
         
-        if not article_url:
-            return jsonify({
-                'status': 'error',
-                'message': 'article_url is required'
-            }), 400
+        # Extract title
+        title = soup.find('title')
+        title_text = title.get_text().strip() if title else 'Article'
         
-        # Scrape article content
-        try:
-            import requests
-            from bs4 import BeautifulSoup
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = requests.get(article_url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract title
-            title = soup.find('title')
-            title_text = title.get_text().strip() if title else 'Article'
-            
-            # Extract main content
-            article_text = ''
-            for tag in soup.find_all(['p', 'article', 'div']):
-                text = tag.get_text().strip()
-                if len(text) > 50:  # Only include substantial paragraphs
-                    article_text += text + ' '
-            
-            # Limit article text length
-            article_text = article_text[:5000]
-            
-        except Exception as e:
-            print(f"Error scraping article: {e}")
-            # Use URL and basic info if scraping fails
-            title_text = article_url
-            article_text = f"Article from {article_url}"
+        # Extract main content
+        article_text = ''
+        for tag in soup.find_all(['p', 'article', 'div']):
+            text = tag.get_text().strip()
+            if len(text) > 50:  # Only include substantial paragraphs
+                article_text += text + ' '
         
-        # Use OpenAI to analyze the article and generate knowledge graph data
-        # Build prompt first so it's available for fallback
-        stocks_str = ', '.join(portfolio_stocks) if portfolio_stocks else 'None'
-        prompt = None
+        # Limit article text length
+        article_text = article_text[:5000]
         
-        if not portfolio_stocks:
-            # If no stocks, still analyze but note it
-            prompt = f"""Analyze this article and create a knowledge graph structure.
+    except Exception as e:
+        print(f"Error scraping article: {e}")
+        # Use URL and basic info if scraping fails
+        title_text = article_url
+        article_text = f"Article from {article_url}"
+    
+    # Use OpenAI to analyze the article and generate knowledge graph data
+    # Build prompt first so it's available for fallback
+    stocks_str = ', '.join(portfolio_stocks) if portfolio_stocks else 'None'
+    prompt = None
+    
+    if not portfolio_stocks:
+        # If no stocks, still analyze but note it
+        prompt = f"""Analyze this article and create a knowledge graph structure.
 
 Article Title: {title_text}
 Article Content: {article_text[:3000]}
@@ -1925,9 +2270,9 @@ Return ONLY valid JSON in this exact format:
 }}
 
 CRITICAL: Your response MUST be complete, valid JSON. Do not truncate your response."""
-        else:
-            # Always generate impacts for each stock in portfolio
-            prompt = f"""Analyze this article and create a knowledge graph structure. You MUST analyze how this article impacts EACH stock in the user's portfolio, even if the connection is indirect.
+    else:
+        # Always generate impacts for each stock in portfolio
+        prompt = f"""Analyze this article and create a knowledge graph structure. You MUST analyze how this article impacts EACH stock in the user's portfolio, even if the connection is indirect.
 
 Article Title: {title_text}
 Article Content: {article_text[:3000]}
@@ -1975,226 +2320,259 @@ Return ONLY valid JSON in this exact format:
 CRITICAL: 
 1. You MUST include an impact entry for EVERY stock in the portfolio: {', '.join(portfolio_stocks)}. Do not leave any stock out. If the connection is indirect, explain the indirect relationship clearly.
 2. Your response MUST be complete, valid JSON. Do not truncate your response. Ensure all JSON brackets and braces are properly closed."""
+    
+    # Now try OpenAI API
+    try:
+        openai_api_key = os.getenv('OPENAI_API_KEY')
+        if not openai_api_key:
+            raise Exception("OPENAI_API_KEY environment variable is not set. Please set it in your .env file.")
         
-        # Now try OpenAI API
-        try:
-            from openai import OpenAI
-            import os
-            
-            openai_api_key = os.getenv('OPENAI_API_KEY')
-            if not openai_api_key:
-                raise Exception("OPENAI_API_KEY environment variable is not set. Please set it in your .env file.")
-            
-            client = OpenAI(api_key=openai_api_key)
-            print(f"Using OpenAI API for knowledge graph generation")
-            
-            # Calculate appropriate max_tokens based on number of stocks
-            # Base tokens: 1000 for article analysis + 500 per stock for detailed impact analysis
-            num_stocks = len(portfolio_stocks) if portfolio_stocks else 0
-            base_tokens = 2000
-            stock_tokens = max(800 * num_stocks, 2000)  # At least 800 tokens per stock, minimum 2000
-            max_tokens = min(base_tokens + stock_tokens, 8000)  # Cap at 8000 to avoid hitting limits
-            
-            print(f"Generating knowledge graph with max_tokens={max_tokens} for {num_stocks} stocks")
-            
-            # Retry logic for incomplete responses
-            max_retries = 2
-            result = None
-            last_error = None
-            
-            for attempt in range(max_retries + 1):
+        client = openai_client(openai_api_key)
+        print(f"Using OpenAI API for knowledge graph generation")
+        
+        # Calculate appropriate max_tokens based on number of stocks
+        # Base tokens: 1000 for article analysis + 500 per stock for detailed impact analysis
+        num_stocks = len(portfolio_stocks) if portfolio_stocks else 0
+        base_tokens = 2000
+        stock_tokens = max(800 * num_stocks, 2000)  # At least 800 tokens per stock, minimum 2000
+        max_tokens = min(base_tokens + stock_tokens, 8000)  # Cap at 8000 to avoid hitting limits
+        
+        print(f"Generating knowledge graph with max_tokens={max_tokens} for {num_stocks} stocks")
+        
+        # Retry logic for incomplete responses
+        max_retries = 2
+        result = None
+        last_error = None
+        
+        for attempt in range(max_retries + 1):
+            try:
+                response = client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[
+                        {"role": "system", "content": "You are a financial analyst. Always return valid JSON only, no markdown. You MUST analyze impacts for every stock in the user's portfolio, even if the connection is indirect. CRITICAL: Your response MUST be complete, valid JSON. Do not truncate your response."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=max_tokens
+                )
+                
+                # Check response structure
+                if not response or not response.choices or len(response.choices) == 0:
+                    raise Exception("Empty response from OpenAI API")
+                
+                result_text = response.choices[0].message.content.strip()
+                
+                if not result_text:
+                    raise Exception("Empty content in OpenAI response")
+                
+                # Check if response was truncated
+                finish_reason = getattr(response.choices[0], 'finish_reason', None)
+                if finish_reason == 'length':
+                    print(f"Warning: Response was truncated (finish_reason=length). Attempt {attempt + 1}/{max_retries + 1}")
+                    if attempt < max_retries:
+                        # Increase tokens and retry
+                        max_tokens = min(max_tokens + 2000, 8000)
+                        continue
+                    else:
+                        print(f"Warning: Response truncated on final attempt. Attempting to parse partial JSON...")
+                
+                # Remove markdown code blocks if present
+                if result_text.startswith('```'):
+                    result_text = result_text.split('```')[1]
+                    if result_text.startswith('json'):
+                        result_text = result_text[4:]
+                    result_text = result_text.strip()
+                
+                # Try to parse JSON
                 try:
-                    response = client.chat.completions.create(
-                        model="gpt-4",
-                        messages=[
-                            {"role": "system", "content": "You are a financial analyst. Always return valid JSON only, no markdown. You MUST analyze impacts for every stock in the user's portfolio, even if the connection is indirect. CRITICAL: Your response MUST be complete, valid JSON. Do not truncate your response."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=max_tokens
-                    )
+                    result = parse_llm_json(result_text)
+                except json.JSONDecodeError as json_err:
+                    # Try to fix incomplete JSON
+                    print(f"JSON parse error: {json_err}. Attempting to fix incomplete JSON...")
                     
-                    # Check response structure
-                    if not response or not response.choices or len(response.choices) == 0:
-                        raise Exception("Empty response from OpenAI API")
+                    # Try to extract valid JSON from incomplete response
+                    # Look for the last complete object/array
+                    if result_text.rstrip().endswith(','):
+                        result_text = result_text.rstrip()[:-1]
                     
-                    result_text = response.choices[0].message.content.strip()
+                    # Try to close unclosed brackets/braces
+                    open_braces = result_text.count('{') - result_text.count('}')
+                    open_brackets = result_text.count('[') - result_text.count(']')
                     
-                    if not result_text:
-                        raise Exception("Empty content in OpenAI response")
+                    if open_braces > 0:
+                        result_text += '}' * open_braces
+                    if open_brackets > 0:
+                        result_text += ']' * open_brackets
                     
-                    # Check if response was truncated
-                    finish_reason = getattr(response.choices[0], 'finish_reason', None)
-                    if finish_reason == 'length':
-                        print(f"Warning: Response was truncated (finish_reason=length). Attempt {attempt + 1}/{max_retries + 1}")
-                        if attempt < max_retries:
-                            # Increase tokens and retry
-                            max_tokens = min(max_tokens + 2000, 8000)
-                            continue
-                        else:
-                            print(f"Warning: Response truncated on final attempt. Attempting to parse partial JSON...")
-                    
-                    # Remove markdown code blocks if present
-                    if result_text.startswith('```'):
-                        result_text = result_text.split('```')[1]
-                        if result_text.startswith('json'):
-                            result_text = result_text[4:]
-                        result_text = result_text.strip()
-                    
-                    # Try to parse JSON
+                    # Try parsing again
                     try:
-                        result = json.loads(result_text)
-                    except json.JSONDecodeError as json_err:
-                        # Try to fix incomplete JSON
-                        print(f"JSON parse error: {json_err}. Attempting to fix incomplete JSON...")
-                        
-                        # Try to extract valid JSON from incomplete response
-                        # Look for the last complete object/array
-                        if result_text.rstrip().endswith(','):
-                            result_text = result_text.rstrip()[:-1]
-                        
-                        # Try to close unclosed brackets/braces
-                        open_braces = result_text.count('{') - result_text.count('}')
-                        open_brackets = result_text.count('[') - result_text.count(']')
-                        
-                        if open_braces > 0:
-                            result_text += '}' * open_braces
-                        if open_brackets > 0:
-                            result_text += ']' * open_brackets
-                        
-                        # Try parsing again
-                        try:
-                            result = json.loads(result_text)
-                        except json.JSONDecodeError:
-                            # If still fails and we have retries left, retry with more tokens
-                            if attempt < max_retries:
-                                max_tokens = min(max_tokens + 2000, 8000)
-                                last_error = f"JSON parsing failed: {json_err}"
-                                continue
-                            else:
-                                raise Exception(f"Failed to parse JSON response after {max_retries + 1} attempts. Last error: {json_err}")
-                    
-                    # Validate that we have the required structure
-                    if not isinstance(result, dict):
-                        raise Exception("Response is not a JSON object")
-                    
-                    # Ensure all required fields exist
-                    if 'article' not in result:
-                        result['article'] = {'title': title_text, 'summary': ''}
-                    if 'events' not in result:
-                        result['events'] = []
-                    if 'impacts' not in result:
-                        result['impacts'] = []
-                    if 'reasoning' not in result:
-                        result['reasoning'] = []
-                    
-                    # Validate impacts if stocks were provided
-                    if portfolio_stocks and len(result.get('impacts', [])) < len(portfolio_stocks):
-                        print(f"Warning: Only {len(result.get('impacts', []))} impacts provided for {len(portfolio_stocks)} stocks")
-                        # If we have retries left and impacts are missing, retry
+                        result = parse_llm_json(result_text)
+                    except json.JSONDecodeError:
+                        # If still fails and we have retries left, retry with more tokens
                         if attempt < max_retries:
                             max_tokens = min(max_tokens + 2000, 8000)
-                            last_error = f"Missing impacts for some stocks. Expected {len(portfolio_stocks)}, got {len(result.get('impacts', []))}"
+                            last_error = f"JSON parsing failed: {json_err}"
                             continue
-                    
-                    # Success! Break out of retry loop
-                    break
-                    
-                except Exception as e:
-                    last_error = str(e)
-                    import traceback
-                    error_trace = traceback.format_exc()
-                    print(f"Error on attempt {attempt + 1}/{max_retries + 1}: {e}")
-                    print(f"Traceback: {error_trace}")
-                    
+                        else:
+                            raise Exception(f"Failed to parse JSON response after {max_retries + 1} attempts. Last error: {json_err}")
+                
+                # Validate that we have the required structure
+                if not isinstance(result, dict):
+                    raise Exception("Response is not a JSON object")
+                
+                # Ensure all required fields exist
+                if 'article' not in result:
+                    result['article'] = {'title': title_text, 'summary': ''}
+                if 'events' not in result:
+                    result['events'] = []
+                if 'impacts' not in result:
+                    result['impacts'] = []
+                if 'reasoning' not in result:
+                    result['reasoning'] = []
+                
+                # Validate impacts if stocks were provided
+                if portfolio_stocks and len(result.get('impacts', [])) < len(portfolio_stocks):
+                    print(f"Warning: Only {len(result.get('impacts', []))} impacts provided for {len(portfolio_stocks)} stocks")
+                    # If we have retries left and impacts are missing, retry
                     if attempt < max_retries:
-                        print(f"Retrying with more tokens (current: {max_tokens})...")
                         max_tokens = min(max_tokens + 2000, 8000)
+                        last_error = f"Missing impacts for some stocks. Expected {len(portfolio_stocks)}, got {len(result.get('impacts', []))}"
                         continue
-                    else:
-                        # On final attempt, raise with full error details
-                        raise Exception(f"Failed after {max_retries + 1} attempts. Last error: {last_error}")
-            
-            if result is None:
-                raise Exception(f"Failed to generate valid response after {max_retries + 1} attempts: {last_error}")
-            
+                
+                # Success! Break out of retry loop
+                break
+                
+            except Exception as e:
+                last_error = str(e)
+                import traceback
+                error_trace = traceback.format_exc()
+                print(f"Error on attempt {attempt + 1}/{max_retries + 1}: {e}")
+                print(f"Traceback: {error_trace}")
+                
+                if attempt < max_retries:
+                    print(f"Retrying with more tokens (current: {max_tokens})...")
+                    max_tokens = min(max_tokens + 2000, 8000)
+                    continue
+                else:
+                    # On final attempt, raise with full error details
+                    raise Exception(f"Failed after {max_retries + 1} attempts. Last error: {last_error}")
+        
+        if result is None:
+            raise Exception(f"Failed to generate valid response after {max_retries + 1} attempts: {last_error}")
+        
+        return {
+            'status': 'success',
+            'article': result.get('article', {'title': title_text, 'summary': ''}),
+            'events': result.get('events', []),
+            'impacts': result.get('impacts', []),
+            'reasoning': result.get('reasoning', [])
+        }, 200
+        
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error with OpenAI analysis: {e}")
+        print(f"Full traceback: {error_trace}")
+        
+        # Try OpenRouter as fallback if OpenAI fails
+        try:
+            from openrouter_client import OpenRouterClient
+            openrouter_key = os.getenv('OPENROUTER_API_KEY')
+            if openrouter_key and prompt:
+                print("Attempting to use OpenRouter as fallback...")
+                openrouter_client = OpenRouterClient(api_key=openrouter_key)
+                
+                # Recalculate tokens for OpenRouter
+                num_stocks = len(portfolio_stocks) if portfolio_stocks else 0
+                base_tokens = 2000
+                stock_tokens = max(800 * num_stocks, 2000)
+                max_tokens = min(base_tokens + stock_tokens, 8000)
+                
+                # Use the same prompt
+                response = openrouter_client.chat_completions_create(
+                    model="deepseek/deepseek-r1-0528:free",
+                    messages=[
+                        {"role": "system", "content": "You are a financial analyst. Always return valid JSON only, no markdown. You MUST analyze impacts for every stock in the user's portfolio, even if the connection is indirect. CRITICAL: Your response MUST be complete, valid JSON. Do not truncate your response."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.3,
+                    max_tokens=max_tokens
+                )
+                
+                result_text = response.choices[0].message.content.strip()
+                
+                # Remove markdown code blocks if present
+                if result_text.startswith('```'):
+                    result_text = result_text.split('```')[1]
+                    if result_text.startswith('json'):
+                        result_text = result_text[4:]
+                    result_text = result_text.strip()
+                
+                result = parse_llm_json(result_text)
+                
+                # Ensure all required fields exist
+                if 'article' not in result:
+                    result['article'] = {'title': title_text, 'summary': ''}
+                if 'events' not in result:
+                    result['events'] = []
+                if 'impacts' not in result:
+                    result['impacts'] = []
+                if 'reasoning' not in result:
+                    result['reasoning'] = []
+                
+                print("Successfully generated knowledge graph using OpenRouter fallback")
+                return {
+                    'status': 'success',
+                    'article': result.get('article', {'title': title_text, 'summary': ''}),
+                    'events': result.get('events', []),
+                    'impacts': result.get('impacts', []),
+                    'reasoning': result.get('reasoning', [])
+                }, 200
+        except Exception as openrouter_error:
+            print(f"OpenRouter fallback also failed: {openrouter_error}")
+        
+        # Return error so user knows what went wrong
+        return {
+            'status': 'error',
+            'message': f'Failed to generate knowledge graph: {str(e)}. Please check that OPENAI_API_KEY or OPENROUTER_API_KEY is set and valid.',
+            'error_details': str(e)
+        }, 500
+
+
+@app.route('/api/knowledge-graph', methods=['POST', 'OPTIONS'])
+@cross_origin()
+@server_timing
+@knowledge_graph_admission
+def generate_knowledge_graph():
+    """
+    Generate a knowledge graph from an article URL.
+    Analyzes the article and creates a graph showing events, impacts, and reasoning.
+    """
+    if request.method == 'OPTIONS':
+        return jsonify({'status': 'ok'}), 200
+    
+    try:
+        data = request.get_json()
+        
+        if not data:
             return jsonify({
-                'status': 'success',
-                'article': result.get('article', {'title': title_text, 'summary': ''}),
-                'events': result.get('events', []),
-                'impacts': result.get('impacts', []),
-                'reasoning': result.get('reasoning', [])
-            }), 200
-            
-        except Exception as e:
-            import traceback
-            error_trace = traceback.format_exc()
-            print(f"Error with OpenAI analysis: {e}")
-            print(f"Full traceback: {error_trace}")
-            
-            # Try OpenRouter as fallback if OpenAI fails
-            try:
-                from openrouter_client import OpenRouterClient
-                openrouter_key = os.getenv('OPENROUTER_API_KEY')
-                if openrouter_key and prompt:
-                    print("Attempting to use OpenRouter as fallback...")
-                    openrouter_client = OpenRouterClient(api_key=openrouter_key)
-                    
-                    # Recalculate tokens for OpenRouter
-                    num_stocks = len(portfolio_stocks) if portfolio_stocks else 0
-                    base_tokens = 2000
-                    stock_tokens = max(800 * num_stocks, 2000)
-                    max_tokens = min(base_tokens + stock_tokens, 8000)
-                    
-                    # Use the same prompt
-                    response = openrouter_client.chat_completions_create(
-                        model="deepseek/deepseek-r1-0528:free",
-                        messages=[
-                            {"role": "system", "content": "You are a financial analyst. Always return valid JSON only, no markdown. You MUST analyze impacts for every stock in the user's portfolio, even if the connection is indirect. CRITICAL: Your response MUST be complete, valid JSON. Do not truncate your response."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        temperature=0.3,
-                        max_tokens=max_tokens
-                    )
-                    
-                    result_text = response.choices[0].message.content.strip()
-                    
-                    # Remove markdown code blocks if present
-                    if result_text.startswith('```'):
-                        result_text = result_text.split('```')[1]
-                        if result_text.startswith('json'):
-                            result_text = result_text[4:]
-                        result_text = result_text.strip()
-                    
-                    result = json.loads(result_text)
-                    
-                    # Ensure all required fields exist
-                    if 'article' not in result:
-                        result['article'] = {'title': title_text, 'summary': ''}
-                    if 'events' not in result:
-                        result['events'] = []
-                    if 'impacts' not in result:
-                        result['impacts'] = []
-                    if 'reasoning' not in result:
-                        result['reasoning'] = []
-                    
-                    print("Successfully generated knowledge graph using OpenRouter fallback")
-                    return jsonify({
-                        'status': 'success',
-                        'article': result.get('article', {'title': title_text, 'summary': ''}),
-                        'events': result.get('events', []),
-                        'impacts': result.get('impacts', []),
-                        'reasoning': result.get('reasoning', [])
-                    }), 200
-            except Exception as openrouter_error:
-                print(f"OpenRouter fallback also failed: {openrouter_error}")
-            
-            # Return error so user knows what went wrong
+                'status': 'error',
+                'message': 'Request body must contain JSON data'
+            }), 400
+        
+        article_url = data.get('article_url')
+        portfolio_stocks = data.get('portfolio_stocks', [])
+        
+        if not article_url:
             return jsonify({
                 'status': 'error',
-                'message': f'Failed to generate knowledge graph: {str(e)}. Please check that OPENAI_API_KEY or OPENROUTER_API_KEY is set and valid.',
-                'error_details': str(e)
-            }), 500
+                'message': 'article_url is required'
+            }), 400
+        
+        # Identical requests in flight at the same time share one scrape and LLM call
+        key = ('knowledge_graph', article_url, json.dumps(portfolio_stocks, sort_keys=True))
+        payload, status = flights.do(key, lambda: _build_knowledge_graph(article_url, portfolio_stocks))
+        return jsonify(payload), status
         
     except Exception as e:
         print(f"Error generating knowledge graph: {e}")
@@ -2217,11 +2595,15 @@ def get_top_companies():
     
     try:
         companies = company_data_provider.get_top_companies()
-        return jsonify({
-            'status': 'success',
-            'companies': companies,
-            'count': len(companies)
-        }), 200
+        return conditional_response(
+            make_etag(company_data_provider.cache_version('top_companies')),
+            lambda: (jsonify({
+                'status': 'success',
+                'companies': companies,
+                'count': len(companies)
+            }), 200),
+            COMPANIES_CACHE_CONTROL
+        )
     except Exception as e:
         print(f"Error fetching top companies: {e}")
         return jsonify({
@@ -2247,10 +2629,14 @@ def get_company_chart(symbol):
                 'message': chart_data['error']
             }), 404
         
-        return jsonify({
-            'status': 'success',
-            'data': chart_data
-        }), 200
+        return conditional_response(
+            make_etag(company_data_provider.cache_version(f'chart_{symbol}')),
+            lambda: (jsonify({
+                'status': 'success',
+                'data': chart_data
+            }), 200),
+            COMPANIES_CACHE_CONTROL
+        )
     except Exception as e:
         print(f"Error fetching chart data for {symbol}: {e}")
         return jsonify({
@@ -2268,11 +2654,15 @@ def get_lesser_known_companies():
     
     try:
         companies = company_data_provider.get_lesser_known_companies()
-        return jsonify({
-            'status': 'success',
-            'companies': companies,
-            'count': len(companies)
-        }), 200
+        return conditional_response(
+            make_etag(company_data_provider.cache_version('lesser_known')),
+            lambda: (jsonify({
+                'status': 'success',
+                'companies': companies,
+                'count': len(companies)
+            }), 200),
+            COMPANIES_CACHE_CONTROL
+        )
     except Exception as e:
         print(f"Error fetching lesser-known companies: {e}")
         return jsonify({
@@ -2283,6 +2673,7 @@ def get_lesser_known_companies():
 
 @app.route('/api/companies/recommendations', methods=['GET', 'OPTIONS'])
 @cross_origin()
+@recommendations_admission
 def get_investment_recommendations():
     """Get AI-powered investment recommendations for lesser-known companies"""
     if request.method == 'OPTIONS':
@@ -2302,32 +2693,21 @@ def get_investment_recommendations():
             portfolio_stocks = company_data_provider.get_portfolio_stocks_data(portfolio_symbols)
         
         # Then get AI recommendations
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            recommendations = loop.run_until_complete(
-                company_data_provider.get_investment_recommendations(companies, portfolio_stocks)
-            )
-        finally:
-            # Properly shutdown the event loop to handle pending async tasks
-            try:
-                # Cancel all pending tasks
-                pending = asyncio.all_tasks(loop)
-                for task in pending:
-                    task.cancel()
-                # Give tasks a chance to clean up
-                if pending:
-                    loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
-            except Exception:
-                pass
-            finally:
-                loop.close()
+        recommendations = run_coroutine(
+            company_data_provider.get_investment_recommendations(companies, portfolio_stocks),
+            LLM_TIMEOUT
+        )
         
         return jsonify({
             'status': 'success',
             'recommendations': recommendations,
             'companiesAnalyzed': len(companies)
         }), 200
+    except FutureTimeoutError:
+        return jsonify({
+            'status': 'error',
+            'message': f'Recommendations timed out after {LLM_TIMEOUT:g}s'
+        }), 504
     except Exception as e:
         import traceback
         print(f"Error getting recommendations: {e}")
@@ -2343,4 +2723,8 @@ if __name__ == '__main__':
     port = int(os.getenv('PORT', 5004))
     print(f"Starting backend server on http://localhost:{port}")
     print("CORS enabled for all origins")
+    print("Development server only; for production run: gunicorn -c gunicorn.conf.py wsgi:app")
+    # With the reloader, only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warmup.start()
     app.run(debug=True, port=port, host='0.0.0.0')
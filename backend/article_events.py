@@ -0,0 +1,202 @@
+"""Append-only log of article store changes, for clients that follow the store live"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+# Events kept in the log; a client further behind than this reloads the full list
+ARTICLE_EVENTS_MAX = int(os.getenv('ARTICLE_EVENTS_MAX', 2000))
+# Seconds between checks for new events on an open stream
+ARTICLE_EVENTS_POLL_INTERVAL = float(os.getenv('ARTICLE_EVENTS_POLL_INTERVAL', 1))
+# Seconds between keep-alive comments on an idle stream
+ARTICLE_EVENTS_HEARTBEAT = float(os.getenv('ARTICLE_EVENTS_HEARTBEAT', 15))
+# A stream is closed after this long and the browser reconnects (resuming
+# from its last event), so one client can't hold a worker thread indefinitely
+ARTICLE_EVENTS_MAX_SECONDS = float(os.getenv('ARTICLE_EVENTS_MAX_SECONDS', 300))
+
+
+def diff_articles(before: Dict[str, Dict], after: Iterable[Dict]) -> List[Dict]:
+    """
+    Changes from one version of the store (articles by ID) to the next, as
+    events without a seq: add and update carry the new article, remove only its ID.
+    """
+    changes = []
+    seen = set()
+    for article in after:
+        article_id = article.get('id')
+        if not article_id or article_id in seen:
+            continue
+        seen.add(article_id)
+        previous = before.get(article_id)
+        if previous is None:
+            changes.append({'type': 'add', 'id': article_id, 'article': article})
+        elif previous != article:
+            changes.append({'type': 'update', 'id': article_id, 'article': article})
+    for article_id in before:
+        if article_id not in seen:
+            changes.append({'type': 'remove', 'id': article_id})
+    return changes
+
+
+class ArticleEventLog:
+    """
+    JSON Lines file of store changes, one event per line, e.g.
+    {"seq": 42, "type": "update", "id": "<article id>", "article": {...}}
+
+    `seq` goes up by one per event across all worker processes (appends hold
+    an exclusive lock), so a client that has seen event N can ask for
+    everything after it. Only the newest `max_events` are kept.
+
+    Each process keeps the parsed log in memory and reads only what was
+    appended since it last looked, so open streams cost one stat() per poll.
+    """
+
+    def __init__(self, path: str = 'article_events.jsonl', max_events: int = ARTICLE_EVENTS_MAX):
+        self.path = path
+        self.max_events = max_events
+        self._events: List[Dict] = []
+        self._seqs: List[int] = []
+        self._file_id = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _append_lock(self):
+        # A separate lock file, since compaction replaces the log itself
+        with open(self.path + '.lock', 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _refresh(self):
+        """Bring the in-memory events up to date with the file; call with self._lock held"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._events, self._seqs, self._file_id, self._offset = [], [], None, 0
+            return
+        file_id = (stat.st_dev, stat.st_ino)
+        if file_id != self._file_id or stat.st_size < self._offset:
+            # Compacted (or recreated) since we last read it
+            self._events, self._seqs, self._file_id, self._offset = [], [], file_id, 0
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being written has no newline yet; pick it up next time
+        complete = data.rfind(b'\n') + 1
+        for line in data[:complete].splitlines():
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if self._seqs and event['seq'] <= self._seqs[-1]:
+                continue
+            self._events.append(event)
+            self._seqs.append(event['seq'])
+        self._offset += complete
+
+    def head(self) -> int:
+        """seq of the newest event, 0 if there are none"""
+        with self._lock:
+            self._refresh()
+            return self._seqs[-1] if self._seqs else 0
+
+    def since(self, seq: int) -> Tuple[Optional[List[Dict]], int]:
+        """
+        (events after `seq`, head). The events are None if the log no longer
+        reaches back to `seq`, or never reached it, so the client has to reload.
+        """
+        with self._lock:
+            self._refresh()
+            head = self._seqs[-1] if self._seqs else 0
+            if seq > head or (self._seqs and seq < self._seqs[0] - 1):
+                return None, head
+            return self._events[bisect.bisect_right(self._seqs, seq):], head
+
+    def append(self, changes: List[Dict]) -> int:
+        """Number the changes and write them; returns the new head"""
+        if not changes:
+            return self.head()
+        with self._append_lock(), self._lock:
+            self._refresh()
+            seq = self._seqs[-1] if self._seqs else 0
+            lines = []
+            for change in changes:
+                seq += 1
+                lines.append(json.dumps(dict(change, seq=seq)) + '\n')
+            try:
+                with open(self.path, 'a') as f:
+                    f.write(''.join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._refresh()
+                # Trim in batches rather than rewriting the file on every append
+                if len(self._events) > self.max_events * 1.25:
+                    self._compact()
+            except OSError as e:
+                print(f"Error writing article events: {e}")
+            return seq
+
+    def _compact(self):
+        """Keep the newest max_events events; call with both locks held"""
+        keep = self._events[-self.max_events:]
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for event in keep:
+                f.write(json.dumps(event) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._refresh()
+
+    def stream(self, after: Optional[int], encode: Callable[[Dict], str],
+               transform: Callable[[Dict], Dict] = lambda article: article):
+        """
+        Server-Sent Events for changes after seq `after` (or from now if None),
+        until ARTICLE_EVENTS_MAX_SECONDS pass. Each event's `id` is its seq, so
+        a reconnecting EventSource resumes with Last-Event-ID. A `reset` event
+        means the events since `after` are gone and the client should reload
+        the full list; the stream then continues from the current head.
+
+        `transform` is applied to each article before it is sent.
+        """
+        deadline = time.monotonic() + ARTICLE_EVENTS_MAX_SECONDS
+        last_sent = time.monotonic()
+        if after is None:
+            after = self.head()
+        # Reconnect quickly after the server closes the stream; the id gives a
+        # client that connected without one a point to resume from
+        yield f"retry: 2000\nid: {after}\n\n"
+        while time.monotonic() < deadline:
+            events, head = self.since(after)
+            if events is None:
+                yield f"id: {head}\nevent: reset\ndata: {encode({'seq': head})}\n\n"
+                after = head
+                last_sent = time.monotonic()
+                continue
+            for event in events:
+                if 'article' in event:
+                    event = dict(event, article=transform(event['article']))
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {encode(event)}\n\n"
+                after = event['seq']
+            if events:
+                last_sent = time.monotonic()
+            elif time.monotonic() - last_sent >= ARTICLE_EVENTS_HEARTBEAT:
+                yield ': keep-alive\n\n'
+                last_sent = time.monotonic()
+            time.sleep(ARTICLE_EVENTS_POLL_INTERVAL)
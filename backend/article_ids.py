@@ -0,0 +1,50 @@
+"""Deterministic, content-addressed article IDs derived from canonical URLs"""
+
+import hashlib
+from typing import Dict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+ID_PREFIX = 'article_'
+ID_HASH_LENGTH = 16
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'ocid', 'ref', 'smid'}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL so that links to the same article compare equal.
+
+    Lowercases the scheme and host, drops default ports, fragments, tracking
+    parameters (utm_* and friends) and trailing slashes, and sorts the
+    remaining query parameters.
+    """
+    url = (url or '').strip()
+    if not url:
+        return ''
+    parts = urlsplit(url)
+    scheme = (parts.scheme or 'http').lower()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (('http', 80), ('https', 443)) else f"{host}:{port}"
+    path = parts.path.rstrip('/') or '/'
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMS)
+    # http and https versions of a link are the same article
+    return urlunsplit(('https' if scheme in ('http', 'https') else scheme, netloc, path, urlencode(query), ''))
+
+
+def article_id_for_url(url: str) -> str:
+    """Stable ID for an article URL, identical across processes and refreshes"""
+    digest = hashlib.sha1(canonicalize_url(url).encode('utf-8')).hexdigest()
+    return ID_PREFIX + digest[:ID_HASH_LENGTH]
+
+
+def article_id(article: Dict) -> str:
+    """Stable ID for an article dict; falls back to title and source when there is no URL"""
+    if article.get('url'):
+        return article_id_for_url(article['url'])
+    fallback = f"{article.get('source', '')}\n{article.get('title', '')}".encode('utf-8')
+    return ID_PREFIX + hashlib.sha1(fallback).hexdigest()[:ID_HASH_LENGTH]
@@ -0,0 +1,99 @@
+"""Long-lived background event loop shared by all request threads"""
+
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+# Threads for blocking work the coroutines hand off (run_in_executor(None, ...))
+EXECUTOR_WORKERS = int(os.getenv('ASYNC_EXECUTOR_WORKERS', 16))
+
+
+class AsyncRuntime:
+    """
+    One event loop per process, running forever on a daemon thread.
+
+    Request threads submit coroutines with run() and block on the result,
+    while the loop keeps every submitted coroutine in flight at once. Async
+    clients created on this loop (see shared_dedalus_client) keep their
+    connection pools across requests instead of being rebuilt per request.
+
+    The loop starts on first use. A forked child (e.g. a gunicorn worker
+    when preloading) starts its own, since threads don't survive a fork.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None or self._pid != os.getpid():
+            with self._lock:
+                if self._loop is None or self._pid != os.getpid():
+                    self._start()
+        return self._loop
+
+    def _start(self):
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS,
+                                                     thread_name_prefix='async-runtime-executor'))
+        ready = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name='async-runtime', daemon=True)
+        self._thread.start()
+        ready.wait()
+        self._loop = loop
+        self._pid = os.getpid()
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """
+        Run a coroutine on the shared loop and wait for its result from a sync
+        thread. The coroutine sees the caller's context variables (e.g. the
+        current trace span): run_coroutine_threadsafe schedules it with a
+        copy of the calling thread's context.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timed out or the caller was interrupted: don't leave it running
+            future.cancel()
+            raise
+
+
+runtime = AsyncRuntime()
+
+# Async clients per event loop, created lazily from coroutines running on that loop
+_dedalus_clients = weakref.WeakKeyDictionary()
+
+
+def run_coroutine(coro, timeout: Optional[float] = None):
+    """Run a coroutine on the process-wide background loop"""
+    return runtime.run(coro, timeout)
+
+
+def shared_dedalus_client():
+    """
+    AsyncDedalus client shared by every coroutine on the current event loop.
+
+    An async client's connection pool is bound to the loop it runs on, so
+    there is one client per loop; on the runtime loop that means one per
+    process. Reads DEDALUS_API_KEY from the environment like AsyncDedalus().
+    Callers must not close it.
+    """
+    loop = asyncio.get_running_loop()
+    client = _dedalus_clients.get(loop)
+    if client is None:
+        from dedalus_labs import AsyncDedalus
+        client = _dedalus_clients[loop] = AsyncDedalus()
+    return client
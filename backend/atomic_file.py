@@ -0,0 +1,31 @@
+"""Crash- and concurrency-safe JSON file writes"""
+
+import json
+import os
+import tempfile
+
+
+def write_json_atomic(path: str, data, **dump_kwargs):
+    """
+    Write JSON to `path` so that readers only ever see the old or the new file.
+
+    The data goes to a temporary file in the same directory, which is then
+    renamed over the target. Several worker processes can share the data
+    files this way without one of them reading a half-written file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file owner-only; keep the usual permissions
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
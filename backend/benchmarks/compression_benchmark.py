@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark response compression on a typical /api/news payload.
+
+Serves synthetic articles (with summaries and location reasoning, like the
+real store) through the Flask app in a scratch directory, then reports the
+bytes on the wire and server time for each encoding, plus the compression
+levels around the configured ones so the CPU/size trade-off is visible.
+
+Usage (from the backend directory):
+    python benchmarks/compression_benchmark.py [--articles 500] [--requests 50]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ('market inflation rates central bank policy shares investors growth trade tariffs '
+         'election minister parliament government earnings quarterly revenue forecast '
+         'supply chain energy prices oil regulators analysts economy outlook lending').split()
+
+# Link speeds for the estimated transfer time: (label, bytes per second)
+LINKS = [('3G 1.5Mbps', 1.5e6 / 8), ('cable 25Mbps', 25e6 / 8), ('LAN 1Gbps', 1e9 / 8)]
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_articles(count, seed=42):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    articles = []
+    for i in range(count):
+        articles.append({
+            'id': f"article_{i:016x}",
+            'title': sentence(rng, 10),
+            'url': f"https://news.example.com/{rng.choice(WORDS)}/{i}",
+            'summary': ' '.join(sentence(rng, 18) for _ in range(4)),
+            'category': rng.choice(['economic', 'political', 'social']),
+            'source': rng.choice(['Reuters: Business News', 'BBC News - World', 'CNBC Top News']),
+            # Recent, so the retention policy keeps them
+            'published': format_datetime(now - timedelta(hours=rng.uniform(0, 48)), usegmt=True),
+            'location': rng.choice(['New York, NY', 'London, UK', 'Tokyo, Japan', 'Washington, DC']),
+            'coordinates': {'lat': rng.uniform(-60, 60), 'lng': rng.uniform(-180, 180)},
+            'location_reasoning': ' '.join(sentence(rng, 14) for _ in range(2)),
+            'popularity_score': round(rng.random(), 4),
+            'blurred': False
+        })
+    return articles
+
+
+def write_articles(directory, count):
+    with open(os.path.join(directory, 'articles_data.json'), 'w') as f:
+        json.dump(make_articles(count), f)
+
+
+def time_calls(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='compression_benchmark_')
+    cwd = os.getcwd()
+    try:
+        write_articles(scratch, args.articles)
+        os.chdir(scratch)
+        import compression
+        from app import app
+        client = app.test_client()
+
+        print(f"/api/news with {args.articles} articles, median of {args.requests} requests\n")
+        print(f"{'Accept-Encoding':<16} {'bytes':>10} {'ratio':>6} {'server ms':>10}  "
+              + '  '.join(f"{label:>14}" for label, _ in LINKS))
+        identity_size = None
+        for accept in ['identity', 'gzip', 'br' if compression.brotli else None]:
+            if accept is None:
+                continue
+            response, server_ms = time_calls(
+                lambda: client.get('/api/news', headers={'Accept-Encoding': accept}), args.requests)
+            size = len(response.get_data())
+            identity_size = identity_size or size
+            transfer = '  '.join(f"{server_ms + size / rate * 1000:12.1f}ms" for _, rate in LINKS)
+            print(f"{accept:<16} {size:>10} {identity_size / size:>5.1f}x {server_ms:>10.2f}  {transfer}")
+
+        body = client.get('/api/news', headers={'Accept-Encoding': 'identity'}).get_data()
+        print(f"\nCompression levels on the same {len(body)} byte body "
+              f"(configured: gzip {compression.GZIP_LEVEL}, brotli {compression.BROTLI_QUALITY})\n")
+        print(f"{'encoder':<16} {'bytes':>10} {'ratio':>6} {'compress ms':>12}")
+        levels = [('gzip', level, lambda data, level=level: gzip.compress(data, level, mtime=0))
+                  for level in (1, 3, 5, 6, 9)]
+        if compression.brotli:
+            levels += [('brotli', quality, lambda data, quality=quality: compression.brotli.compress(data, quality=quality))
+                       for quality in (1, 3, 4, 5, 6, 11)]
+        for name, level, compress in levels:
+            repeat = 3 if name == 'brotli' and level >= 10 else args.requests
+            compressed, compress_ms = time_calls(lambda: compress(body), repeat)
+            print(f"{name + ' ' + str(level):<16} {len(compressed):>10} {len(body) / len(compressed):>5.1f}x "
+                  f"{compress_ms:>12.2f}")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization: Flask's default JSON provider against
+FastJSONProvider (json_provider.py).
+
+"Before" is what the endpoints used to do: the stdlib provider, plus the
+recursive NaN/Inf sanitizing pass CompanyDataProvider ran on chart data.
+"After" is FastJSONProvider, with and without orjson installed.
+
+Usage (from the backend directory):
+    python benchmarks/json_benchmark.py [--repeat 50]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import json_provider
+from json_provider import FastJSONProvider
+from compression_benchmark import make_articles, time_calls
+
+
+def legacy_sanitize(d):
+    """The pass chart data went through before jsonify (CompanyDataProvider._sanitize_dict)"""
+    result = {}
+    for key, value in d.items():
+        if isinstance(value, dict):
+            result[key] = legacy_sanitize(value)
+        elif isinstance(value, list):
+            result[key] = [legacy_sanitize(item) if isinstance(item, dict)
+                           else (None if isinstance(item, float) and not math.isfinite(item) else item)
+                           for item in value]
+        elif isinstance(value, float) and not math.isfinite(value):
+            result[key] = None
+        else:
+            result[key] = value
+    return result
+
+
+def make_chart(weeks=52, seed=7):
+    """A company chart payload with the occasional gap, like yfinance data"""
+    rng = random.Random(seed)
+    start = date.today() - timedelta(weeks=weeks)
+    prices = []
+    for i in range(weeks):
+        price = float('nan') if rng.random() < 0.03 else round(rng.uniform(50, 500), 2)
+        prices.append({'date': (start + timedelta(weeks=i)).isoformat(), 'price': price,
+                       'volume': rng.randint(10 ** 6, 10 ** 8)})
+    return {'status': 'success', 'data': {
+        'symbol': 'XYZ', 'name': 'Example Corp', 'sector': 'Technology', 'weeklyPrices': prices,
+        'quarterlyRevenue': [{'quarter': f"2025-Q{q}", 'revenue': rng.uniform(1e9, 1e11)} for q in range(1, 5)],
+        'currentPrice': prices[-1]['price'], 'yearHigh': 500.0, 'yearLow': 50.0, 'yearChange': float('nan')}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    default = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+    orjson = json_provider.orjson
+
+    def fast_stdlib(obj):
+        json_provider.orjson = None
+        try:
+            return fast.dumps(obj)
+        finally:
+            json_provider.orjson = orjson
+
+    payloads = [
+        ('/api/news 500 articles', {'status': 'success', 'articles': make_articles(500)}, False),
+        ('/api/news 5000 articles', {'status': 'success', 'articles': make_articles(5000)}, False),
+        ('/api/companies/<symbol>/chart', make_chart(), True),
+    ]
+    encoders = [
+        ('before: stdlib', lambda obj, sanitize: default.dumps(legacy_sanitize(obj) if sanitize else obj)),
+        ('after: fallback', lambda obj, sanitize: fast_stdlib(obj)),
+    ]
+    if orjson is not None:
+        encoders.append(('after: orjson', lambda obj, sanitize: fast.dumps(obj)))
+
+    print(f"Median of {args.repeat} runs\n")
+    print(f"{'payload':<32} {'encoder':<18} {'bytes':>10} {'ms':>9} {'speedup':>8}")
+    for name, payload, sanitize in payloads:
+        baseline = None
+        for label, encode in encoders:
+            body, ms = time_calls(lambda: encode(payload, sanitize), args.repeat)
+            baseline = baseline or ms
+            print(f"{name:<32} {label:<18} {len(body):>10} {ms:>9.3f} {baseline / ms:>7.1f}x")
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Load test the production server at several worker counts.
+
+Starts `gunicorn -c gunicorn.conf.py wsgi:app` for each worker count in a
+scratch directory seeded with synthetic articles, drives it with concurrent
+clients for a fixed duration and reports throughput and latency per path.
+
+Usage (from the backend directory):
+    python benchmarks/load_test.py [--workers 1 2 4] [--threads 8] [--clients 32]
+                                   [--duration 10] [--articles 2000] [--path /api/news ...]
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from article_ids import article_id
+from spatial_index_benchmark import generate_points
+
+DEFAULT_PATHS = ['/api/news', '/api/news/popular?limit=20', '/api/health']
+
+
+def write_articles(directory, count):
+    now = datetime.now(timezone.utc)
+    articles = []
+    for name, lat, lng in generate_points(count):
+        article = {
+            'title': f"Synthetic headline {name}",
+            'url': f"https://example.com/{name}",
+            'summary': 'Synthetic summary text. ' * 10,
+            'category': random.choice(['financial', 'political']),
+            'source': random.choice(['Reuters', 'BBC', 'Some Blog']),
+            # Recent and with stable IDs, so workers serve the store as written
+            'published': format_datetime(now - timedelta(hours=random.uniform(0, 48)), usegmt=True),
+            'location': 'Somewhere',
+            'coordinates': {'lat': lat, 'lng': lng},
+            'location_reasoning': '',
+            'popularity_score': 0.5,
+            'blurred': False
+        }
+        article['id'] = article_id(article)
+        articles.append(article)
+    with open(os.path.join(directory, 'articles_data.json'), 'w') as f:
+        json.dump(articles, f)
+
+
+def wait_until_ready(base_url, process, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            with urllib.request.urlopen(base_url + '/api/health', timeout=2):
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError('gunicorn did not become ready')
+
+
+def drive(base_url, path, clients, duration):
+    """Hammer one path with `clients` threads for `duration` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    def client():
+        local = []
+        local_errors = 0
+        while time.time() < stop_at:
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path, timeout=30) as response:
+                    response.read()
+                local.append((time.perf_counter() - start) * 1000)
+            except Exception:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--articles', type=int, default=2000)
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--path', action='append', dest='paths')
+    args = parser.parse_args()
+    paths = args.paths or DEFAULT_PATHS
+
+    scratch = tempfile.mkdtemp(prefix='load_test_')
+    write_articles(scratch, args.articles)
+    base_url = f"http://127.0.0.1:{args.port}"
+    print(f"{os.cpu_count()} CPUs, {args.articles} articles, {args.clients} clients, "
+          f"{args.threads} threads/worker, {args.duration:.0f}s per path\n")
+
+    try:
+        for workers in args.workers:
+            env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(args.threads),
+                       PORT=str(args.port), GUNICORN_ACCESS_LOG='/dev/null', GUNICORN_LOG_LEVEL='warning',
+                       # Retention must not trim the store below --articles mid-run
+                       ARTICLE_MAX_PER_CATEGORY=str(args.articles))
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'),
+                 '--pythonpath', BACKEND_DIR, 'wsgi:app'],
+                cwd=scratch, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_until_ready(base_url, process)
+                for path in paths:
+                    latencies, errors = drive(base_url, path, args.clients, args.duration)
+                    latencies.sort()
+                    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+                    print(f"workers {workers}  {path:<28} {len(latencies) / args.duration:8.1f} req/s  "
+                          f"p50 {statistics.median(latencies) if latencies else 0:8.1f}ms  "
+                          f"p95 {p95:8.1f}ms  errors {errors}")
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+            print()
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
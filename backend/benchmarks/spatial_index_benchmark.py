@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark viewport queries on the geohash index against a linear scan.
+
+Generates synthetic articles clustered around major cities (the way real
+articles cluster around capitals and financial centers), then times bbox and
+radius queries at several viewport sizes.
+
+Usage (from the backend directory):
+    python benchmarks/spatial_index_benchmark.py [--articles 100000] [--queries 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spatial_index import GeohashIndex, haversine_km
+
+CITY_CENTERS = [
+    (40.7128, -74.0060), (38.9072, -77.0369), (51.5074, -0.1278), (48.8566, 2.3522),
+    (52.5200, 13.4050), (35.6762, 139.6503), (22.3193, 114.1694), (1.3521, 103.8198),
+    (55.7558, 37.6173), (-33.8688, 151.2093), (19.0760, 72.8777), (-23.5505, -46.6333),
+    (37.7749, -122.4194), (41.8781, -87.6298), (25.2048, 55.2708), (39.9042, 116.4074),
+]
+
+# (label, half-width in degrees): street, city, region and continent sized viewports
+VIEWPORTS = [('city', 0.25), ('metro', 1.0), ('region', 5.0), ('continent', 30.0)]
+
+
+def generate_points(count, seed=42):
+    rng = random.Random(seed)
+    points = []
+    for i in range(count):
+        if rng.random() < 0.8:
+            lat, lng = rng.choice(CITY_CENTERS)
+            lat += rng.gauss(0, 0.5)
+            lng += rng.gauss(0, 0.5)
+        else:
+            lat, lng = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        points.append((f"article_{i}", max(-90.0, min(90.0, lat)), max(-180.0, min(180.0, lng))))
+    return points
+
+
+def linear_bbox(points, min_lat, min_lng, max_lat, max_lng):
+    return [pid for pid, lat, lng in points if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng]
+
+
+def linear_radius(points, lat, lng, radius_km):
+    return [pid for pid, p_lat, p_lng in points if haversine_km(lat, lng, p_lat, p_lng) <= radius_km]
+
+
+def time_queries(fn, queries):
+    timings = []
+    hits = 0
+    for q in queries:
+        start = time.perf_counter()
+        hits += len(fn(*q))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, hits / len(queries)
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return f"p50 {statistics.median(timings):8.3f}ms  p95 {p95:8.3f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--precision', type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    points = generate_points(args.articles)
+
+    start = time.perf_counter()
+    index = GeohashIndex(precision=args.precision)
+    for pid, lat, lng in points:
+        index.insert(pid, lat, lng)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"Indexed {len(index)} articles into {len(index.cells)} cells in {build_ms:.1f}ms "
+          f"(precision {args.precision})\n")
+
+    for label, half in VIEWPORTS:
+        queries = []
+        for _ in range(args.queries):
+            lat, lng = rng.choice(CITY_CENTERS)
+            queries.append((lat - half, lng - half, lat + half, lng + half))
+        indexed, avg_hits = time_queries(index.query_bbox, queries)
+        linear, _ = time_queries(lambda *q: linear_bbox(points, *q), queries[:max(1, args.queries // 10)])
+        print(f"bbox {label:<10} avg hits {avg_hits:9.1f}  index {summarize(indexed)}  linear {summarize(linear)}")
+
+    print()
+    for radius_km in (10, 50, 250):
+        queries = [rng.choice(CITY_CENTERS) + (radius_km,) for _ in range(args.queries)]
+        indexed, avg_hits = time_queries(index.query_radius, queries)
+        linear, _ = time_queries(lambda *q: linear_radius(points, *q), queries[:max(1, args.queries // 10)])
+        print(f"near {radius_km:>4}km     avg hits {avg_hits:9.1f}  index {summarize(indexed)}  linear {summarize(linear)}")
+
+
+if __name__ == '__main__':
+    main()
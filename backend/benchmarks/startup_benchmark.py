@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark cold start: how long a fresh process takes to import app.py and
+to answer its first requests, against a regression budget.
+
+Each run is a new interpreter, as after a worker restart, working on a
+scratch copy of a synthetic article store. Reports the median of the runs,
+the slowest imports from `python -X importtime`, and fails (exit status 1)
+if a budget is exceeded or a heavy dependency is loaded at import time.
+
+Usage (from the backend directory):
+    python benchmarks/startup_benchmark.py [--runs 5] [--import-budget-ms 600] [--first-request-budget-ms 1500]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compression_benchmark import write_articles
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must only be imported by the code paths that use them, never by `import app`
+HEAVY_MODULES = ['yfinance', 'pandas', 'numpy', 'dedalus_labs', 'openai', 'geopy',
+                 'crawl4ai', 'bs4', 'feedparser', 'newspaper']
+
+# Run in the child: times from interpreter start-up to the end of each step
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+client.get('/api/health')
+health = time.perf_counter()
+client.get('/api/news')
+news = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'health_ms': (health - start) * 1000,
+    'news_ms': (news - start) * 1000,
+    'heavy': [name for name in %r if name in sys.modules],
+}))
+""" % (HEAVY_MODULES,)
+
+
+def child_env():
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    # Keep the run from writing metrics and traces next to the scratch store
+    env.pop('TRACE_FILE', None)
+    return env
+
+
+def probe(scratch):
+    output = subprocess.run([sys.executable, '-c', PROBE], cwd=scratch, env=child_env(),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(scratch, count):
+    """(cumulative ms, module) for the top-level imports `import app` triggers"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'], cwd=scratch,
+                            env=child_env(), capture_output=True, text=True, check=True).stderr
+    imports = []
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Each nesting level adds two spaces; a module is listed after its children
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children.append((int(cumulative) / 1000, name.strip()))
+        elif depth == 0:
+            if name.strip() == 'app':
+                imports = children
+            children = []
+    return sorted(imports, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--articles', type=int, default=500)
+    parser.add_argument('--import-budget-ms', type=float, default=600)
+    parser.add_argument('--first-request-budget-ms', type=float, default=1500,
+                        help='from interpreter start to the first /api/news response')
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='startup_benchmark_')
+    try:
+        write_articles(scratch, args.articles)
+        runs = [probe(scratch) for _ in range(args.runs)]
+        medians = {key: statistics.median(run[key] for run in runs)
+                   for key in ('import_ms', 'health_ms', 'news_ms')}
+
+        print(f"Cold start, median of {args.runs} fresh processes ({args.articles} articles)\n")
+        print(f"{'import app':<28} {medians['import_ms']:8.1f}ms  (budget {args.import_budget_ms:.0f}ms)")
+        print(f"{'first /api/health':<28} {medians['health_ms']:8.1f}ms")
+        print(f"{'first /api/news':<28} {medians['news_ms']:8.1f}ms  (budget {args.first_request_budget_ms:.0f}ms)")
+
+        print("\nSlowest imports of app.py (python -X importtime, cumulative)\n")
+        for cumulative_ms, name in slowest_imports(scratch, 10):
+            print(f"  {name:<26} {cumulative_ms:8.1f}ms")
+
+        failures = []
+        if medians['import_ms'] > args.import_budget_ms:
+            failures.append(f"import took {medians['import_ms']:.0f}ms, budget {args.import_budget_ms:.0f}ms")
+        if medians['news_ms'] > args.first_request_budget_ms:
+            failures.append(f"first request took {medians['news_ms']:.0f}ms, "
+                            f"budget {args.first_request_budget_ms:.0f}ms")
+        heavy = sorted({name for run in runs for name in run['heavy']})
+        if heavy:
+            failures.append(f"loaded at startup: {', '.join(heavy)} (import them where they are used)")
+        print()
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        if not failures:
+            print("OK: within budget")
+        return 1 if failures else 0
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,11 +2,14 @@
 
 import os
 import json
+import hashlib
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import asyncio
-import yfinance as yf
-from dedalus_labs import AsyncDedalus, DedalusRunner
+from async_runtime import shared_dedalus_client
+from singleflight import SingleFlight
+from metrics import load_yfinance, upstream_call, record_cache
+from tracing import traced
 
 # Top 20 global companies with their headquarters locations
 TOP_COMPANIES = [
@@ -58,6 +61,26 @@ class CompanyDataProvider:
     def __init__(self):
         self.cache = {}
         self.cache_duration = timedelta(minutes=15)
+        # When an entry expires, concurrent requests share one refetch
+        self._flights = SingleFlight()
+    
+    def cache_version(self, key: str) -> str:
+        """
+        Identifies the cached data for a key by its content, so every worker
+        holding the same data gives the same ETag and a refetch that returns
+        identical data doesn't invalidate clients' copies.
+        """
+        entry = self.cache.get(key)
+        return entry['version'] if entry and entry.get('version') else 'uncached'
+    
+    def _store(self, cache_key: str, data):
+        """Cache data for cache_key, along with a hash of it for cache_version()"""
+        payload = json.dumps(data, sort_keys=True, default=str)
+        self.cache[cache_key] = {
+            'data': data,
+            'timestamp': datetime.now(),
+            'version': hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        }
     
     def _is_cache_valid(self, key: str) -> bool:
         """Check if cached data is still valid"""
@@ -68,44 +91,32 @@ class CompanyDataProvider:
             return False
         return datetime.now() - cached_time < self.cache_duration
     
-    def _sanitize_value(self, value, default=None):
-        """Sanitize a value to ensure it's JSON-serializable (no NaN, Inf)"""
-        import math
-        if value is None:
-            return default
-        if isinstance(value, float):
-            if math.isnan(value) or math.isinf(value):
-                return default
-        return value
-    
-    def _sanitize_dict(self, d: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively sanitize a dictionary to remove NaN/Inf values"""
-        import math
-        result = {}
-        for key, value in d.items():
-            if isinstance(value, dict):
-                result[key] = self._sanitize_dict(value)
-            elif isinstance(value, list):
-                result[key] = [self._sanitize_dict(item) if isinstance(item, dict) else self._sanitize_value(item) for item in value]
-            elif isinstance(value, float):
-                if math.isnan(value) or math.isinf(value):
-                    result[key] = None
-                else:
-                    result[key] = value
-            else:
-                result[key] = value
-        return result
+    def _cached(self, cache_key: str, fetch):
+        """Cached data for cache_key, running fetch() (which fills the cache) at most once at a time"""
+        hit = self._is_cache_valid(cache_key)
+        record_cache('company_data', hit)
+        if hit:
+            return self.cache[cache_key]['data']
+        
+        def refresh():
+            # A refetch that finished just before this one started has already filled it
+            if self._is_cache_valid(cache_key):
+                return self.cache[cache_key]['data']
+            return fetch()
+        
+        return self._flights.do(cache_key, refresh)
     
     def get_top_companies(self) -> List[Dict[str, Any]]:
         """Get list of top companies with basic info and locations"""
+        return self._cached('top_companies', self._fetch_top_companies)
+    
+    @traced('market_data.top_companies')
+    def _fetch_top_companies(self) -> List[Dict[str, Any]]:
         cache_key = 'top_companies'
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]['data']
-        
         companies = []
         for company in TOP_COMPANIES:
             try:
-                ticker = yf.Ticker(company['symbol'])
+                ticker = load_yfinance().Ticker(company['symbol'])
                 info = ticker.info
                 hist = ticker.history(period='5d')
                 
@@ -136,17 +147,18 @@ class CompanyDataProvider:
                     "marketCapFormatted": "N/A"
                 })
         
-        self.cache[cache_key] = {'data': companies, 'timestamp': datetime.now()}
+        self._store(cache_key, companies)
         return companies
     
     def get_company_chart_data(self, symbol: str) -> Dict[str, Any]:
         """Get weekly stock price and revenue data for a company (1 year)"""
+        return self._cached(f'chart_{symbol}', lambda: self._fetch_company_chart_data(symbol))
+    
+    @traced('market_data.company_chart')
+    def _fetch_company_chart_data(self, symbol: str) -> Dict[str, Any]:
         cache_key = f'chart_{symbol}'
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]['data']
-        
         try:
-            ticker = yf.Ticker(symbol)
+            ticker = load_yfinance().Ticker(symbol)
             
             # Get 1 year of weekly data
             end_date = datetime.now()
@@ -227,16 +239,15 @@ class CompanyDataProvider:
                 "sector": info.get('sector', 'Unknown'),
                 "weeklyPrices": weekly_data,
                 "quarterlyRevenue": revenue_data[:4],  # Last 4 quarters
-                "currentPrice": self._sanitize_value(round(float(hist['Close'].iloc[-1]), 2)) if not hist.empty else None,
-                "yearHigh": self._sanitize_value(round(float(hist['High'].max()), 2)) if not hist.empty else None,
-                "yearLow": self._sanitize_value(round(float(hist['Low'].min()), 2)) if not hist.empty else None,
+                "currentPrice": round(float(hist['Close'].iloc[-1]), 2) if not hist.empty else None,
+                "yearHigh": round(float(hist['High'].max()), 2) if not hist.empty else None,
+                "yearLow": round(float(hist['Low'].min()), 2) if not hist.empty else None,
                 "yearChange": year_change
             }
             
-            # Sanitize the entire result to catch any remaining NaN/Inf
-            result = self._sanitize_dict(result)
+            # NaN/Inf (e.g. gaps in the price history) are sent as null by the app's JSON provider
             
-            self.cache[cache_key] = {'data': result, 'timestamp': datetime.now()}
+            self._store(cache_key, result)
             return result
             
         except Exception as e:
@@ -244,14 +255,15 @@ class CompanyDataProvider:
     
     def get_lesser_known_companies(self) -> List[Dict[str, Any]]:
         """Get lesser-known companies with current stock data"""
+        return self._cached('lesser_known', self._fetch_lesser_known_companies)
+    
+    @traced('market_data.lesser_known')
+    def _fetch_lesser_known_companies(self) -> List[Dict[str, Any]]:
         cache_key = 'lesser_known'
-        if self._is_cache_valid(cache_key):
-            return self.cache[cache_key]['data']
-        
         companies = []
         for company in LESSER_KNOWN_COMPANIES:
             try:
-                ticker = yf.Ticker(company['symbol'])
+                ticker = load_yfinance().Ticker(company['symbol'])
                 info = ticker.info
                 hist = ticker.history(period='1mo')
                 
@@ -305,7 +317,7 @@ class CompanyDataProvider:
                     "marketCapFormatted": "N/A"
                 })
         
-        self.cache[cache_key] = {'data': companies, 'timestamp': datetime.now()}
+        self._store(cache_key, companies)
         return companies
     
     def get_portfolio_stocks_data(self, symbols: List[str]) -> List[Dict[str, Any]]:
@@ -314,7 +326,7 @@ class CompanyDataProvider:
         
         for symbol in symbols:
             try:
-                ticker = yf.Ticker(symbol)
+                ticker = load_yfinance().Ticker(symbol)
                 info = ticker.info
                 hist = ticker.history(period='1mo')
                 
@@ -428,12 +440,12 @@ Return ONLY valid JSON in this exact format:
 
 CRITICAL: Return realistic, well-reasoned recommendations. Be honest about poor performers in the portfolio - recommend selling them if warranted."""
 
-        client = None
         try:
-            client = AsyncDedalus()
-            runner = DedalusRunner(client)
+            from dedalus_labs import DedalusRunner
+            runner = DedalusRunner(shared_dedalus_client())
             
-            response = await runner.run(input=prompt, model="google/gemini-2.5-flash")
+            with upstream_call('dedalus'):
+                response = await runner.run(input=prompt, model="google/gemini-2.5-flash")
             
             # Extract text from response
             response_text = None
@@ -478,13 +490,6 @@ CRITICAL: Return realistic, well-reasoned recommendations. Be honest about poor
             print(f"Error getting AI recommendations: {e}")
             # Return fallback recommendations
             return self._generate_fallback_recommendations(companies)
-        finally:
-            # Properly close the async client to avoid event loop errors
-            if client is not None:
-                try:
-                    await client.close()
-                except Exception:
-                    pass  # Ignore cleanup errors
     
     def _generate_fallback_recommendations(self, companies: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate fallback recommendations when AI is unavailable"""
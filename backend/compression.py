@@ -0,0 +1,72 @@
+"""Negotiated gzip/brotli compression for large text responses"""
+
+import gzip
+import os
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Smaller bodies fit in a packet or two either way; compressing them only costs CPU
+MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+# Low-to-mid levels get most of the size reduction on JSON for a fraction of
+# the CPU of the maximum levels (see benchmarks/compression_benchmark.py)
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 5))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/javascript', 'text/html', 'text/plain',
+                          'text/css', 'text/csv', 'image/svg+xml'}
+
+
+def choose_encoding(accept_encodings) -> str:
+    """Best encoding we support from an Accept-Encoding header, or None"""
+    candidates = [('br', 1.0)] if brotli is not None else []
+    candidates.append(('gzip', 0.9))
+    best = None
+    best_quality = 0
+    for encoding, preference in candidates:
+        quality = accept_encodings.quality(encoding) * preference
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress a buffered response body if the client accepts it.
+
+    Streamed responses and files (send_file) are passed through untouched,
+    as are errors, bodies under MIN_SIZE and anything already encoded.
+    """
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    compressed = compress(data, encoding)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_compression(app: Flask):
+    app.after_request(compress_response)
@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration for the backend.
+
+Usage (from the backend directory):
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Most request time is spent waiting on LLM, geocoding and yfinance calls, so
+each worker runs a pool of threads (gthread) and a few processes provide
+parallelism for the CPU-bound parts (JSON encoding, indexes). All knobs can
+be overridden from the environment.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5004')}"
+
+# Processes: default to one per core up to 4. Each worker loads its own
+# article store and indexes, so memory grows with the worker count.
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count(), 4)))
+
+# Threads per worker for I/O-bound requests. Open event streams hold one each
+# for their whole life, up to MAX_OPEN_STREAMS (see ENV_SETUP.md); size this above it
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+# LLM-backed endpoints (digest video, knowledge graph, refresh) can take minutes
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks in third-party clients can't accumulate
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+# Don't preload: importing app.py in the master would fork state that must
+# belong to one process. The JobQueue's thread pool and the `flights` locks
+# are created at import time, and the Lazy singletons (processor, scraper,
+# predictors), the shared event loop and its per-loop HTTP clients would be
+# carried over half-built if anything touched them before the fork. Each
+# worker imports the app itself; the singletons are built on first use.
+preload_app = False
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Drop warm-up markers left by a previous run before any worker starts"""
+    from warmup import clear_markers
+    clear_markers()
+
+
+def post_fork(server, worker):
+    """Count the new worker as not warm until its warm-up has run"""
+    from warmup import register_worker
+    register_worker()
+
+
+def post_worker_init(worker):
+    """Warm the new worker's caches in the background; /api/ready reports when it is done"""
+    from app import warmup
+    warmup.start()
@@ -0,0 +1,46 @@
+"""Version-based ETags and conditional responses for read endpoints"""
+
+import hashlib
+from typing import Callable
+
+from flask import make_response, request
+
+from metrics import record_cache
+
+# Clients may reuse a response without asking for max_age seconds; after that
+# (or right away with max_age=0) they revalidate with If-None-Match
+NEWS_CACHE_CONTROL = 'public, no-cache'
+COMPANIES_CACHE_CONTROL = 'public, max-age=60, must-revalidate'
+
+
+def make_etag(*version_parts) -> str:
+    """
+    ETag for the current request from the version of the data behind it.
+
+    The path and query string are always included, so one version gives
+    different tags for different filters, pages and projections.
+    """
+    raw = '|'.join([request.path, request.query_string.decode('utf-8', 'replace')] +
+                   [str(part) for part in version_parts])
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def conditional_response(etag: str, build: Callable, cache_control: str = NEWS_CACHE_CONTROL):
+    """
+    Answer 304 if the client already has `etag`, otherwise call build().
+
+    build() returns what a view would (a response, or (response, status));
+    only 200 responses get the ETag and Cache-Control headers, so errors are
+    never cached. The payload is not built or serialized at all on a 304.
+    """
+    not_modified = request.if_none_match.contains_weak(etag)
+    record_cache('http_conditional', not_modified)
+    if not_modified:
+        response = make_response('', 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = cache_control
+    return response
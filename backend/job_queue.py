@@ -0,0 +1,192 @@
+"""Background job queue for long-running work such as news refreshes"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from atomic_file import write_json_atomic
+from processes import process_alive
+from tracing import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: deduplication only within one process
+    fcntl = None
+
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Job:
+    """State of one background job; `progress` is filled in by the job itself"""
+
+    def __init__(self, kind: str, dedupe_key: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.dedupe_key = dedupe_key
+        self.status = 'queued'
+        self.progress = {'done': 0, 'total': None, 'message': 'Queued'}
+        self.result = None
+        self.error = None
+        self.created_at = _now()
+        self.started_at = None
+        self.finished_at = None
+        self.pid = os.getpid()
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'pid': self.pid,
+            'dedupe_key': self.dedupe_key
+        }
+
+
+class JobQueue:
+    """
+    Runs jobs on a small thread pool, outside the request threads.
+
+    Job state is mirrored to `<state_dir>/<job id>.json` so that any server
+    worker process can answer status requests for any job. submit() dedupes
+    on a key across processes: while a job with the same key is queued or
+    running (in a process that is still alive), the existing job is returned
+    instead of starting another one.
+    """
+
+    def __init__(self, state_dir: str = 'jobs', max_workers: int = 2, keep_finished: int = 100):
+        self.state_dir = state_dir
+        self.keep_finished = keep_finished
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job-worker')
+        os.makedirs(state_dir, exist_ok=True)
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _active_path(self, dedupe_key: str) -> str:
+        safe_key = ''.join(c if c.isalnum() or c in '-_' else '_' for c in dedupe_key)
+        return os.path.join(self.state_dir, f"active-{safe_key}.json")
+
+    def _persist(self, job: Job):
+        try:
+            write_json_atomic(self._state_path(job.id), job.to_dict())
+        except Exception as e:
+            print(f"Error saving job state {job.id}: {e}")
+
+    @contextmanager
+    def _submit_lock(self):
+        """Serialize dedupe checks across threads and worker processes"""
+        with self._lock, open(os.path.join(self.state_dir, '.lock'), 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job started by any worker process, or None"""
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._state_path(job_id), 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _active_job(self, dedupe_key: str) -> Optional[Dict]:
+        try:
+            with open(self._active_path(dedupe_key), 'r') as f:
+                job_id = json.load(f).get('id', '')
+        except (OSError, json.JSONDecodeError):
+            return None
+        state = self.get(job_id)
+        if not state or state['status'] not in ACTIVE_STATUSES:
+            return None
+        # A worker that died mid-job leaves its state behind; don't wait on it forever
+        if state['pid'] != os.getpid() and not process_alive(state['pid']):
+            return None
+        return state
+
+    def submit(self, kind: str, fn: Callable, dedupe_key: Optional[str] = None) -> Tuple[Dict, bool]:
+        """
+        Queue fn(progress) to run in the background.
+
+        `progress(done, total, message)` lets the job report how far it got.
+        Returns (job state, created); created is False if an active job with
+        the same dedupe_key was returned instead.
+        """
+        with self._submit_lock():
+            if dedupe_key:
+                existing = self._active_job(dedupe_key)
+                if existing:
+                    return existing, False
+            job = Job(kind, dedupe_key)
+            self.jobs[job.id] = job
+            self._persist(job)
+            if dedupe_key:
+                write_json_atomic(self._active_path(dedupe_key), {'id': job.id})
+            self._trim()
+
+        self._executor.submit(self._run, job, fn)
+        return job.to_dict(), True
+
+    def _run(self, job: Job, fn: Callable):
+        last_saved = [0.0]
+
+        def progress(done: int, total: Optional[int] = None, message: Optional[str] = None):
+            job.progress = {'done': done, 'total': total if total is not None else job.progress['total'],
+                            'message': message or job.progress['message']}
+            # Progress can be reported per item; don't rewrite the state file more than twice a second
+            if time.monotonic() - last_saved[0] >= 0.5:
+                last_saved[0] = time.monotonic()
+                self._persist(job)
+
+        job.status = 'running'
+        job.started_at = _now()
+        job.progress['message'] = 'Running'
+        self._persist(job)
+        try:
+            # Each job is its own trace, not part of the request that queued it
+            with span(f"job {job.kind}", **{'job.id': job.id}):
+                job.result = fn(progress)
+            job.status = 'succeeded'
+            job.progress['message'] = 'Done'
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) failed: {e}")
+            job.status = 'failed'
+            job.error = str(e)
+            job.progress['message'] = 'Failed'
+        job.finished_at = _now()
+        self._persist(job)
+
+    def _trim(self):
+        """Forget the oldest finished jobs beyond keep_finished, in memory and on disk"""
+        finished = [j for j in self.jobs.values() if j.status not in ACTIVE_STATUSES]
+        for job in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job.id]
+            try:
+                os.remove(self._state_path(job.id))
+            except OSError:
+                pass
@@ -0,0 +1,101 @@
+"""Fast JSON provider for Flask that never emits invalid JSON"""
+
+import dataclasses
+import decimal
+import json
+import math
+import sys
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+from tracing import span
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback below
+    orjson = None
+
+
+def _numpy():
+    # Only loaded modules matter: without numpy imported there are no numpy values
+    # to encode, and importing it here would slow down startup
+    return sys.modules.get('numpy')
+
+
+def _default(o):
+    """Types neither encoder handles natively (same set as Flask's default provider, plus numpy)"""
+    numpy = _numpy()
+    if numpy is not None:
+        if isinstance(o, numpy.ndarray):
+            return o.tolist()
+        if isinstance(o, numpy.generic):
+            return o.item()
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _finite(o):
+    """Copy of o with NaN/Inf replaced by None; only used on the stdlib path"""
+    if isinstance(o, float):
+        return o if math.isfinite(o) else None
+    numpy = _numpy()
+    if numpy is not None and isinstance(o, (numpy.generic, numpy.ndarray)):
+        return _finite(_default(o))
+    if isinstance(o, dict):
+        return {key: _finite(value) for key, value in o.items()}
+    if isinstance(o, (list, tuple)):
+        return [_finite(value) for value in o]
+    return o
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Serializes with orjson: NaN and Inf become null, numpy scalars and arrays
+    and datetimes (ISO 8601) are handled natively, so data straight from
+    pandas/yfinance can be passed to jsonify without a sanitizing pass.
+
+    Without orjson, or for values orjson rejects (ints over 64 bits), it falls
+    back to the stdlib encoder with the same null/numpy/datetime behavior.
+    Keys are not sorted, unlike Flask's default provider.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is not None and not kwargs:
+            try:
+                return orjson.dumps(obj, default=_default,
+                                    option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode('utf-8')
+            except orjson.JSONEncodeError:
+                pass
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs['allow_nan'] = False
+        try:
+            return json.dumps(obj, **kwargs)
+        except ValueError:
+            # Out of range floats somewhere; only then pay for the copy
+            return json.dumps(_finite(obj), **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        with span('json.serialize'):
+            body = self.dumps(obj) + '\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
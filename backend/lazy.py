@@ -0,0 +1,38 @@
+"""Module-level singletons that are built on first use"""
+
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar('T')
+
+
+class Lazy(Generic[T]):
+    """
+    Stands in for the object `factory()` returns, building it the first time
+    one of its attributes is used. Declaring a singleton this way keeps
+    importing the module that holds it cheap, which shortens worker restarts.
+
+    Construction happens once per process, under a lock, so concurrent first
+    requests share one instance.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        """The instance, built now if it hasn't been yet"""
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = self._factory()
+        return self._instance
+
+    @property
+    def created(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        # Only called for attributes the proxy itself doesn't have
+        return getattr(self.get(), name)
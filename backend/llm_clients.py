@@ -0,0 +1,74 @@
+"""Process-wide LLM clients with keep-alive connection pools"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import upstream_call
+
+# Connections kept open per upstream host; size to the number of request
+# threads that may call an LLM at once (gunicorn threads per worker)
+POOL_MAXSIZE = int(os.getenv('LLM_POOL_MAXSIZE', 16))
+# Distinct hosts to keep pools for in the shared requests session
+POOL_CONNECTIONS = int(os.getenv('LLM_POOL_CONNECTIONS', 4))
+
+_lock = threading.Lock()
+_openai_clients: Dict[Tuple[int, str], object] = {}
+_sessions: Dict[int, requests.Session] = {}
+
+
+def openai_client(api_key: Optional[str] = None):
+    """
+    Shared OpenAI client for api_key (default OPENAI_API_KEY).
+
+    Created on first use and reused by every request thread in the process;
+    the client is thread-safe and keeps up to POOL_MAXSIZE connections alive.
+    A forked worker process gets its own.
+    """
+    api_key = api_key or os.getenv('OPENAI_API_KEY')
+    key = (os.getpid(), api_key)
+    client = _openai_clients.get(key)
+    if client is None:
+        with _lock:
+            client = _openai_clients.get(key)
+            if client is None:
+                import httpx
+                from openai import OpenAI, DefaultHttpxClient
+                limits = httpx.Limits(max_connections=POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE)
+                client = _openai_clients[key] = OpenAI(
+                    api_key=api_key,
+                    http_client=DefaultHttpxClient(transport=_timed_transport('openai', limits=limits)))
+    return client
+
+
+def _timed_transport(upstream: str, **kwargs):
+    """httpx transport that records each request as an upstream call"""
+    import httpx
+
+    class TimedTransport(httpx.HTTPTransport):
+        def handle_request(self, request):
+            with upstream_call(upstream) as call:
+                response = super().handle_request(request)
+                call.error = response.status_code >= 400
+            return response
+
+    return TimedTransport(**kwargs)
+
+
+def http_session() -> requests.Session:
+    """Shared requests session for plain HTTP LLM APIs (OpenRouter), pooled per host"""
+    pid = os.getpid()
+    session = _sessions.get(pid)
+    if session is None:
+        with _lock:
+            session = _sessions.get(pid)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _sessions[pid] = session
+    return session
@@ -0,0 +1,188 @@
+"""Hierarchical grid clustering of map markers, precomputed for every zoom level"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+MAX_MERCATOR_LAT = 85.05112878
+
+
+def _mercator(lat: float, lng: float) -> Tuple[float, float]:
+    """Project to normalized Web Mercator coordinates in [0, 1)"""
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = (lng + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+class MarkerClusterIndex:
+    """
+    Supercluster-style grid clustering that is maintained incrementally.
+
+    Every zoom level has its own grid in Web Mercator space with
+    `cells_per_tile` cells along each side of a 256px map tile, so each cell
+    nests exactly inside one cell of the level above. Adding or removing a
+    marker only touches one cell per zoom level, which keeps updates cheap and
+    makes a query cost depend on the number of visible clusters rather than
+    the number of markers.
+
+    A cell stores, per category, the marker count and the sums of their
+    coordinates and integer handles. Counts and centroids can be read off
+    directly, and when a cell holds a single marker the handle sum is that
+    marker's handle, so no per-cell id sets are needed.
+    """
+
+    def __init__(self, max_zoom: int = 16, cells_per_tile: int = 4):
+        self.max_zoom = max_zoom
+        self.cells_per_tile = cells_per_tile
+        self.levels: List[Dict[Tuple[int, int], Dict[str, list]]] = [{} for _ in range(max_zoom + 1)]
+        self.points: Dict[str, Tuple[float, float, str, float, float, int]] = {}
+        self.ids_by_handle: Dict[int, str] = {}
+        self._next_handle = 1
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _grid_size(self, zoom: int) -> int:
+        return (1 << zoom) * self.cells_per_tile
+
+    def _cell_keys(self, x: float, y: float) -> List[Tuple[int, int]]:
+        """Cell of a projected point at every zoom level, derived from the finest grid"""
+        size = self._grid_size(self.max_zoom)
+        fine_x, fine_y = int(x * size), int(y * size)
+        return [(fine_x >> shift, fine_y >> shift) for shift in range(self.max_zoom, -1, -1)]
+
+    def insert(self, item_id: str, lat: float, lng: float, category: str):
+        """Add or move a marker"""
+        if item_id in self.points:
+            self.remove(item_id)
+        x, y = _mercator(lat, lng)
+        handle = self._next_handle
+        self._next_handle += 1
+        self.ids_by_handle[handle] = item_id
+        self.points[item_id] = (lat, lng, category, x, y, handle)
+        for zoom, key in enumerate(self._cell_keys(x, y)):
+            cells = self.levels[zoom]
+            cell = cells.get(key)
+            if cell is None:
+                cell = cells[key] = {}
+            bucket = cell.get(category)
+            if bucket is None:
+                cell[category] = [1, lat, lng, handle]
+            else:
+                bucket[0] += 1
+                bucket[1] += lat
+                bucket[2] += lng
+                bucket[3] += handle
+
+    def remove(self, item_id: str):
+        """Remove a marker if present"""
+        entry = self.points.pop(item_id, None)
+        if entry is None:
+            return
+        lat, lng, category, x, y, handle = entry
+        del self.ids_by_handle[handle]
+        for zoom, key in enumerate(self._cell_keys(x, y)):
+            cells = self.levels[zoom]
+            cell = cells.get(key)
+            if not cell or category not in cell:
+                continue
+            bucket = cell[category]
+            bucket[0] -= 1
+            bucket[1] -= lat
+            bucket[2] -= lng
+            bucket[3] -= handle
+            if bucket[0] <= 0:
+                del cell[category]
+                if not cell:
+                    del cells[key]
+
+    def clear(self):
+        self.levels = [{} for _ in range(self.max_zoom + 1)]
+        self.points = {}
+        self.ids_by_handle = {}
+
+    def _cells_in_range(self, zoom: int, min_x: int, max_x: int, min_y: int, max_y: int):
+        cells = self.levels[zoom]
+        span = (max_x - min_x + 1) * (max_y - min_y + 1)
+        if span <= len(cells):
+            for cx in range(min_x, max_x + 1):
+                for cy in range(min_y, max_y + 1):
+                    cell = cells.get((cx, cy))
+                    if cell:
+                        yield (cx, cy), cell
+        else:
+            for key, cell in cells.items():
+                if min_x <= key[0] <= max_x and min_y <= key[1] <= max_y:
+                    yield key, cell
+
+    def get_clusters(self, zoom: int, bbox: Optional[Tuple[float, float, float, float]] = None,
+                     category: str = 'all') -> List[Dict]:
+        """
+        Return the clusters visible at a zoom level.
+
+        Args:
+            zoom: Map zoom level, clamped to [0, max_zoom]
+            bbox: Optional (south, west, north, east); west > east crosses the antimeridian
+            category: Only count markers in this category ('all' for every category)
+
+        Single-marker cells come back as {'type': 'article', 'id': ...} so the
+        client can render them as a normal marker.
+        """
+        zoom = max(0, min(self.max_zoom, int(zoom)))
+        size = self._grid_size(zoom)
+        if bbox is None:
+            ranges = [(0, size - 1, 0, size - 1)]
+        else:
+            south, west, north, east = bbox
+            lng_ranges = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+            ranges = []
+            for range_west, range_east in lng_ranges:
+                min_x, min_y = _mercator(north, range_west)
+                max_x, max_y = _mercator(south, range_east)
+                ranges.append((int(min_x * size), int(max_x * size), int(min_y * size), int(max_y * size)))
+
+        clusters = []
+        seen = set()
+        for min_x, max_x, min_y, max_y in ranges:
+            for key, cell in self._cells_in_range(zoom, min_x, max_x, min_y, max_y):
+                if key in seen:
+                    continue
+                seen.add(key)
+                cluster = self._summarize_cell(zoom, key, cell, category)
+                if cluster:
+                    clusters.append(cluster)
+        return clusters
+
+    def _summarize_cell(self, zoom: int, key: Tuple[int, int], cell: Dict[str, list], category: str) -> Optional[Dict]:
+        buckets = cell.items() if category == 'all' else [(category, cell[category])] if category in cell else []
+        count = 0
+        lat_sum = lng_sum = 0.0
+        categories = {}
+        for bucket_category, (bucket_count, bucket_lat, bucket_lng, _) in buckets:
+            count += bucket_count
+            lat_sum += bucket_lat
+            lng_sum += bucket_lng
+            categories[bucket_category] = bucket_count
+        if count == 0:
+            return None
+        if count == 1:
+            only_category = next(iter(categories))
+            item_id = self.ids_by_handle[cell[only_category][3]]
+            lat, lng = self.points[item_id][:2]
+            return {
+                'type': 'article',
+                'id': item_id,
+                'coordinates': {'lat': lat, 'lng': lng},
+                'count': 1,
+                'categories': {only_category: 1}
+            }
+        return {
+            'type': 'cluster',
+            'id': f"cluster_{zoom}_{key[0]}_{key[1]}",
+            'coordinates': {'lat': lat_sum / count, 'lng': lng_sum / count},
+            'count': count,
+            'categories': categories,
+            # Zooming in one level splits this cell into its four children
+            'expansion_zoom': min(zoom + 1, self.max_zoom)
+        }
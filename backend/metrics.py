@@ -0,0 +1,334 @@
+"""Request, upstream and cache metrics in the Prometheus text format"""
+
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+from flask import Flask, Response, g, request
+
+from atomic_file import write_json_atomic
+from processes import process_alive
+from tracing import CLIENT, start_span, end_span
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Each worker process writes its metrics here so that /metrics, served by
+# whichever worker gets the scrape, can report totals for all of them
+METRICS_DIR = os.getenv('METRICS_DIR', 'metrics')
+# How stale another worker's numbers may be, in seconds
+FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_SECONDS', 5))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def state(self) -> Dict[str, float]:
+        with self._lock:
+            return {json.dumps(key): value for key, value in self._values.items()}
+
+    @staticmethod
+    def merge(total, value):
+        return (total or 0) + value
+
+    def render(self, merged: Dict[str, float]) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, json.loads(key))} {value}"
+                for key, value in sorted(merged.items())]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests in flight"""
+
+    kind = 'gauge'
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Counter):
+    """Observations in cumulative buckets, with their sum and count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # [count per bucket (non-cumulative)..., overflow, sum]
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            state[index] += 1
+            state[-1] += value
+
+    def state(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {json.dumps(key): list(value) for key, value in self._values.items()}
+
+    @staticmethod
+    def merge(total, value):
+        return value if total is None else [a + b for a, b in zip(total, value)]
+
+    def render(self, merged: Dict[str, List[float]]) -> List[str]:
+        lines = []
+        for key, state in sorted(merged.items()):
+            values = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), state[:-1]):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {state[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+http_requests = Counter('http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+http_latency = Histogram('http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route'))
+http_in_flight = Gauge('http_requests_in_flight', 'HTTP requests being handled, by route', ('route',))
+upstream_calls = Counter('upstream_calls_total', 'Calls to upstream services by outcome', ('upstream', 'outcome'))
+upstream_latency = Histogram('upstream_call_duration_seconds', 'Upstream call latency', ('upstream',))
+cache_requests = Counter('cache_requests_total', 'Cache lookups by result (hit or miss)', ('cache', 'result'))
+admission_rejections = Counter('admission_rejections_total', 'Requests turned away with 429, by reason',
+                               ('endpoint', 'reason'))
+
+REGISTRY = [http_requests, http_latency, http_in_flight, upstream_calls, upstream_latency, cache_requests,
+            admission_rejections]
+
+
+class _Outcome:
+    def __init__(self):
+        self.error = False
+
+
+@contextmanager
+def upstream_call(upstream: str):
+    """
+    Time a call to an upstream service, in the metrics and as a trace span.
+    An exception counts as an error; for calls that report failure in-band,
+    set `.error = True` on the yielded object, e.g. on a non-200 response.
+    """
+    outcome = _Outcome()
+    current, token = start_span(f"upstream {upstream}", CLIENT, **{'peer.service': upstream})
+    start = time.perf_counter()
+    error = None
+    try:
+        yield outcome
+    except BaseException as e:
+        outcome.error = True
+        error = e
+        raise
+    finally:
+        upstream_latency.observe(time.perf_counter() - start, upstream=upstream)
+        upstream_calls.inc(upstream=upstream, outcome='error' if outcome.error else 'ok')
+        if outcome.error and error is None:
+            current.error = 'error response'
+        end_span(current, token, error)
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+class _Snapshots:
+    """This process's metrics on disk, and the merged view of every live worker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(METRICS_DIR, f"{pid}.json")
+
+    def flush(self):
+        """Write this process's numbers, at most every FLUSH_INTERVAL seconds"""
+        now = time.monotonic()
+        if now - self._last_flush < FLUSH_INTERVAL:
+            return
+        with self._lock:
+            if now - self._last_flush < FLUSH_INTERVAL:
+                return
+            self._last_flush = now
+            try:
+                os.makedirs(METRICS_DIR, exist_ok=True)
+                write_json_atomic(self._path(os.getpid()), {metric.name: metric.state() for metric in REGISTRY})
+            except OSError as e:
+                print(f"Error saving metrics snapshot: {e}")
+
+    def merged(self) -> Dict[str, Dict]:
+        """Totals over this process (live numbers) and every other live worker (last flush)"""
+        states = [{metric.name: metric.state() for metric in REGISTRY}]
+        for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+            try:
+                pid = int(os.path.basename(path)[:-len('.json')])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            if not process_alive(pid):
+                # A restarted worker starts from zero; Prometheus treats that as a counter reset
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, 'r') as f:
+                    states.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+
+        merged = {}
+        for metric in REGISTRY:
+            totals = {}
+            for state in states:
+                for key, value in state.get(metric.name, {}).items():
+                    totals[key] = metric.merge(totals.get(key), value)
+            merged[metric.name] = totals
+        return merged
+
+
+snapshots = _Snapshots()
+
+
+def _ratio_lines(name: str, documentation: str, counts: Dict[str, float], label: str, numerator: str) -> List[str]:
+    """A derived gauge: share of `numerator` among the second label's values, per first label"""
+    by_group: Dict[str, Dict[str, float]] = {}
+    for key, value in counts.items():
+        group, kind = json.loads(key)
+        by_group.setdefault(group, {})[kind] = value
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for group, kinds in sorted(by_group.items()):
+        total = sum(kinds.values())
+        if total:
+            lines.append(f'{name}{{{label}="{_escape(group)}"}} {kinds.get(numerator, 0) / total:.6f}')
+    return lines
+
+
+def render() -> str:
+    merged = snapshots.merged()
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.render(merged[metric.name]))
+    lines.extend(_ratio_lines('cache_hit_ratio', 'Share of cache lookups that hit, since start',
+                              merged[cache_requests.name], 'cache', 'hit'))
+    lines.extend(_ratio_lines('upstream_error_ratio', 'Share of upstream calls that failed, since start',
+                              merged[upstream_calls.name], 'upstream', 'error'))
+    return '\n'.join(lines) + '\n'
+
+
+def _route() -> str:
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+
+def init_metrics(app: Flask):
+    """
+    Record every request and serve GET /metrics.
+
+    Call before registering other request hooks so that the measured time
+    covers them too.
+    """
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_route = _route()
+        http_in_flight.inc(route=g.metrics_route)
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            route = g.metrics_route
+            http_in_flight.dec(route=route)
+            http_latency.observe(time.perf_counter() - start, method=request.method, route=route)
+            http_requests.inc(method=request.method, route=route, status=response.status_code)
+            snapshots.flush()
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        """Prometheus scrape endpoint, covering all worker processes"""
+        return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+_yfinance = None
+_yfinance_lock = threading.Lock()
+
+
+def load_yfinance():
+    """
+    The yfinance module, imported on first use (it pulls in pandas and takes
+    about a second) with its HTTP traffic instrumented. Use this instead of
+    `import yfinance` so calls are timed whichever code path loads it first.
+    """
+    global _yfinance
+    if _yfinance is None:
+        with _yfinance_lock:
+            if _yfinance is None:
+                import yfinance
+                _instrument_yfinance()
+                _yfinance = yfinance
+    return _yfinance
+
+
+def _instrument_yfinance():
+    """
+    Route yfinance's HTTP traffic through a session that times each request.
+
+    yfinance keeps one process-wide session (see Ticker's `session` argument);
+    replacing it once covers every Ticker in the app.
+    """
+    try:
+        from curl_cffi import requests as curl_requests
+        from yfinance.data import YfData
+    except ImportError:
+        return
+
+    class TimedSession(curl_requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            with upstream_call('yfinance') as call:
+                response = super().request(method, url, *args, **kwargs)
+                call.error = response.status_code >= 400
+            return response
+
+    YfData(session=TimedSession(impersonate='chrome'))
@@ -1,11 +1,32 @@
 import os
 from openrouter_client import OpenRouterClient
-from geopy.geocoders import Nominatim, GoogleV3
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-from typing import List, Dict, Optional
+from spatial_index import GeohashIndex
+from marker_clusters import MarkerClusterIndex
+from article_ids import article_id as stable_article_id
+from atomic_file import write_json_atomic
+from article_events import ArticleEventLog, diff_articles
+from processing_checkpoint import ProcessingCheckpoint
+from retention import RetentionPolicy, archive_articles
+from popularity import PopularityIndex, parse_published, source_weight
+from metrics import upstream_call, record_cache
+from tracing import traced
+from rate_limit import RateLimiter
+from typing import Callable, List, Dict, Optional
 import json
 import time
 import re
+import threading
+import contextvars
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+try:
+    import fcntl
+except ImportError:  # Windows: runs are only serialized within one process
+    fcntl = None
+
+# Popular article scores are recomputed at most this often (seconds)
+POPULARITY_SCORE_INTERVAL = 60
 
 class NewsProcessor:
     def __init__(self):
@@ -15,25 +36,53 @@ class NewsProcessor:
             print("Warning: OPENROUTER_API_KEY not set. Location detection will be limited.")
             self.client = None
         
-        # Initialize geocoders
-        self.geocoder = Nominatim(user_agent="news_viewer_app_v2")
+        # Geocoders are created on first use (see the properties below);
+        # importing geopy is slow and most requests never geocode
         self.google_api_key = os.getenv('GOOGLE_MAPS_API_KEY')
-        if self.google_api_key:
-            try:
-                self.google_geocoder = GoogleV3(api_key=self.google_api_key)
-            except:
-                self.google_geocoder = None
-        else:
-            self.google_geocoder = None
-        
-        # Geocoding cache to avoid repeated API calls
-        self.geocoding_cache = {}
+        self._geocoder = None
+        self._google_geocoder = None
+        # Nominatim's usage policy allows at most 1 request per second; location
+        # resolution runs in parallel, so every Nominatim call goes through this
+        self.nominatim_limiter = RateLimiter(float(os.getenv('NOMINATIM_RATE', 1)))
+        self._google_geocoder_created = False
+        
+        # Geocoding cache to avoid repeated API calls, loaded on first use
+        self._geocoding_cache = None
         self.geocoding_cache_file = 'geocoding_cache.json'
-        self.load_geocoding_cache()
+        self._geocoding_lock = threading.Lock()
+        
+        # Google Places responses, cached the same way
+        self._places_cache = None
+        self.places_cache_file = 'places_cache.json'
+        self._places_lock = threading.Lock()
+        self._cache_load_lock = threading.Lock()
+        
+        # Optional limiter with a wait() method, called before each uncached upstream request
+        self.rate_limiter = None
         
         self.processed_articles = []
         self.articles_file = 'articles_data.json'
+        # Add/update/remove events for every saved change, for /api/news/events
+        self.events = ArticleEventLog('article_events.jsonl')
+        # The store as last loaded or saved (shallow copies), to diff the next save against
+        self._saved_articles = {}
+        self.checkpoint = ProcessingCheckpoint('processing_checkpoint.jsonl')
+        self._processing_thread_lock = threading.Lock()
+        self.retention = RetentionPolicy.from_env()
+        self.archive_file = 'articles_archive.jsonl'
+        # Batch location resolution: articles per checkpointed chunk, and parallel resolvers
+        self.location_batch_size = int(os.getenv('LOCATION_BATCH_SIZE', 10))
+        self.location_workers = int(os.getenv('LOCATION_RESOLVE_WORKERS', 4))
+        # Indexes derived from processed_articles, kept in sync by _sync_indexes()
+        self.spatial_index = GeohashIndex()
+        self.marker_clusters = MarkerClusterIndex()
+        self.popularity_index = PopularityIndex()
+        self._article_positions = {}
+        self._indexed_articles = {}
+        self._index_lock = threading.RLock()
+        self._migrated = False
         self.load_articles()
+        self.save_migrated_store()
         
         # Country-based default landmarks - used as fallback when location detection fails
         # These are well-known, prominent landmarks most likely to be relevant for articles
@@ -248,41 +297,267 @@ class NewsProcessor:
             }
         }
     
+    @property
+    def geocoder(self):
+        """Nominatim (OpenStreetMap) geocoder"""
+        if self._geocoder is None:
+            from geopy.geocoders import Nominatim
+            self._geocoder = Nominatim(user_agent="news_viewer_app_v2")
+        return self._geocoder
+    
+    @property
+    def google_geocoder(self):
+        """Google geocoder, or None without GOOGLE_MAPS_API_KEY"""
+        if not self._google_geocoder_created:
+            if self.google_api_key:
+                try:
+                    from geopy.geocoders import GoogleV3
+                    self._google_geocoder = GoogleV3(api_key=self.google_api_key)
+                except:
+                    self._google_geocoder = None
+            self._google_geocoder_created = True
+        return self._google_geocoder
+    
+    @property
+    def geocoding_cache(self) -> Dict:
+        if self._geocoding_cache is None:
+            with self._cache_load_lock:
+                if self._geocoding_cache is None:
+                    self.load_geocoding_cache()
+        return self._geocoding_cache
+    
+    @property
+    def places_cache(self) -> Dict:
+        if self._places_cache is None:
+            with self._cache_load_lock:
+                if self._places_cache is None:
+                    self.load_places_cache()
+        return self._places_cache
+    
     def load_geocoding_cache(self):
         """Load geocoding cache from file"""
+        cache = {}
         try:
             if os.path.exists(self.geocoding_cache_file):
                 with open(self.geocoding_cache_file, 'r') as f:
-                    self.geocoding_cache = json.load(f)
+                    cache = json.load(f)
         except Exception as e:
             print(f"Error loading geocoding cache: {e}")
-            self.geocoding_cache = {}
+        self._geocoding_cache = cache
     
     def save_geocoding_cache(self):
         """Save geocoding cache to file"""
         try:
-            with open(self.geocoding_cache_file, 'w') as f:
-                json.dump(self.geocoding_cache, f, indent=2)
+            write_json_atomic(self.geocoding_cache_file, self.geocoding_cache, indent=2)
         except Exception as e:
             print(f"Error saving geocoding cache: {e}")
     
+    def load_places_cache(self):
+        """Load Places API cache from file"""
+        cache = {}
+        try:
+            if os.path.exists(self.places_cache_file):
+                with open(self.places_cache_file, 'r') as f:
+                    cache = json.load(f)
+        except Exception as e:
+            print(f"Error loading places cache: {e}")
+        self._places_cache = cache
+    
+    def save_places_cache(self):
+        """Save Places API cache to file"""
+        try:
+            write_json_atomic(self.places_cache_file, self.places_cache, indent=2)
+        except Exception as e:
+            print(f"Error saving places cache: {e}")
+    
+    @traced('places.lookup')
+    def _places_get(self, url: str, params: Dict) -> Optional[Dict]:
+        """GET a Places API endpoint through the cache; None if the request failed"""
+        import requests
+        
+        # The API key is not part of the cache key so snapshots can move between nodes
+        endpoint = url.rstrip('/').split('/')[-2]
+        cache_key = endpoint + '?' + '&'.join(f"{k}={v}" for k, v in sorted(params.items()) if k != 'key')
+        cached = self.places_cache.get(cache_key)
+        record_cache('places', cached is not None)
+        if cached is not None:
+            return cached
+        
+        if self.rate_limiter:
+            self.rate_limiter.wait()
+        with upstream_call('google_places') as call:
+            response = requests.get(url, params=params, timeout=10)
+            call.error = response.status_code != 200
+        if response.status_code != 200:
+            return None
+        data = response.json()
+        # Only definitive answers are cached; quota and server errors are retried next time
+        if data.get('status') in ('OK', 'ZERO_RESULTS'):
+            with self._places_lock:
+                self.places_cache[cache_key] = data
+                self.save_places_cache()
+        return data
+    
     def load_articles(self):
         """Load previously processed articles"""
         try:
+            self._articles_mtime = self._file_mtime(self.articles_file)
             if os.path.exists(self.articles_file):
                 with open(self.articles_file, 'r') as f:
                     self.processed_articles = json.load(f)
         except Exception as e:
             print(f"Error loading articles: {e}")
             self.processed_articles = []
+        self._saved_articles = self._snapshot()
+        # Migrated in memory only; save_migrated_store() writes it back once.
+        # Retention likewise runs in processing runs only (see _run_processing),
+        # so workers reloading the store never race each other's saves
+        self._migrated = self._migrate_article_ids()
+        self._sync_indexes()
+    
+    def save_migrated_store(self):
+        """
+        Save the store if loading it migrated IDs or timestamps, under the
+        processing lock so that of the workers loading a legacy store at the
+        same time only the first writes it (and logs one batch of events);
+        the others reload its result instead.
+        
+        Doesn't wait for a processing run that holds the lock: the run saves
+        its (migrated) store when it finishes.
+        """
+        if not self._migrated:
+            return
+        with self._processing_lock(blocking=False) as acquired:
+            if not acquired:
+                return
+            # Another worker may have migrated and saved it while we loaded
+            self.reload_if_changed()
+            if self._migrated:
+                self.save_articles()
+    
+    def _file_mtime(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the article store if another process saved it since we last did.
+        
+        Each server worker has its own NewsProcessor; this keeps them in step
+        after one of them refreshes. Costs one stat() when nothing changed.
+        """
+        if self._file_mtime(self.articles_file) == self._articles_mtime:
+            return False
+        with self._index_lock:
+            if self._file_mtime(self.articles_file) == self._articles_mtime:
+                return False
+            print("Article store changed on disk, reloading")
+            self.load_articles()
+        return True
+    
+    def _migrate_article_ids(self) -> bool:
+        """
+        Rewrite IDs from the old position/hash() scheme to stable URL-based IDs.
+        
+        Duplicate URLs collapse into their first occurrence. Articles with
+        neither a usable publish date nor processed_at are stamped with the
+        current time once, so their popularity stops resetting on every load.
+        Returns True if anything changed so the store can be saved once.
+        """
+        changed = False
+        migrated = []
+        seen_ids = set()
+        now = datetime.now(timezone.utc).isoformat()
+        for article in self.processed_articles:
+            stable_id = stable_article_id(article)
+            if stable_id in seen_ids:
+                changed = True
+                continue
+            seen_ids.add(stable_id)
+            if article.get('id') != stable_id:
+                article['id'] = stable_id
+                changed = True
+            if not (parse_published(article.get('published')) or parse_published(article.get('processed_at'))):
+                article['processed_at'] = now
+                changed = True
+            migrated.append(article)
+        if changed:
+            print(f"Migrated article IDs and timestamps ({len(migrated)} articles)")
+            self.processed_articles = migrated
+        return changed
+    
+    def _sync_indexes(self):
+        """
+        Bring the derived indexes in line with processed_articles.
+        
+        Only articles that were added, removed or replaced since the last sync
+        are touched, so the cost follows the size of the change rather than
+        the size of the store.
+        """
+        with self._index_lock:
+            positions = {}
+            for position, article in enumerate(self.processed_articles):
+                article_id = article.get('id')
+                if article_id:
+                    positions[article_id] = position
+            
+            for article_id in [a for a in self._indexed_articles if a not in positions]:
+                self._unindex_article(article_id)
+            for article_id, position in positions.items():
+                article = self.processed_articles[position]
+                indexed = self._indexed_articles.get(article_id)
+                if indexed is article:
+                    continue
+                if indexed == article:
+                    # Same content reloaded from disk; just point at the new object
+                    self._indexed_articles[article_id] = article
+                else:
+                    self._index_article(article)
+            self._article_positions = positions
+    
+    def _index_article(self, article: Dict):
+        """Add (or re-add) one article to the derived indexes"""
+        article_id = article['id']
+        self._unindex_article(article_id)
+        self._indexed_articles[article_id] = article
+        self.popularity_index.add(article_id, article.get('category') or 'unknown', self._popularity_key(article))
+        coords = article.get('coordinates') or {}
+        lat, lng = coords.get('lat'), coords.get('lng')
+        # (0, 0) is what geocoding returns on failure, so those articles are not on the map
+        if lat is None or lng is None or (lat == 0 and lng == 0):
+            return
+        lat, lng = float(lat), float(lng)
+        self.spatial_index.insert(article_id, lat, lng)
+        self.marker_clusters.insert(article_id, lat, lng, article.get('category') or 'unknown')
+    
+    def _unindex_article(self, article_id: str):
+        """Drop one article from the derived indexes"""
+        if self._indexed_articles.pop(article_id, None) is None:
+            return
+        self.spatial_index.remove(article_id)
+        self.marker_clusters.remove(article_id)
+        self.popularity_index.remove(article_id)
     
     def save_articles(self):
-        """Save processed articles to file"""
+        """Save processed articles to file and log what changed since the last save"""
         try:
-            with open(self.articles_file, 'w') as f:
-                json.dump(self.processed_articles, f, indent=2)
+            write_json_atomic(self.articles_file, self.processed_articles, indent=2)
+            self._articles_mtime = self._file_mtime(self.articles_file)
+            self._migrated = False
         except Exception as e:
             print(f"Error saving articles: {e}")
+            return
+        # Logged after the store is written, so a client that reads the list
+        # and then follows events from an older seq can only see events twice
+        changes = diff_articles(self._saved_articles, self.processed_articles)
+        self._saved_articles = self._snapshot()
+        self.events.append(changes)
+    
+    def _snapshot(self) -> Dict[str, Dict]:
+        # Shallow copies, since pin_article() updates stored articles in place
+        return {article['id']: dict(article) for article in self.processed_articles if article.get('id')}
     
     def detect_location_with_ai(self, article: Dict) -> Dict:
         """Use AI to detect topic-related locations (e.g., wind farms for energy articles)"""
@@ -290,6 +565,76 @@ class NewsProcessor:
             # Fallback: try to extract location from title/summary
             return self._fallback_location_detection(article)
         
+        extraction = self._extract_location_with_ai(article)
+        if extraction is None:
+            return self._fallback_location_detection(article)
+        try:
+            resolution = self._resolve_extracted_location(extraction)
+        except Exception as e:
+            print(f"Error in AI location detection: {e}")
+            return self._fallback_location_detection(article)
+        return self._apply_resolved_location(extraction, resolution)
+    
+    @traced('locations.resolve_batch')
+    def detect_locations_batch(self, articles: List[Dict], resolved: Optional[Dict] = None) -> List[Dict]:
+        """
+        Detect locations for several articles, resolving each distinct place once.
+        
+        The LLM step still runs per article. Its answers are then grouped by
+        (location, topic, category), each group is geocoded and refined once
+        in parallel, and the result is fanned back out to every article in the
+        group. Upstream geocoding and Places calls grow with the number of
+        distinct places rather than the number of articles.
+        
+        Args:
+            articles: Articles to locate
+            resolved: Resolutions from earlier batches of the same run, keyed by
+                      _location_key; updated in place so later batches reuse them
+        """
+        if not self.client:
+            return [self._fallback_location_detection(article) for article in articles]
+        
+        resolved = {} if resolved is None else resolved
+        extractions = [self._extract_location_with_ai(article) for article in articles]
+        
+        pending = {}
+        for extraction in extractions:
+            if extraction is not None:
+                key = self._location_key(extraction)
+                if key not in resolved:
+                    pending.setdefault(key, extraction)
+        
+        if pending:
+            print(f"Resolving {len(pending)} distinct locations for {len(articles)} articles...")
+            with ThreadPoolExecutor(max_workers=self.location_workers) as executor:
+                # Each task runs in a copy of this context so its spans nest under the batch
+                futures = {key: executor.submit(contextvars.copy_context().run,
+                                                self._resolve_extracted_location, extraction)
+                           for key, extraction in pending.items()}
+                for key, future in futures.items():
+                    try:
+                        resolved[key] = future.result()
+                    except Exception as e:
+                        print(f"Error resolving location '{key[0]}': {e}")
+                        resolved[key] = None
+        
+        results = []
+        for article, extraction in zip(articles, extractions):
+            resolution = resolved.get(self._location_key(extraction)) if extraction else None
+            if resolution is None:
+                results.append(self._fallback_location_detection(article))
+            else:
+                results.append(self._apply_resolved_location(extraction, resolution))
+        return results
+    
+    def _location_key(self, extraction: Dict) -> tuple:
+        """Articles with the same key resolve to the same place"""
+        return (extraction['location'].lower().strip(), extraction['topic'].lower().strip(),
+                extraction['location_category'], extraction['refine'])
+    
+    @traced('llm.location_extraction')
+    def _extract_location_with_ai(self, article: Dict) -> Optional[Dict]:
+        """Ask the LLM for the article's location and topic; None if it gave no usable answer"""
         try:
             # Get full article text for better context
             full_text = f"{article.get('title', '')} {article.get('summary', '')} {article.get('content', '')}"
@@ -390,292 +735,242 @@ If truly no location can be determined, use "Unknown"."""
                 temperature=0.1,  # Very low temperature for maximum consistency
                 max_tokens=300
             )
-            
-            result = json.loads(response.choices[0].message.content)
-            location_str = result.get('location', 'Unknown')
-            confidence = result.get('confidence', 0.5)
-            topic = result.get('topic', '')
-            location_category = result.get('location_category', 'other')
-            reasoning = result.get('reasoning', '')
-            
+            response_text = response.choices[0].message.content
+        except Exception as e:
+            print(f"Error in AI location detection: {e}")
+            return None
+        
+        refine = True
+        try:
+            result = json.loads(response_text)
+        except (json.JSONDecodeError, TypeError) as e:
+            print(f"JSON decode error in AI location detection: {e}")
+            # Try to find JSON in the response; a partial answer is geocoded but not refined
+            json_match = re.search(r'\{[^}]+\}', response_text or '')
+            try:
+                result = json.loads(json_match.group()) if json_match else None
+            except json.JSONDecodeError:
+                result = None
+            refine = False
+        if not isinstance(result, dict):
+            return None
+        
+        location_str = str(result.get('location') or 'Unknown')
+        if refine:
             # Validate and refine location string
             location_str = self._validate_and_refine_location(location_str, result.get('location_type', ''))
-            
-            # ALWAYS check if location is vague and find a specific landmark
-            # This is critical - we want landmarks, not cities
-            reasoning = result.get('reasoning', '')
-            landmark_found = False
-            if self._is_vague_location(location_str):
-                print(f"⚠ Location is vague: {location_str}, finding specific landmark...")
-                landmark_location = self._find_landmark_for_city(location_str, topic, location_category)
-                if landmark_location:
-                    old_location = location_str
-                    location_str = landmark_location
-                    landmark_found = True
-                    # Update reasoning to reflect the specific landmark found
-                    landmark_name = location_str.split(',')[0] if ',' in location_str else location_str
-                    city_part = ', '.join(location_str.split(',')[1:]) if ',' in location_str else location_str
-                    if city_part and city_part != location_str:
-                        reasoning = f"This landmark ({landmark_name}) in {city_part} is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                    else:
-                        reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                    print(f"✓ Found landmark: {location_str}")
-                else:
-                    # If we can't find a landmark, try to extract city and search more aggressively
-                    city_name = self._extract_city_name(location_str)
-                    if city_name:
-                        landmark_location = self._find_landmark_for_city_aggressive(city_name, topic, location_category)
-                        if landmark_location:
-                            location_str = landmark_location
-                            print(f"✓ Found landmark via aggressive search: {location_str}")
-            
-            # Clean and normalize location string
+        else:
             location_str = self._normalize_location_string(location_str)
-            
-            # ALWAYS try to find topic-specific location using Google Places API
-            # This ensures we get a specific landmark, not just a city
-            topic_place_name = None
-            if self.google_api_key and location_str != 'Unknown' and topic:
-                topic_coords = self._find_topic_specific_location(location_str, topic, location_category)
-                if topic_coords and topic_coords['lat'] != 0:
-                    coordinates = {'lat': topic_coords['lat'], 'lng': topic_coords['lng']}
-                    topic_place_name = topic_coords.get('place_name')
-                    if topic_place_name:
-                        # Update location name to include the specific place
-                        # Only use landmark name if it's more specific than what we have
-                        if not self._is_vague_location(topic_place_name):
-                            location_str = f"{topic_place_name}, {location_str}"
-                            landmark_found = True
-                            # Update reasoning with specific landmark info
-                            if not reasoning or 'landmark' not in reasoning.lower():
-                                reasoning = f"This landmark ({topic_place_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                        else:
-                            # If topic search returned vague result, keep searching
-                            city = self._extract_city_name(location_str)
-                            if city:
-                                better_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category)
-                                if better_landmark:
-                                    location_str = better_landmark
-                                    landmark_found = True
-                                    if not reasoning or 'landmark' not in reasoning.lower():
-                                        landmark_name = better_landmark.split(',')[0] if ',' in better_landmark else better_landmark
-                                        reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                    print(f"✓ Found topic-specific location for '{topic}': {location_str}")
+        return {
+            'location': location_str,
+            'confidence': result.get('confidence', 0.5) if refine else 0.6,
+            'location_type': result.get('location_type', 'city'),
+            'topic': str(result.get('topic') or ''),
+            'location_category': str(result.get('location_category') or 'other'),
+            'reasoning': str(result.get('reasoning') or ''),
+            'refine': refine
+        }
+    
+    def _apply_resolved_location(self, extraction: Dict, resolution: Dict) -> Dict:
+        """Combine one article's LLM answer with the shared resolution of its place"""
+        if not extraction['refine']:
+            return {
+                'location_name': resolution['location_name'],
+                'coordinates': resolution['coordinates'],
+                'confidence': extraction['confidence']
+            }
+        
+        reasoning = extraction['reasoning']
+        landmark_note = resolution.get('landmark_note')
+        if landmark_note and (not reasoning or 'landmark' not in reasoning.lower()):
+            reasoning = f"{landmark_note} {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
+        
+        return {
+            'location_name': resolution['location_name'],
+            'coordinates': resolution['coordinates'],
+            'confidence': extraction['confidence'],
+            'location_type': extraction['location_type'],
+            'topic': extraction['topic'],
+            'location_category': extraction['location_category'],
+            'location_reasoning': reasoning
+        }
+    
+    def _landmark_note(self, landmark: str, description: str) -> str:
+        landmark_name = landmark.split(',')[0] if ',' in landmark else landmark
+        return f"This landmark ({landmark_name}) is a significant {description}."
+    
+    def _resolve_extracted_location(self, extraction: Dict) -> Dict:
+        """
+        Turn an LLM location answer into a specific landmark and coordinates.
+        
+        Depends only on the location, topic and category, never on the article
+        itself, so the result can be shared by every article with the same key.
+        Returns the final location name, coordinates and, if a landmark was
+        substituted, a sentence explaining it.
+        """
+        location_str = extraction['location']
+        if not extraction['refine']:
+            return {'location_name': location_str, 'coordinates': self._geocode_location(location_str),
+                    'landmark_note': None}
+        
+        topic = extraction['topic']
+        location_category = extraction['location_category']
+        activity = f"location for {topic or location_category} related activities"
+        landmark_note = None
+        
+        # ALWAYS check if location is vague and find a specific landmark
+        # This is critical - we want landmarks, not cities
+        if self._is_vague_location(location_str):
+            print(f"⚠ Location is vague: {location_str}, finding specific landmark...")
+            landmark_location = self._find_landmark_for_city(location_str, topic, location_category)
+            if landmark_location:
+                location_str = landmark_location
+                # Explain the specific landmark found
+                landmark_name = location_str.split(',')[0] if ',' in location_str else location_str
+                city_part = ', '.join(location_str.split(',')[1:]) if ',' in location_str else location_str
+                if city_part and city_part != location_str:
+                    landmark_note = f"This landmark ({landmark_name}) in {city_part} is a significant {activity}."
                 else:
-                    # For political/government articles, try to refine to a more specific street-view-accessible landmark
-                    if location_category == 'government' or 'political' in topic.lower() or 'geopolitical' in topic.lower():
-                        refined_coords = self._refine_political_location(location_str, topic)
-                        if refined_coords and refined_coords['lat'] != 0:
-                            coordinates = refined_coords
-                            if refined_coords.get('place_name'):
-                                new_location = f"{refined_coords['place_name']}, {location_str}"
-                                # Only use if it's more specific
-                                if not self._is_vague_location(refined_coords['place_name']):
-                                    location_str = new_location
-                                    landmark_found = True
-                                    if not reasoning or 'landmark' not in reasoning.lower():
-                                        reasoning = f"This landmark ({refined_coords['place_name']}) is a significant political/government location. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                                else:
-                                    # Still vague, try to find better landmark
-                                    city = self._extract_city_name(location_str)
-                                    if city:
-                                        better = self._find_landmark_for_city_aggressive(city, topic, location_category)
-                                        if better:
-                                            location_str = better
-                                            landmark_found = True
-                                            coordinates = self._geocode_location(location_str)
-                                            if not reasoning or 'landmark' not in reasoning.lower():
-                                                landmark_name = better.split(',')[0] if ',' in better else better
-                                                reasoning = f"This landmark ({landmark_name}) is a significant political/government location. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                            print(f"✓ Refined political location for '{topic}': {location_str}")
-                        else:
-                            # Try aggressive search
-                            city = self._extract_city_name(location_str)
-                            if city:
-                                aggressive_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category)
-                                if aggressive_landmark:
-                                    location_str = aggressive_landmark
-                                    landmark_found = True
-                                    coordinates = self._geocode_location(location_str)
-                                    if not reasoning or 'landmark' not in reasoning.lower():
-                                        landmark_name = aggressive_landmark.split(',')[0] if ',' in aggressive_landmark else aggressive_landmark
-                                        reasoning = f"This landmark ({landmark_name}) is a significant political/government location. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                                else:
-                                    coordinates = self._geocode_location(location_str)
-                            else:
-                                coordinates = self._geocode_location(location_str)
-                    # For financial articles, try to refine to a financial landmark
-                    elif location_category == 'finance' or 'financial' in topic.lower() or 'banking' in topic.lower():
-                        refined_coords = self._refine_financial_location(location_str, topic)
-                        if refined_coords and refined_coords['lat'] != 0:
-                            coordinates = refined_coords
-                            if refined_coords.get('place_name'):
-                                new_location = f"{refined_coords['place_name']}, {location_str}"
-                                # Only use if it's more specific
-                                if not self._is_vague_location(refined_coords['place_name']):
-                                    location_str = new_location
-                                    landmark_found = True
-                                    if not reasoning or 'landmark' not in reasoning.lower():
-                                        reasoning = f"This landmark ({refined_coords['place_name']}) is a significant financial location. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                                else:
-                                    # Still vague, try to find better landmark
-                                    city = self._extract_city_name(location_str)
-                                    if city:
-                                        better = self._find_landmark_for_city_aggressive(city, topic, location_category)
-                                        if better:
-                                            location_str = better
-                                            landmark_found = True
-                                            coordinates = self._geocode_location(location_str)
-                                            if not reasoning or 'landmark' not in reasoning.lower():
-                                                landmark_name = better.split(',')[0] if ',' in better else better
-                                                reasoning = f"This landmark ({landmark_name}) is a significant financial location. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                            print(f"✓ Refined financial location for '{topic}': {location_str}")
-                        else:
-                            # Try aggressive search
-                            city = self._extract_city_name(location_str)
-                            if city:
-                                aggressive_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category)
-                                if aggressive_landmark:
-                                    location_str = aggressive_landmark
-                                    landmark_found = True
-                                    coordinates = self._geocode_location(location_str)
-                                    if not reasoning or 'landmark' not in reasoning.lower():
-                                        landmark_name = aggressive_landmark.split(',')[0] if ',' in aggressive_landmark else aggressive_landmark
-                                        reasoning = f"This landmark ({landmark_name}) is a significant financial location. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                                else:
-                                    coordinates = self._geocode_location(location_str)
-                            else:
-                                coordinates = self._geocode_location(location_str)
-                    else:
-                        # Fall back to regular geocoding
-                        coordinates = self._geocode_location(location_str)
+                    landmark_note = f"This landmark ({landmark_name}) is a significant {activity}."
+                print(f"✓ Found landmark: {location_str}")
             else:
-                # Geocode the location with multiple attempts
-                coordinates = self._geocode_location(location_str)
-            
-            # Final check: if location is still vague after all processing, force landmark search
-            if self._is_vague_location(location_str) and location_str != 'Unknown':
-                print(f"⚠ Final check: Location still vague: {location_str}, forcing landmark search...")
-                city = self._extract_city_name(location_str)
-                if city:
-                    # Try aggressive search first
-                    forced_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category)
-                    if forced_landmark:
-                        location_str = forced_landmark
-                        landmark_found = True
-                        # Re-geocode with new landmark location
-                        coordinates = self._geocode_location(location_str)
-                        if not reasoning or 'landmark' not in reasoning.lower():
-                            landmark_name = forced_landmark.split(',')[0] if ',' in forced_landmark else forced_landmark
-                            reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                        print(f"✓ Forced landmark found: {location_str}")
+                # If we can't find a landmark, try to extract city and search more aggressively
+                city_name = self._extract_city_name(location_str)
+                if city_name:
+                    landmark_location = self._find_landmark_for_city_aggressive(city_name, topic, location_category)
+                    if landmark_location:
+                        location_str = landmark_location
+                        print(f"✓ Found landmark via aggressive search: {location_str}")
+        
+        # Clean and normalize location string
+        location_str = self._normalize_location_string(location_str)
+        
+        # ALWAYS try to find topic-specific location using Google Places API
+        # This ensures we get a specific landmark, not just a city
+        if self.google_api_key and location_str != 'Unknown' and topic:
+            topic_coords = self._find_topic_specific_location(location_str, topic, location_category)
+            if topic_coords and topic_coords['lat'] != 0:
+                coordinates = {'lat': topic_coords['lat'], 'lng': topic_coords['lng']}
+                topic_place_name = topic_coords.get('place_name')
+                if topic_place_name:
+                    # Update location name to include the specific place
+                    # Only use landmark name if it's more specific than what we have
+                    if not self._is_vague_location(topic_place_name):
+                        location_str = f"{topic_place_name}, {location_str}"
+                        landmark_note = landmark_note or self._landmark_note(topic_place_name, activity)
                     else:
-                        # Last resort: use default landmark
-                        default_landmark = self._find_default_landmark_for_city(city, location_category)
-                        if default_landmark:
-                            location_str = default_landmark
-                            landmark_found = True
-                            coordinates = self._geocode_location(location_str)
-                            if not reasoning or 'landmark' not in reasoning.lower():
-                                landmark_name = default_landmark.split(',')[0] if ',' in default_landmark else default_landmark
-                                reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                            print(f"✓ Using default landmark: {location_str}")
-                        else:
-                            print(f"✗ WARNING: Could not find landmark for {city}, location may be vague")
-            
-            # If geocoding failed, try alternative location strings
-            if coordinates['lat'] == 0 and coordinates['lng'] == 0 and location_str != 'Unknown':
-                # Try simplified version
-                simplified = self._simplify_location_string(location_str)
-                if simplified != location_str:
-                    coordinates = self._geocode_location(simplified)
-                    if coordinates['lat'] != 0:
-                        location_str = simplified  # Use simplified if it works
-            
-            # FINAL SAFEGUARD: If location is still vague after all processing, reject it and use a default landmark
-            if self._is_vague_location(location_str) and location_str != 'Unknown':
-                print(f"⚠ CRITICAL: Location still vague after all processing: {location_str}")
-                city = self._extract_city_name(location_str)
-                country = self._extract_country_from_location(location_str)
-                
-                # Try country-based default first (most reliable)
-                if country and country in self.country_default_landmarks:
-                    default_landmark = self.country_default_landmarks[country].get(location_category)
-                    if default_landmark:
-                        location_str = default_landmark
-                        landmark_found = True
-                        coordinates = self._geocode_location(location_str)
-                        if not reasoning or 'landmark' not in reasoning.lower():
-                            landmark_name = default_landmark.split(',')[0] if ',' in default_landmark else default_landmark
-                            reasoning = f"This landmark ({landmark_name}) is a significant {location_category} location in {country} and is directly relevant to the article topic."
-                        print(f"✓ Using country default landmark for {country}: {location_str}")
-                    else:
-                        # Try city-based search as fallback
+                        # If topic search returned vague result, keep searching
+                        city = self._extract_city_name(location_str)
                         if city:
-                            default_landmark = self._find_default_landmark_for_city(city, location_category)
-                            if default_landmark:
-                                location_str = default_landmark
-                                landmark_found = True
-                                coordinates = self._geocode_location(location_str)
-                                if not reasoning or 'landmark' not in reasoning.lower():
-                                    landmark_name = default_landmark.split(',')[0] if ',' in default_landmark else default_landmark
-                                    reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                                print(f"✓ Using default landmark: {location_str}")
+                            better_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category)
+                            if better_landmark:
+                                location_str = better_landmark
+                                landmark_note = landmark_note or self._landmark_note(better_landmark, activity)
+                print(f"✓ Found topic-specific location for '{topic}': {location_str}")
+            else:
+                # For political/government articles, try to refine to a more specific street-view-accessible landmark,
+                # and for financial articles to a financial landmark
+                if location_category == 'government' or 'political' in topic.lower() or 'geopolitical' in topic.lower():
+                    refine_location = self._refine_political_location
+                    description = 'political/government location'
+                elif location_category == 'finance' or 'financial' in topic.lower() or 'banking' in topic.lower():
+                    refine_location = self._refine_financial_location
+                    description = 'financial location'
+                else:
+                    refine_location = None
+                
+                if refine_location is None:
+                    # Fall back to regular geocoding
+                    coordinates = self._geocode_location(location_str)
+                else:
+                    refined_coords = refine_location(location_str, topic)
+                    if refined_coords and refined_coords['lat'] != 0:
+                        coordinates = refined_coords
+                        if refined_coords.get('place_name'):
+                            # Only use if it's more specific
+                            if not self._is_vague_location(refined_coords['place_name']):
+                                location_str = f"{refined_coords['place_name']}, {location_str}"
+                                landmark_note = landmark_note or self._landmark_note(refined_coords['place_name'], description)
                             else:
-                                print(f"✗ Could not find landmark for {city}, location may be vague")
-                elif city:
-                    # Last resort: try to find ANY landmark in the city
-                    default_landmark = self._find_default_landmark_for_city(city, location_category)
-                    if default_landmark:
-                        location_str = default_landmark
-                        landmark_found = True
-                        coordinates = self._geocode_location(location_str)
-                        if not reasoning or 'landmark' not in reasoning.lower():
-                            landmark_name = default_landmark.split(',')[0] if ',' in default_landmark else default_landmark
-                            reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities. {reasoning if reasoning else 'This location is directly relevant to the article topic.'}"
-                        print(f"✓ Using default landmark: {location_str}")
+                                # Still vague, try to find better landmark
+                                city = self._extract_city_name(location_str)
+                                if city:
+                                    better = self._find_landmark_for_city_aggressive(city, topic, location_category)
+                                    if better:
+                                        location_str = better
+                                        coordinates = self._geocode_location(location_str)
+                                        landmark_note = landmark_note or self._landmark_note(better, description)
+                        print(f"✓ Refined {description} for '{topic}': {location_str}")
                     else:
-                        print(f"✗ Could not find landmark for {city}, location may be vague")
-                else:
-                    print(f"✗ Could not extract city or country from {location_str}")
-            
-            # Ensure reasoning is set if we found a landmark but reasoning is still empty
-            if landmark_found and (not reasoning or len(reasoning.strip()) < 20):
-                landmark_name = location_str.split(',')[0] if ',' in location_str else location_str
-                reasoning = f"This landmark ({landmark_name}) is a significant location for {topic or location_category} related activities and is directly relevant to the article topic."
-            
-            return {
-                'location_name': location_str,
-                'coordinates': coordinates,
-                'confidence': confidence,
-                'location_type': result.get('location_type', 'city'),
-                'topic': topic,
-                'location_category': location_category,
-                'location_reasoning': reasoning
-            }
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error in AI location detection: {e}")
-            # Try to extract location from response text
-            try:
-                response_text = response.choices[0].message.content
-                # Try to find JSON in the response
-                json_match = re.search(r'\{[^}]+\}', response_text)
-                if json_match:
-                    result = json.loads(json_match.group())
-                    location_str = result.get('location', 'Unknown')
-                    location_str = self._normalize_location_string(location_str)
+                        # Try aggressive search
+                        city = self._extract_city_name(location_str)
+                        aggressive_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category) if city else None
+                        if aggressive_landmark:
+                            location_str = aggressive_landmark
+                            landmark_note = landmark_note or self._landmark_note(aggressive_landmark, description)
+                        coordinates = self._geocode_location(location_str)
+        else:
+            # Geocode the location with multiple attempts
+            coordinates = self._geocode_location(location_str)
+        
+        # Final check: if location is still vague after all processing, force landmark search
+        if self._is_vague_location(location_str) and location_str != 'Unknown':
+            print(f"⚠ Final check: Location still vague: {location_str}, forcing landmark search...")
+            city = self._extract_city_name(location_str)
+            if city:
+                # Try aggressive search first, then a default landmark as a last resort
+                forced_landmark = self._find_landmark_for_city_aggressive(city, topic, location_category)
+                if not forced_landmark:
+                    forced_landmark = self._find_default_landmark_for_city(city, location_category)
+                if forced_landmark:
+                    location_str = forced_landmark
+                    # Re-geocode with new landmark location
                     coordinates = self._geocode_location(location_str)
-                    return {
-                        'location_name': location_str,
-                        'coordinates': coordinates,
-                        'confidence': 0.6
-                    }
-            except:
-                pass
-            return self._fallback_location_detection(article)
-        except Exception as e:
-            print(f"Error in AI location detection: {e}")
-            return self._fallback_location_detection(article)
+                    landmark_note = landmark_note or self._landmark_note(forced_landmark, activity)
+                    print(f"✓ Forced landmark found: {location_str}")
+                else:
+                    print(f"✗ WARNING: Could not find landmark for {city}, location may be vague")
+        
+        # If geocoding failed, try alternative location strings
+        if coordinates['lat'] == 0 and coordinates['lng'] == 0 and location_str != 'Unknown':
+            # Try simplified version
+            simplified = self._simplify_location_string(location_str)
+            if simplified != location_str:
+                coordinates = self._geocode_location(simplified)
+                if coordinates['lat'] != 0:
+                    location_str = simplified  # Use simplified if it works
+        
+        # FINAL SAFEGUARD: If location is still vague after all processing, reject it and use a default landmark
+        if self._is_vague_location(location_str) and location_str != 'Unknown':
+            print(f"⚠ CRITICAL: Location still vague after all processing: {location_str}")
+            city = self._extract_city_name(location_str)
+            country = self._extract_country_from_location(location_str)
+            
+            # Try country-based default first (most reliable), then any landmark in the city
+            default_landmark = None
+            if country and country in self.country_default_landmarks:
+                default_landmark = self.country_default_landmarks[country].get(location_category)
+                if default_landmark:
+                    landmark_note = landmark_note or (self._landmark_note(default_landmark, f"{location_category} location in {country}") +
+                                                      " It is directly relevant to the article topic.")
+            if not default_landmark and city:
+                default_landmark = self._find_default_landmark_for_city(city, location_category)
+                if default_landmark:
+                    landmark_note = landmark_note or self._landmark_note(default_landmark, activity)
+            if default_landmark:
+                location_str = default_landmark
+                coordinates = self._geocode_location(location_str)
+                print(f"✓ Using default landmark: {location_str}")
+            elif city:
+                print(f"✗ Could not find landmark for {city}, location may be vague")
+            else:
+                print(f"✗ Could not extract city or country from {location_str}")
+        
+        return {
+            'location_name': location_str,
+            'coordinates': coordinates,
+            'landmark_note': landmark_note
+        }
     
     def _validate_and_refine_location(self, location_str: str, location_type: str) -> str:
         """Validate and refine location string for better geocoding"""
@@ -804,6 +1099,7 @@ If truly no location can be determined, use "Unknown"."""
             'confidence': 0.1
         }
     
+    @traced('geocode')
     def _geocode_location(self, location_str: str) -> Dict:
         """Geocode a location string to coordinates with caching and multiple strategies"""
         if location_str == 'Unknown' or not location_str:
@@ -811,27 +1107,34 @@ If truly no location can be determined, use "Unknown"."""
         
         # Check cache first
         cache_key = location_str.lower().strip()
-        if cache_key in self.geocoding_cache:
-            cached_result = self.geocoding_cache[cache_key]
-            if cached_result['lat'] != 0 or cached_result['lng'] != 0:
-                return cached_result
+        cached_result = self.geocoding_cache.get(cache_key)
+        hit = cached_result is not None and (cached_result['lat'] != 0 or cached_result['lng'] != 0)
+        record_cache('geocoding', hit)
+        if hit:
+            return cached_result
         
         # Try multiple geocoding strategies
+        if self.rate_limiter:
+            self.rate_limiter.wait()
         coordinates = self._geocode_with_retry(location_str)
         
         # Cache the result (even if it failed, to avoid repeated failed attempts)
-        self.geocoding_cache[cache_key] = coordinates
-        self.save_geocoding_cache()
+        with self._geocoding_lock:
+            self.geocoding_cache[cache_key] = coordinates
+            self.save_geocoding_cache()
         
         return coordinates
     
     def _geocode_with_retry(self, location_str: str, max_retries: int = 3) -> Dict:
         """Geocode with retry logic and multiple geocoding services"""
+        from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+        
         # Strategy 1: Try Google Geocoding API (most accurate)
         if self.google_geocoder:
             for attempt in range(max_retries):
                 try:
-                    location = self.google_geocoder.geocode(location_str, timeout=15)
+                    with upstream_call('google_geocoding'):
+                        location = self.google_geocoder.geocode(location_str, timeout=15)
                     if location:
                         coords = {'lat': location.latitude, 'lng': location.longitude}
                         print(f"✓ Geocoded '{location_str}' via Google: {coords}")
@@ -848,7 +1151,9 @@ If truly no location can be determined, use "Unknown"."""
         # Strategy 2: Try Nominatim (OpenStreetMap) - free but less accurate
         for attempt in range(max_retries):
             try:
-                location = self.geocoder.geocode(location_str, timeout=15, exactly_one=True)
+                self.nominatim_limiter.wait()
+                with upstream_call('nominatim'):
+                    location = self.geocoder.geocode(location_str, timeout=15, exactly_one=True)
                 if location:
                     coords = {'lat': location.latitude, 'lng': location.longitude}
                     print(f"✓ Geocoded '{location_str}' via Nominatim: {coords}")
@@ -867,7 +1172,9 @@ If truly no location can be determined, use "Unknown"."""
         if simplified != location_str:
             for attempt in range(max_retries):
                 try:
-                    location = self.geocoder.geocode(simplified, timeout=15, exactly_one=True)
+                    self.nominatim_limiter.wait()
+                    with upstream_call('nominatim'):
+                        location = self.geocoder.geocode(simplified, timeout=15, exactly_one=True)
                     if location:
                         coords = {'lat': location.latitude, 'lng': location.longitude}
                         print(f"✓ Geocoded simplified '{simplified}' via Nominatim: {coords}")
@@ -887,8 +1194,6 @@ If truly no location can be determined, use "Unknown"."""
             return None
         
         try:
-            import requests
-            
             # First, geocode the base location to get coordinates
             base_coords = self._geocode_location(base_location)
             if base_coords['lat'] == 0:
@@ -996,9 +1301,8 @@ If truly no location can be determined, use "Unknown"."""
                             'key': self.google_api_key
                         }
                         try:
-                            text_response = requests.get(text_search_url, params=text_params, timeout=10)
-                            if text_response.status_code == 200:
-                                text_data = text_response.json()
+                            text_data = self._places_get(text_search_url, text_params)
+                            if text_data is not None:
                                 if text_data.get('status') == 'OK' and text_data.get('results'):
                                     # Filter for places with high prominence (landmarks)
                                     results = text_data.get('results', [])
@@ -1046,9 +1350,8 @@ If truly no location can be determined, use "Unknown"."""
                 'key': self.google_api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._places_get(url, params)
+            if data is not None:
                 if data.get('status') == 'OK' and data.get('results'):
                     # Sort results by prominence/rating to prioritize landmarks
                     results = data.get('results', [])
@@ -1095,8 +1398,6 @@ If truly no location can be determined, use "Unknown"."""
             return None
         
         try:
-            import requests
-            
             # First, geocode the base location
             base_coords = self._geocode_location(base_location)
             if base_coords['lat'] == 0:
@@ -1118,9 +1419,8 @@ If truly no location can be determined, use "Unknown"."""
                         'query': query,
                         'key': self.google_api_key
                     }
-                    response = requests.get(text_search_url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
+                    data = self._places_get(text_search_url, params)
+                    if data is not None:
                         if data.get('status') == 'OK' and data.get('results'):
                             # Sort by prominence/rating to get landmarks
                             results = data.get('results', [])
@@ -1153,9 +1453,8 @@ If truly no location can be determined, use "Unknown"."""
                 }
                 
                 try:
-                    response = requests.get(url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
+                    data = self._places_get(url, params)
+                    if data is not None:
                         if data.get('status') == 'OK' and data.get('results'):
                             # Sort by prominence to prioritize landmarks
                             results = data.get('results', [])
@@ -1204,8 +1503,6 @@ If truly no location can be determined, use "Unknown"."""
             return None
         
         try:
-            import requests
-            
             # First, geocode the base location
             base_coords = self._geocode_location(base_location)
             if base_coords['lat'] == 0:
@@ -1281,9 +1578,8 @@ If truly no location can be determined, use "Unknown"."""
                         'query': query,
                         'key': self.google_api_key
                     }
-                    response = requests.get(text_search_url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
+                    data = self._places_get(text_search_url, params)
+                    if data is not None:
                         if data.get('status') == 'OK' and data.get('results'):
                             results = data.get('results', [])
                             # Check all results, not just the first one
@@ -1332,9 +1628,8 @@ If truly no location can be determined, use "Unknown"."""
             }
             
             try:
-                response = requests.get(url, params=params, timeout=10)
-                if response.status_code == 200:
-                    data = response.json()
+                data = self._places_get(url, params)
+                if data is not None:
                     if data.get('status') == 'OK' and data.get('results'):
                         # Sort by prominence to prioritize major banks/landmarks
                         results = data.get('results', [])
@@ -1500,7 +1795,6 @@ If truly no location can be determined, use "Unknown"."""
             return None
         
         try:
-            import requests
             url = 'https://maps.googleapis.com/maps/api/place/details/json'
             params = {
                 'place_id': place_id,
@@ -1508,9 +1802,8 @@ If truly no location can be determined, use "Unknown"."""
                 'key': self.google_api_key
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
+            data = self._places_get(url, params)
+            if data is not None:
                 if data.get('status') == 'OK' and data.get('result'):
                     place = data['result']
                     location = place.get('geometry', {}).get('location', {})
@@ -1621,8 +1914,6 @@ If truly no location can be determined, use "Unknown"."""
             return None
         
         try:
-            import requests
-            
             # Determine landmark type based on category/topic
             topic_lower = topic.lower()
             city_lower = city_name.lower()
@@ -1708,9 +1999,8 @@ If truly no location can be determined, use "Unknown"."""
                         'query': query,
                         'key': self.google_api_key
                     }
-                    response = requests.get(text_search_url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
+                    data = self._places_get(text_search_url, params)
+                    if data is not None:
                         if data.get('status') == 'OK' and data.get('results'):
                             results = data.get('results', [])
                             # Filter by prominence and add to collection
@@ -1839,8 +2129,6 @@ If truly no location can be determined, use "Unknown"."""
             return None
         
         try:
-            import requests
-            
             # Use very generic but reliable queries that should return famous landmarks
             default_queries = [
                 f"famous landmark {city_name}",
@@ -1865,9 +2153,8 @@ If truly no location can be determined, use "Unknown"."""
                         'query': query,
                         'key': self.google_api_key
                     }
-                    response = requests.get(text_search_url, params=params, timeout=10)
-                    if response.status_code == 200:
-                        data = response.json()
+                    data = self._places_get(text_search_url, params)
+                    if data is not None:
                         if data.get('status') == 'OK' and data.get('results'):
                             results = data.get('results', [])
                             # Sort by prominence - get the most famous one
@@ -1946,56 +2233,196 @@ Respond with ONLY one word: "financial" or "political"."""
             print(f"Error in AI categorization: {e}")
             return article.get('category', 'political')
     
-    def process_articles(self, articles: List[Dict] = None, mode: str = 'economic'):
+    @traced('news.process')
+    def process_articles(self, articles: List[Dict] = None, mode: str = 'economic',
+                         progress_callback: Optional[Callable[[int, int], None]] = None):
         """Process articles: detect locations, categorize, and prepare for API
         
         Args:
             articles: List of articles to process
             mode: 'economic' for finance-oriented titles, 'political' for political/geopolitical-oriented titles
+            progress_callback: Called as progress_callback(done, total) as articles finish
         """
         if articles is None:
             from news_scraper import NewsScraper
             scraper = NewsScraper()
             articles = scraper.scraped_articles
         
-        processed = []
-        for i, article in enumerate(articles):
-            print(f"Processing article {i+1}/{len(articles)}: {article.get('title', '')[:50]}...")
-            
-            # Detect location
-            location_data = self.detect_location_with_ai(article)
-            
-            # Categorize
-            category = self.categorize_with_ai(article)
-            
-            # Transform title based on mode
-            original_title = article.get('title', '')
-            if mode == 'political':
-                transformed_title = self._make_title_political_oriented(original_title)
-            else:  # default to economic
-                transformed_title = self._make_title_finance_oriented(original_title)
-            
-            # Create processed article
-            processed_article = {
-                'id': f"article_{i}_{hash(article.get('url', ''))}",
-                'title': transformed_title,
-                'url': article.get('url', ''),
-                'summary': article.get('summary', ''),
-                'category': category,
-                'source': article.get('source', 'Unknown'),
-                'published': article.get('published', ''),
-                'location': location_data['location_name'],
-                'coordinates': location_data['coordinates'],
-                'location_reasoning': location_data.get('location_reasoning', 'This location is relevant to the article topic.'),
-                'popularity_score': self._calculate_popularity_score(article),
-                'blurred': False  # Show articles in popular section
-            }
-            
-            processed.append(processed_article)
-            time.sleep(0.2)  # Rate limiting
+        # Worker processes share the checkpoint and the store, so runs take turns
+        with self._processing_lock():
+            # Merge into what another worker may have saved meanwhile
+            self.reload_if_changed()
+            return self._run_processing(articles, mode, progress_callback)
+    
+    @contextmanager
+    def _processing_lock(self, blocking: bool = True):
+        """
+        Exclusive lock across processes and threads for the duration of a
+        processing run. Yields True once held; with blocking=False, yields
+        False instead of waiting if someone else holds it.
+        """
+        if not self._processing_thread_lock.acquire(blocking):
+            yield False
+            return
+        try:
+            with open(self.checkpoint.path + '.lock', 'w') as lock_file:
+                if fcntl:
+                    try:
+                        fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        yield False
+                        return
+                try:
+                    yield True
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self._processing_thread_lock.release()
+    
+    def _run_processing(self, articles: List[Dict], mode: str,
+                        progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        # Pick up articles an interrupted run already paid for
+        wanted_ids = {stable_article_id(article) for article in articles}
+        finished = {k: v for k, v in self.checkpoint.load(mode).items() if k in wanted_ids}
+        if finished:
+            print(f"Resuming from checkpoint: {len(finished)}/{len(wanted_ids)} articles already processed")
+        self.checkpoint.start(mode, finished)
         
-        self.processed_articles = processed
+        try:
+            processed = self._process_article_batch(articles, mode, finished, progress_callback)
+        finally:
+            self.checkpoint.close()
+        
+        # Merge into the store so articles that dropped out of the feeds stay
+        # until the retention policy expires them
+        new_ids = {article['id'] for article in processed}
+        # A refetched article replaces the stored one but keeps its pin
+        pinned_ids = {a.get('id') for a in self.processed_articles if a.get('pinned')}
+        for article in processed:
+            if article['id'] in pinned_ids:
+                article['pinned'] = True
+        self.processed_articles = processed + [a for a in self.processed_articles if a.get('id') not in new_ids]
+        self.compact_articles(save=False)
+        self._sync_indexes()
         self.save_articles()
+        self.checkpoint.complete()
+        return processed
+    
+    def compact_articles(self, save: bool = True) -> int:
+        """
+        Apply the retention policy, moving expired articles to the cold archive.
+        
+        With save=True this takes the processing lock and works on the latest
+        saved store; save=False is for callers already holding the lock.
+        Returns the number of articles archived.
+        """
+        if save:
+            with self._processing_lock():
+                self.reload_if_changed()
+                return self._compact(save=True)
+        return self._compact(save=False)
+    
+    def _compact(self, save: bool) -> int:
+        kept, expired = self.retention.apply(self.processed_articles)
+        if not expired:
+            return 0
+        try:
+            archive_articles(expired, self.archive_file)
+        except Exception as e:
+            # Keep everything hot rather than lose articles that failed to archive
+            print(f"Error archiving articles: {e}")
+            return 0
+        print(f"Archived {len(expired)} expired articles, {len(kept)} remain")
+        self.processed_articles = kept
+        if save:
+            self._sync_indexes()
+            self.save_articles()
+        return len(expired)
+    
+    def pin_article(self, article_id: str, pinned: bool = True) -> bool:
+        """
+        Exempt an article from retention (or release it); returns False if not
+        found. Takes the processing lock and pins the latest saved store, so
+        it can't overwrite another worker's save.
+        """
+        with self._processing_lock():
+            self.reload_if_changed()
+            position = self._article_positions.get(article_id)
+            if position is None:
+                return False
+            self.processed_articles[position]['pinned'] = pinned
+            self.save_articles()
+        return True
+    
+    @traced('news.process_batch')
+    def _process_article_batch(self, articles: List[Dict], mode: str, finished: Dict[str, Dict],
+                               progress_callback: Optional[Callable[[int, int], None]] = None) -> List[Dict]:
+        """Process each article not already in `finished`, checkpointing as it goes"""
+        processed = []
+        pending = []
+        seen_ids = set()
+        for article in articles:
+            # Feeds often carry the same story more than once; it would map to the same ID
+            stable_id = stable_article_id(article)
+            if stable_id in seen_ids:
+                continue
+            seen_ids.add(stable_id)
+            if stable_id in finished:
+                processed.append(finished[stable_id])
+            else:
+                pending.append((len(processed), stable_id, article))
+                processed.append(None)
+        
+        # Locations are resolved a chunk at a time so each chunk is checkpointed
+        # as soon as it is done; `resolved` carries distinct places across chunks
+        resolved = {}
+        done = len(processed) - len(pending)
+        if progress_callback:
+            progress_callback(done, len(processed))
+        for start in range(0, len(pending), self.location_batch_size):
+            chunk = pending[start:start + self.location_batch_size]
+            
+            # Detect locations
+            locations = self.detect_locations_batch([article for _, _, article in chunk], resolved)
+            
+            for (position, stable_id, article), location_data in zip(chunk, locations):
+                done += 1
+                print(f"Processing article {done}/{len(processed)}: {article.get('title', '')[:50]}...")
+                
+                # Categorize
+                category = self.categorize_with_ai(article)
+                
+                # Transform title based on mode
+                original_title = article.get('title', '')
+                if mode == 'political':
+                    transformed_title = self._make_title_political_oriented(original_title)
+                else:  # default to economic
+                    transformed_title = self._make_title_finance_oriented(original_title)
+                
+                # Create processed article
+                processed_article = {
+                    'id': stable_id,
+                    'title': transformed_title,
+                    'url': article.get('url', ''),
+                    'summary': article.get('summary', ''),
+                    'category': category,
+                    'source': article.get('source', 'Unknown'),
+                    'published': article.get('published', ''),
+                    'processed_at': datetime.now(timezone.utc).isoformat(),
+                    'location': location_data['location_name'],
+                    'coordinates': location_data['coordinates'],
+                    'location_reasoning': location_data.get('location_reasoning', 'This location is relevant to the article topic.'),
+                    'popularity_score': self._calculate_popularity_score(article),
+                    'blurred': False  # Show articles in popular section
+                }
+                
+                processed[position] = processed_article
+                self.checkpoint.append(processed_article)
+                if progress_callback:
+                    progress_callback(done, len(processed))
+                time.sleep(0.2)  # Rate limiting
+        
         return processed
     
     def _make_title_finance_oriented(self, title: str) -> str:
@@ -2078,21 +2505,19 @@ Respond with ONLY one word: "financial" or "political"."""
         
         return prefix + title
     
+    def _popularity_key(self, article: Dict) -> float:
+        """Time-invariant popularity key from source weight and publish time"""
+        # Undated articles age from when they were processed rather than staying
+        # fresh forever; stored ones always have processed_at (see _migrate_article_ids),
+        # so the current time is only used for articles still being processed
+        published = (parse_published(article.get('published')) or
+                     parse_published(article.get('processed_at')) or
+                     datetime.now(timezone.utc))
+        return self.popularity_index.key_for(source_weight(article.get('source', '')), published)
+    
     def _calculate_popularity_score(self, article: Dict) -> float:
-        """Calculate a popularity score for an article"""
-        # Simple scoring based on source and recency
-        score = 0.5  # Base score
-        
-        # Boost for major sources
-        major_sources = ['Reuters', 'BBC', 'CNN', 'Bloomberg', 'Financial Times']
-        if any(source in article.get('source', '') for source in major_sources):
-            score += 0.3
-        
-        # Boost for longer summaries (more content)
-        if len(article.get('summary', '')) > 200:
-            score += 0.2
-        
-        return min(score, 1.0)
+        """Calculate a popularity score for an article from its source and recency"""
+        return round(self.popularity_index.score(self._popularity_key(article)), 4)
     
     def get_articles_by_category(self, category: str = 'all') -> List[Dict]:
         """Get articles filtered by category"""
@@ -2100,8 +2525,64 @@ Respond with ONLY one word: "financial" or "political"."""
             return self.processed_articles
         return [a for a in self.processed_articles if a.get('category') == category]
     
-    def get_popular_articles(self, category: str = 'all', limit: int = 20) -> List[Dict]:
-        """Get most popular articles, sorted by popularity score"""
-        articles = self.get_articles_by_category(category)
-        sorted_articles = sorted(articles, key=lambda x: x.get('popularity_score', 0), reverse=True)
-        return sorted_articles[:limit]
+    def _articles_for_ids(self, article_ids: List[str], category: str) -> List[Dict]:
+        """Resolve index hits back to article dicts, dropping other categories"""
+        results = []
+        for article_id in article_ids:
+            article = self._indexed_articles.get(article_id)
+            if article is None:
+                continue
+            if category == 'all' or article.get('category') == category:
+                results.append(article)
+        return results
+    
+    def get_articles_in_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                             category: str = 'all') -> List[Dict]:
+        """Get articles whose coordinates fall inside a bounding box, in store order"""
+        with self._index_lock:
+            article_ids = self.spatial_index.query_bbox(min_lat, min_lng, max_lat, max_lng)
+            positions = self._article_positions
+            article_ids.sort(key=lambda article_id: positions.get(article_id, 0))
+            return self._articles_for_ids(article_ids, category)
+    
+    def get_articles_near(self, lat: float, lng: float, radius_km: float, category: str = 'all',
+                          limit: Optional[int] = None) -> List[Dict]:
+        """Get articles within radius_km of a point, nearest first"""
+        with self._index_lock:
+            matches = self.spatial_index.query_radius(lat, lng, radius_km)
+            articles = self._articles_for_ids([article_id for article_id, _ in matches], category)
+        return articles[:limit] if limit else articles
+    
+    def get_marker_clusters(self, zoom: int, bbox: Optional[tuple] = None, category: str = 'all') -> List[Dict]:
+        """Get precomputed marker clusters for a zoom level, optionally limited to a viewport"""
+        with self._index_lock:
+            return self.marker_clusters.get_clusters(zoom, bbox, category)
+    
+    def get_popular_articles(self, category: str = 'all', limit: Optional[int] = 20) -> List[Dict]:
+        """
+        Get most popular articles, sorted by current popularity score (limit=None for all).
+        
+        Scores are evaluated at the start of the current POPULARITY_SCORE_INTERVAL
+        window, so the result only changes when the store or the window does
+        (see popularity_window). Returns copies; the store is not modified.
+        """
+        with self._index_lock:
+            ranked = self.popularity_index.top(category, limit, now=self.popularity_window() * POPULARITY_SCORE_INTERVAL)
+            articles = []
+            for article_id, score in ranked:
+                article = self._indexed_articles.get(article_id)
+                if article is not None:
+                    articles.append(dict(article, popularity_score=round(score, 4)))
+            return articles
+    
+    def popularity_window(self) -> int:
+        """Index of the current popularity scoring window"""
+        return int(time.time() // POPULARITY_SCORE_INTERVAL)
+    
+    @property
+    def store_version(self) -> str:
+        """
+        Changes whenever the article store does. Derived from the store file so
+        that every worker process reports the same version for the same data.
+        """
+        return str(self._articles_mtime or 0)
@@ -1,17 +1,25 @@
 import requests
-from bs4 import BeautifulSoup
-import feedparser
 import time
 from typing import List, Dict
 import random
+from tracing import traced
 
-# Try to import newspaper, but make it optional
-try:
-    from newspaper import Article
-    NEWSPAPER_AVAILABLE = True
-except ImportError:
-    NEWSPAPER_AVAILABLE = False
-    print("Warning: newspaper3k not available. Article summaries will be limited to RSS feed data.")
+# newspaper3k is optional and slow to import, so it is looked up on first use
+_newspaper_article = None
+_newspaper_checked = False
+
+
+def newspaper_article_class():
+    """newspaper's Article class, or None if newspaper3k is not installed"""
+    global _newspaper_article, _newspaper_checked
+    if not _newspaper_checked:
+        try:
+            from newspaper import Article
+            _newspaper_article = Article
+        except ImportError:
+            print("Warning: newspaper3k not available. Article summaries will be limited to RSS feed data.")
+        _newspaper_checked = True
+    return _newspaper_article
 
 class NewsScraper:
     def __init__(self):
@@ -36,15 +44,18 @@ class NewsScraper:
         
         self.scraped_articles = []
     
+    @traced('scrape.rss_feed')
     def scrape_rss_feed(self, feed_url: str) -> List[Dict]:
         """Scrape articles from an RSS feed"""
         articles = []
+        import feedparser
+        Article = newspaper_article_class()
         try:
             feed = feedparser.parse(feed_url)
             for entry in feed.entries[:10]:  # Limit to 10 per feed
                 try:
                     # Use newspaper3k if available for better article extraction
-                    if NEWSPAPER_AVAILABLE:
+                    if Article is not None:
                         try:
                             article = Article(entry.link)
                             article.download()
@@ -77,6 +88,7 @@ class NewsScraper:
         
         return articles
     
+    @traced('scrape.all_sources')
     def scrape_all_sources(self):
         """Scrape all configured news sources"""
         all_articles = []
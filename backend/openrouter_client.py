@@ -5,6 +5,8 @@ Uses free models available on OpenRouter
 import os
 import requests
 import json
+from llm_clients import http_session
+from metrics import upstream_call
 
 # Free models available on OpenRouter (must include :free suffix)
 # Check https://openrouter.ai/models for current free models
@@ -69,7 +71,10 @@ class OpenRouterClient:
                 print(f"Making OpenRouter API request to: {url}")
                 print(f"Using model: {attempt_model}")
                 
-                response = requests.post(url, headers=self.headers, json=payload, timeout=60)
+                # Shared keep-alive session: no new TLS handshake per call
+                with upstream_call('openrouter') as call:
+                    response = http_session().post(url, headers=self.headers, json=payload, timeout=60)
+                    call.error = response.status_code != 200
                 
                 # Log response details for debugging
                 print(f"Response status: {response.status_code}")
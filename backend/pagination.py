@@ -0,0 +1,76 @@
+"""Cursor pagination and field projection for article list endpoints"""
+
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(position: int, item_id: str) -> str:
+    """Opaque cursor pointing just after the item at `position`"""
+    raw = json.dumps({'p': position, 'id': item_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """Decode a cursor from encode_cursor, raising ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return int(data['p']), str(data['id'])
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def parse_limit(value: Optional[str]) -> int:
+    """Parse the `limit` query parameter, clamped to MAX_PAGE_SIZE"""
+    if value is None or value == '':
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if limit <= 0:
+        raise ValueError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def paginate(items: List[Dict], limit: int, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Return one page of `items` and the cursor for the next page (None at the end).
+
+    The cursor remembers both the position and the id of the last item served.
+    If the list changed since then, the id is looked up again so pages resume
+    after the same article instead of skipping or repeating items. If that
+    article is gone, the page resumes at the remembered position.
+    """
+    start = 0
+    if cursor:
+        position, last_id = decode_cursor(cursor)
+        if 0 <= position < len(items) and items[position].get('id') == last_id:
+            start = position + 1
+        else:
+            start = next((i + 1 for i, item in enumerate(items) if item.get('id') == last_id),
+                         min(max(position, 0), len(items)))
+
+    page = items[start:start + limit]
+    end = start + len(page)
+    next_cursor = encode_cursor(end - 1, page[-1].get('id', '')) if page and end < len(items) else None
+    return page, next_cursor
+
+
+def parse_fields(value: Optional[str]) -> Optional[List[str]]:
+    """Parse a `fields=id,title,coordinates` projection; None means all fields"""
+    if not value:
+        return None
+    fields = [f.strip() for f in value.split(',') if f.strip()]
+    return fields or None
+
+
+def project_fields(items: List[Dict], fields: Optional[List[str]]) -> List[Dict]:
+    """Keep only the requested fields of each item"""
+    if not fields:
+        return items
+    return [{field: item[field] for field in fields if field in item} for item in items]
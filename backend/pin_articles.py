@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Pin articles so the retention policy never archives them, or release them.
+
+Run from the backend directory; safe while the server is running, since
+pins are saved under the same lock as processing runs:
+
+    python pin_articles.py pin <article id> [<article id> ...]
+    python pin_articles.py unpin <article id> [<article id> ...]
+    python pin_articles.py list
+
+A pin stays with the article when a refresh fetches it again. IDs listed
+in ARTICLE_PINNED_IDS are pinned as well, without touching the store.
+"""
+
+import argparse
+import os
+import sys
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from news_processor import NewsProcessor
+
+
+def set_pins(args):
+    processor = NewsProcessor()
+    pinned = args.command == 'pin'
+    missing = [article_id for article_id in args.ids if not processor.pin_article(article_id, pinned)]
+    for article_id in missing:
+        print(f"✗ No article with ID {article_id}")
+    print(f"✓ {'Pinned' if pinned else 'Released'} {len(args.ids) - len(missing)} articles")
+    return 1 if missing else 0
+
+
+def list_pins(args):
+    processor = NewsProcessor()
+    for article in processor.processed_articles:
+        if processor.retention.is_pinned(article):
+            print(f"{article['id']}  {article.get('title', '')}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pin_parser = subparsers.add_parser('pin', help='Exempt articles from retention')
+    pin_parser.add_argument('ids', nargs='+')
+    pin_parser.set_defaults(func=set_pins)
+
+    unpin_parser = subparsers.add_parser('unpin', help='Let articles expire again')
+    unpin_parser.add_argument('ids', nargs='+')
+    unpin_parser.set_defaults(func=set_pins)
+
+    list_parser = subparsers.add_parser('list', help='Show pinned articles')
+    list_parser.set_defaults(func=list_pins)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Time-decayed popularity scoring with an incrementally maintained ranking"""
+
+import bisect
+import math
+import os
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+# Relative weight of a source; anything not listed gets DEFAULT_SOURCE_WEIGHT
+SOURCE_WEIGHTS = {
+    'Reuters': 1.0,
+    'Bloomberg': 1.0,
+    'Financial Times': 1.0,
+    'BBC': 0.95,
+    'CNBC': 0.9,
+    'CNN': 0.9,
+    'The Guardian': 0.85,
+    'Washington Post': 0.85,
+    'NPR': 0.8,
+    'Yahoo': 0.7,
+}
+DEFAULT_SOURCE_WEIGHT = 0.6
+
+# Scores halve every HALF_LIFE_HOURS
+HALF_LIFE_HOURS = float(os.getenv('POPULARITY_HALF_LIFE_HOURS', 24))
+
+# Reference point for stored keys; any fixed instant works
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+def parse_published(value) -> Optional[datetime]:
+    """Parse an RSS (RFC 2822) or ISO 8601 publish date into an aware UTC datetime"""
+    if not value or not isinstance(value, str):
+        return None
+    value = value.strip()
+    parsed = None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def source_weight(source: str) -> float:
+    """Weight for a feed title such as 'Reuters: Business News'"""
+    source = source or ''
+    for name, weight in SOURCE_WEIGHTS.items():
+        if name.lower() in source.lower():
+            return weight
+    return DEFAULT_SOURCE_WEIGHT
+
+
+class PopularityIndex:
+    """
+    Ranks articles by weight * 2^(-age / half_life) without ever rescoring.
+
+    The score factors into a per-article part and a global decay:
+
+        score = exp(key - rate * (now - epoch))
+        key   = ln(weight) + rate * (published - epoch)
+
+    The key is fixed when an article is added, and the decay term is the same
+    for every article, so aging is applied in bulk by evaluating it once per
+    read. Because that shared factor cannot change the order, each category
+    keeps a list sorted by key that is only touched on insert and remove.
+    """
+
+    def __init__(self, half_life_hours: float = HALF_LIFE_HOURS):
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.entries: Dict[str, Tuple[float, str]] = {}
+        self.rankings: Dict[str, List[Tuple[float, str]]] = {'all': []}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def key_for(self, weight: float, published: datetime, now: Optional[float] = None) -> float:
+        """Time-invariant ranking key; publish times in the future count as now"""
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        timestamp = min(published.timestamp(), now)
+        return math.log(max(weight, 1e-9)) + self.rate * (timestamp - _EPOCH)
+
+    def score(self, key: float, now: Optional[float] = None) -> float:
+        """Current score for a key"""
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        return math.exp(key - self.rate * (now - _EPOCH))
+
+    def add(self, item_id: str, category: str, key: float):
+        """Add or re-rank an item"""
+        if item_id in self.entries:
+            self.remove(item_id)
+        self.entries[item_id] = (key, category)
+        entry = (-key, item_id)
+        bisect.insort(self.rankings['all'], entry)
+        bisect.insort(self.rankings.setdefault(category, []), entry)
+
+    def remove(self, item_id: str):
+        """Remove an item if present"""
+        entry = self.entries.pop(item_id, None)
+        if entry is None:
+            return
+        key, category = entry
+        for ranking in (self.rankings['all'], self.rankings.get(category, [])):
+            i = bisect.bisect_left(ranking, (-key, item_id))
+            if i < len(ranking) and ranking[i][1] == item_id:
+                del ranking[i]
+
+    def clear(self):
+        self.entries = {}
+        self.rankings = {'all': []}
+
+    def top(self, category: str = 'all', limit: Optional[int] = None,
+            now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Highest scoring (id, score at `now`, default current time) pairs in a category"""
+        ranking = self.rankings.get(category, [])
+        selected = ranking[:limit] if limit is not None else ranking
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        decay = self.rate * (now - _EPOCH)
+        return [(item_id, math.exp(-neg_key - decay)) for neg_key, item_id in selected]
@@ -4,25 +4,18 @@ import asyncio
 from typing import List, Dict, Any
 from datetime import datetime
 from stock_prediction import StockPredictor
+from tracing import traced
 import os
 import requests
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Try to import crawl4ai, fallback to requests if not available
-# Default to requests fallback since crawl4ai requires Playwright browsers
-CRAWL4AI_AVAILABLE = False
-try:
-    from crawl4ai import AsyncWebCrawler
-    # Only use crawl4ai if Playwright browsers are installed
-    # For now, default to requests which works without additional setup
-    # To enable crawl4ai, run: playwright install
-    # CRAWL4AI_AVAILABLE = True  # Uncomment after running 'playwright install'
-except ImportError:
-    # crawl4ai not available, use requests fallback
-    pass
+# Use crawl4ai instead of requests for scraping (imported only when enabled,
+# it is slow to load). Default to requests fallback since crawl4ai requires
+# Playwright browsers; if it isn't installed the requests fallback is used
+# To enable crawl4ai, run: playwright install
+CRAWL4AI_AVAILABLE = False  # Set to True after running 'playwright install'
 
 class PortfolioPredictor:
     """Scrapes news for portfolio stocks and generates predictions"""
@@ -31,6 +24,7 @@ class PortfolioPredictor:
         """Initialize the portfolio predictor"""
         self.stock_predictor = StockPredictor()
     
+    @traced('scrape.stock_news')
     async def scrape_stock_news(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
         """
         Scrape news articles for multiple stock tickers from Yahoo Finance.
@@ -55,6 +49,7 @@ class PortfolioPredictor:
         if CRAWL4AI_AVAILABLE:
             # Use crawl4ai for better scraping
             try:
+                from crawl4ai import AsyncWebCrawler
                 async with AsyncWebCrawler(verbose=False) as crawler:
                     tasks = []
                     for ticker in tickers:
@@ -99,8 +94,10 @@ class PortfolioPredictor:
     
     async def _scrape_with_requests(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
         """Fallback scraping method using requests and BeautifulSoup"""
+        from bs4 import BeautifulSoup
         results = {}
         
+        @traced('scrape.ticker')
         def scrape_ticker(ticker: str) -> Dict[str, Any]:
             try:
                 # Try multiple URL formats
@@ -156,9 +153,8 @@ class PortfolioPredictor:
                     'error': str(e)
                 }
         
-        # Run scraping in parallel using asyncio
-        loop = asyncio.get_event_loop()
-        tasks = [loop.run_in_executor(None, scrape_ticker, ticker) for ticker in tickers]
+        # Run scraping in parallel using asyncio (to_thread keeps the trace context)
+        tasks = [asyncio.to_thread(scrape_ticker, ticker) for ticker in tickers]
         scrape_results = await asyncio.gather(*tasks)
         
         for ticker, result in zip(tickers, scrape_results):
@@ -203,6 +199,7 @@ class PortfolioPredictor:
             'url': news_data.get('url', f"https://finance.yahoo.com/quote/{ticker}")
         }
     
+    @traced('portfolio.predict')
     async def predict_portfolio_stocks(self, tickers: List[str]) -> Dict[str, Any]:
         """
         Scrape news and generate predictions for multiple portfolio stocks.
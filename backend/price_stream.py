@@ -0,0 +1,153 @@
+"""Shared stock price poller pushing changes to Server-Sent Events subscribers"""
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from tracing import span
+
+# Seconds between price refreshes
+PRICE_STREAM_INTERVAL = float(os.getenv('PRICE_STREAM_INTERVAL', 10))
+# Seconds between keep-alive comments on an idle stream
+PRICE_STREAM_HEARTBEAT = float(os.getenv('PRICE_STREAM_HEARTBEAT', 15))
+# A stream is closed after this long and the browser reconnects, so one
+# client can't hold a worker thread indefinitely
+PRICE_STREAM_MAX_SECONDS = float(os.getenv('PRICE_STREAM_MAX_SECONDS', 300))
+MAX_STREAM_SYMBOLS = 50
+
+
+class Subscription:
+    """One client's symbols and the quotes that changed since it last read"""
+
+    def __init__(self, symbols: Iterable[str]):
+        self.symbols = frozenset(symbols)
+        self._pending: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def push(self, quotes: Dict[str, Dict]):
+        with self._lock:
+            # A slow reader only ever gets the newest quote per symbol
+            self._pending.update(quotes)
+            self._ready.set()
+
+    def wait(self, timeout: float) -> Dict[str, Dict]:
+        """Quotes changed since the last call, or {} if none arrive within `timeout` seconds"""
+        self._ready.wait(timeout)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._ready.clear()
+        return pending
+
+
+class PriceStream:
+    """
+    One poller thread per process fetches every distinct subscribed symbol
+    once per interval and pushes only the quotes that changed, so upstream
+    load grows with the number of distinct symbols, not with subscribers.
+
+    `fetch(symbols)` returns one quote dict (with a 'symbol' key) per symbol.
+    The poller starts with the first subscriber and exits after the last
+    one leaves.
+    """
+
+    def __init__(self, fetch: Callable[[List[str]], List[Dict]], interval: float = PRICE_STREAM_INTERVAL):
+        self.fetch = fetch
+        self.interval = interval
+        self._subscribers: List[Subscription] = []
+        self._latest: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, symbols: Iterable[str]) -> Subscription:
+        subscription = Subscription(symbols)
+        with self._lock:
+            self._subscribers.append(subscription)
+            known = {symbol: self._latest[symbol] for symbol in subscription.symbols if symbol in self._latest}
+            if len(known) < len(subscription.symbols):
+                # Fetch the new symbols now rather than at the next tick
+                self._wake.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='price-stream', daemon=True)
+                self._thread.start()
+        if known:
+            subscription.push(known)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def _run(self):
+        last_full_poll = 0.0
+        while True:
+            self._wake.clear()
+            with self._lock:
+                subscribed = set().union(*(sub.symbols for sub in self._subscribers))
+                if not subscribed:
+                    self._thread = None
+                    # Quotes go stale while nobody is watching
+                    self._latest = {}
+                    return
+                if time.monotonic() - last_full_poll >= self.interval:
+                    due = sorted(subscribed)
+                else:
+                    # Woken early by a subscriber: only its symbols we haven't fetched
+                    due = sorted(subscribed - set(self._latest))
+            if due:
+                if len(due) == len(subscribed):
+                    last_full_poll = time.monotonic()
+                self._poll(due)
+            self._wake.wait(max(0.0, self.interval - (time.monotonic() - last_full_poll)))
+
+    def _poll(self, symbols: List[str]):
+        try:
+            with span('price_stream.poll', symbols=len(symbols)):
+                quotes = self.fetch(symbols)
+        except Exception as e:
+            print(f"Error polling stock prices: {e}")
+            return
+
+        with self._lock:
+            changed = {}
+            for quote in quotes:
+                symbol = quote.get('symbol')
+                if symbol and self._latest.get(symbol) != quote:
+                    self._latest[symbol] = quote
+                    changed[symbol] = quote
+            subscribers = list(self._subscribers)
+        if not changed:
+            return
+        for subscription in subscribers:
+            relevant = {symbol: quote for symbol, quote in changed.items() if symbol in subscription.symbols}
+            if relevant:
+                subscription.push(relevant)
+
+    def events(self, symbols: Iterable[str], encode: Callable[[Dict], str]):
+        """
+        Server-Sent Events for the symbols, until the client disconnects or
+        PRICE_STREAM_MAX_SECONDS pass: a `prices` event with the changed quotes,
+        or a keep-alive comment when nothing changed.
+        """
+        # Subscribed on first iteration, so a stream that is never sent can't leak one
+        subscription = self.subscribe(symbols)
+        deadline = time.monotonic() + PRICE_STREAM_MAX_SECONDS
+        try:
+            # Reconnect quickly after the server closes the stream
+            yield 'retry: 1000\n\n'
+            while time.monotonic() < deadline:
+                quotes = subscription.wait(min(PRICE_STREAM_HEARTBEAT, max(0.0, deadline - time.monotonic())))
+                if quotes:
+                    stocks = [quotes[symbol] for symbol in sorted(quotes)]
+                    yield f"event: prices\ndata: {encode({'stocks': stocks})}\n\n"
+                else:
+                    yield ': keep-alive\n\n'
+        finally:
+            self.unsubscribe(subscription)
@@ -0,0 +1,18 @@
+"""Helpers for state shared between worker processes through files"""
+
+import os
+
+
+def process_alive(pid: int) -> bool:
+    """
+    Whether a process with this pid exists, so files a worker left behind
+    (job state, metrics snapshots, warm-up markers) can be told from those
+    of live workers. A process we may not signal still counts as alive.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
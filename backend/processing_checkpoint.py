@@ -0,0 +1,79 @@
+"""Append-only checkpoint of finished articles so processing runs can resume"""
+
+import json
+import os
+from typing import Dict, Optional
+
+
+class ProcessingCheckpoint:
+    """
+    JSON Lines file holding every article a processing run has finished.
+
+    The first line is a header with the run's mode; each following line is one
+    processed article, flushed and fsynced as soon as it is written so a crash
+    loses at most the article in flight. A torn final line from a crash
+    mid-write is ignored on load.
+
+    Entries are keyed by stable article ID, so a rerun resumes with whatever
+    overlaps the new input even if the feed has moved on since.
+    """
+
+    def __init__(self, path: str = 'processing_checkpoint.jsonl'):
+        self.path = path
+        self._file = None
+
+    def load(self, mode: str) -> Dict[str, Dict]:
+        """Finished articles from a previous run in the same mode, keyed by ID"""
+        finished = {}
+        if not os.path.exists(self.path):
+            return finished
+        try:
+            with open(self.path, 'r') as f:
+                header = json.loads(f.readline() or '{}')
+                if header.get('mode') != mode:
+                    return finished
+                for line in f:
+                    try:
+                        article = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if article.get('id'):
+                        finished[article['id']] = article
+        except Exception as e:
+            print(f"Error loading processing checkpoint: {e}")
+            return {}
+        return finished
+
+    def start(self, mode: str, finished: Optional[Dict[str, Dict]] = None):
+        """Begin a run, carrying over finished articles that are still wanted"""
+        self.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(json.dumps({'mode': mode}) + '\n')
+            for article in (finished or {}).values():
+                f.write(json.dumps(article) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a')
+
+    def append(self, article: Dict):
+        """Durably record one finished article"""
+        if self._file is None:
+            return
+        self._file.write(json.dumps(article) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def complete(self):
+        """The run's results are saved elsewhere; drop the checkpoint"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
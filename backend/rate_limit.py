@@ -0,0 +1,23 @@
+"""Process-wide pacing for upstream APIs with request-rate policies"""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across all threads"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self.lock = threading.Lock()
+        self.next_time = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            wait_until = max(self.next_time, now)
+            self.next_time = wait_until + self.interval
+        if wait_until > now:
+            time.sleep(wait_until - now)
@@ -0,0 +1,78 @@
+"""Retention policy for the processed article store"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from popularity import parse_published
+
+
+class RetentionPolicy:
+    """
+    Decides which articles stay in the hot store.
+
+    An article expires once it is older than `max_age_hours`, or when its
+    category holds more than `max_per_category` newer articles. Pinned
+    articles (listed in `pinned_ids` or carrying 'pinned': True) never expire
+    and do not count towards the per-category limit. A limit of 0 disables it.
+    """
+
+    def __init__(self, max_age_hours: float = 72, max_per_category: int = 200,
+                 pinned_ids: Optional[Set[str]] = None):
+        self.max_age_hours = max_age_hours
+        self.max_per_category = max_per_category
+        self.pinned_ids = set(pinned_ids or ())
+
+    @classmethod
+    def from_env(cls) -> 'RetentionPolicy':
+        """ARTICLE_MAX_AGE_HOURS, ARTICLE_MAX_PER_CATEGORY and ARTICLE_PINNED_IDS (comma separated)"""
+        pinned = os.getenv('ARTICLE_PINNED_IDS', '')
+        return cls(
+            max_age_hours=float(os.getenv('ARTICLE_MAX_AGE_HOURS', 72)),
+            max_per_category=int(os.getenv('ARTICLE_MAX_PER_CATEGORY', 200)),
+            pinned_ids={p.strip() for p in pinned.split(',') if p.strip()}
+        )
+
+    def is_pinned(self, article: Dict) -> bool:
+        return bool(article.get('pinned')) or article.get('id') in self.pinned_ids
+
+    @staticmethod
+    def article_time(article: Dict) -> Optional[datetime]:
+        return parse_published(article.get('published')) or parse_published(article.get('processed_at'))
+
+    def apply(self, articles: List[Dict], now: Optional[datetime] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Split articles into (kept, expired), preserving store order"""
+        now = now or datetime.now(timezone.utc)
+        expired_ids = set()
+        by_category: Dict[str, List[Tuple[float, int]]] = {}
+        for position, article in enumerate(articles):
+            if self.is_pinned(article):
+                continue
+            published = self.article_time(article)
+            # Undated articles can't age out; the per-category cap still bounds them
+            timestamp = published.timestamp() if published else now.timestamp()
+            if self.max_age_hours and published and (now - published).total_seconds() > self.max_age_hours * 3600:
+                expired_ids.add(position)
+                continue
+            by_category.setdefault(article.get('category') or 'unknown', []).append((timestamp, position))
+
+        if self.max_per_category:
+            for entries in by_category.values():
+                if len(entries) > self.max_per_category:
+                    entries.sort(key=lambda e: e[0], reverse=True)
+                    expired_ids.update(position for _, position in entries[self.max_per_category:])
+
+        kept = [a for i, a in enumerate(articles) if i not in expired_ids]
+        expired = [a for i, a in enumerate(articles) if i in expired_ids]
+        return kept, expired
+
+
+def archive_articles(articles: List[Dict], path: str = 'articles_archive.jsonl'):
+    """Append expired articles to the cold archive (one JSON object per line)"""
+    if not articles:
+        return
+    archived_at = datetime.now(timezone.utc).isoformat()
+    with open(path, 'a') as f:
+        for article in articles:
+            f.write(json.dumps(dict(article, archived_at=archived_at)) + '\n')
@@ -0,0 +1,82 @@
+"""Server-Timing headers built from the request's trace spans"""
+
+import functools
+import time
+from typing import Dict, List, Tuple
+
+from flask import make_response
+
+from tracing import Span, current_span
+
+# (metric name, description, span name prefixes); the first match wins
+STAGES = [
+    ('market', 'Market data', ('market_data.', 'upstream yfinance')),
+    ('llm', 'LLM calls', ('llm.', 'upstream openai', 'upstream openrouter', 'upstream dedalus')),
+    ('scrape', 'Scraping', ('scrape.',)),
+    ('parse', 'JSON parsing', ('json.parse',)),
+    ('serialize', 'Serialization', ('json.serialize',)),
+]
+
+
+def _stage(span: Span):
+    for name, _, prefixes in STAGES:
+        if span.name.startswith(prefixes):
+            return name
+    return None
+
+
+def _union_ms(intervals: List[Tuple[int, int]]) -> float:
+    """Wall time covered by possibly nested or concurrent intervals"""
+    total = 0
+    end = None
+    start = None
+    for begin, finish in sorted(intervals):
+        if end is None or begin > end:
+            if end is not None:
+                total += end - start
+            start, end = begin, finish
+        else:
+            end = max(end, finish)
+    if end is not None:
+        total += end - start
+    return total / 1e6
+
+
+def stage_durations(root: Span) -> Dict[str, float]:
+    """
+    Milliseconds of wall time per stage among the root's finished spans.
+
+    Overlapping spans of one stage (a market data lookup and the yfinance
+    calls inside it, or scrapes running in parallel) are counted once.
+    """
+    intervals: Dict[str, List[Tuple[int, int]]] = {}
+    for span in list(root.finished):
+        stage = _stage(span)
+        if stage is not None:
+            intervals.setdefault(stage, []).append((span.start_ns, span.end_ns))
+    return {stage: _union_ms(spans) for stage, spans in intervals.items()}
+
+
+def server_timing(view):
+    """
+    Add a Server-Timing header to a view's response, e.g.
+    `market;desc="Market data";dur=412.5, llm;desc="LLM calls";dur=3120.0, total;dur=3600.2`,
+    so browser devtools show where the request's time went.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        response = make_response(view(*args, **kwargs))
+        total_ms = (time.perf_counter() - start) * 1000
+        span = current_span()
+        durations = stage_durations(span.root) if span is not None else {}
+        metrics = [f'{name};desc="{description}";dur={durations[name]:.1f}'
+                   for name, description, _ in STAGES if name in durations]
+        metrics.append(f"total;dur={total_ms:.1f}")
+        response.headers['Server-Timing'] = ', '.join(metrics)
+        # Lets the frontend (another origin) read the timings, not just devtools
+        response.headers['Timing-Allow-Origin'] = '*'
+        return response
+
+    return wrapper
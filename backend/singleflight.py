@@ -0,0 +1,58 @@
+"""Coalesce concurrent identical calls into one in-flight computation"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    do(key, fn) runs fn once per key at a time.
+
+    A thread that calls do() while another call with the same key is running
+    waits for it and gets its result (or its exception) instead of running
+    fn again. Nothing is cached: once the call finishes, the next do() with
+    that key runs fn afresh. Results are shared between callers, so they
+    must be treated as read-only.
+
+    Coalescing is per process; each gunicorn worker has its own flights.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,164 @@
+"""Geohash grid index for viewport and proximity queries over article coordinates"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometers"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GeohashIndex:
+    """
+    Buckets points into geohash cells so that bounding box and radius queries
+    only look at the cells overlapping the query instead of every point.
+
+    Each cell is identified by its geohash string at a fixed precision. The
+    index also works on the underlying (column, row) grid so that the cells
+    covering a bounding box can be enumerated directly.
+    """
+
+    def __init__(self, precision: int = 4):
+        self.precision = precision
+        bits = 5 * precision
+        self.lng_bits = (bits + 1) // 2  # Geohash interleaves starting with longitude
+        self.lat_bits = bits // 2
+        self.columns = 1 << self.lng_bits
+        self.rows = 1 << self.lat_bits
+        self.cell_width = 360.0 / self.columns
+        self.cell_height = 180.0 / self.rows
+
+        self.cells: Dict[Tuple[int, int], Dict[str, Tuple[float, float]]] = {}
+        self.points: Dict[str, Tuple[int, int, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _column(self, lng: float) -> int:
+        return min(self.columns - 1, max(0, int((lng + 180.0) / self.cell_width)))
+
+    def _row(self, lat: float) -> int:
+        return min(self.rows - 1, max(0, int((lat + 90.0) / self.cell_height)))
+
+    def cell_hash(self, column: int, row: int) -> str:
+        """Geohash string for a grid cell"""
+        value = 0
+        lng_bit = self.lng_bits - 1
+        lat_bit = self.lat_bits - 1
+        for i in range(5 * self.precision):
+            value <<= 1
+            if i % 2 == 0:
+                value |= (column >> lng_bit) & 1
+                lng_bit -= 1
+            else:
+                value |= (row >> lat_bit) & 1
+                lat_bit -= 1
+        chars = []
+        for _ in range(self.precision):
+            chars.append(GEOHASH_ALPHABET[value & 31])
+            value >>= 5
+        return ''.join(reversed(chars))
+
+    def geohash(self, lat: float, lng: float) -> str:
+        """Geohash of the cell containing a point"""
+        return self.cell_hash(self._column(lng), self._row(lat))
+
+    def insert(self, item_id: str, lat: float, lng: float):
+        """Add or move a point"""
+        if item_id in self.points:
+            self.remove(item_id)
+        cell = (self._column(lng), self._row(lat))
+        self.cells.setdefault(cell, {})[item_id] = (lat, lng)
+        self.points[item_id] = (cell[0], cell[1], lat, lng)
+
+    def remove(self, item_id: str):
+        """Remove a point if present"""
+        entry = self.points.pop(item_id, None)
+        if entry is None:
+            return
+        cell = (entry[0], entry[1])
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.pop(item_id, None)
+            if not bucket:
+                del self.cells[cell]
+
+    def clear(self):
+        self.cells = {}
+        self.points = {}
+
+    def _cells_in_range(self, min_col: int, max_col: int, min_row: int, max_row: int):
+        """Yield (column, row, bucket) for occupied cells in a range, scanning whichever side is smaller"""
+        span = (max_col - min_col + 1) * (max_row - min_row + 1)
+        if span <= len(self.cells):
+            for col in range(min_col, max_col + 1):
+                for row in range(min_row, max_row + 1):
+                    bucket = self.cells.get((col, row))
+                    if bucket:
+                        yield col, row, bucket
+        else:
+            for (col, row), bucket in self.cells.items():
+                if min_col <= col <= max_col and min_row <= row <= max_row:
+                    yield col, row, bucket
+
+    def query_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[str]:
+        """
+        Return ids of points inside a bounding box.
+
+        A box with min_lng > max_lng is treated as crossing the antimeridian.
+        """
+        if min_lat > max_lat:
+            return []
+        if min_lng > max_lng:
+            return (self.query_bbox(min_lat, min_lng, max_lat, 180.0) +
+                    self.query_bbox(min_lat, -180.0, max_lat, max_lng))
+
+        results = []
+        min_col, max_col = self._column(min_lng), self._column(max_lng)
+        min_row, max_row = self._row(min_lat), self._row(max_lat)
+        for col, row, bucket in self._cells_in_range(min_col, max_col, min_row, max_row):
+            if min_col < col < max_col and min_row < row < max_row:
+                # Interior cells lie entirely inside the box
+                results.extend(bucket)
+                continue
+            for item_id, (lat, lng) in bucket.items():
+                if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                    results.append(item_id)
+        return results
+
+    def query_radius(self, lat: float, lng: float, radius_km: float, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """Return (id, distance_km) pairs within radius_km of a point, nearest first"""
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        min_lat = max(-90.0, lat - lat_delta)
+        max_lat = min(90.0, lat + lat_delta)
+
+        # Longitude degrees shrink towards the poles; fall back to a full band near them
+        cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+        if cos_lat < 1e-6 or radius_km / EARTH_RADIUS_KM >= math.pi * cos_lat:
+            min_lng, max_lng = -180.0, 180.0
+        else:
+            lng_delta = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+            min_lng = lng - lng_delta
+            max_lng = lng + lng_delta
+            if min_lng < -180.0:
+                min_lng += 360.0
+            if max_lng > 180.0:
+                max_lng -= 360.0
+
+        matches = []
+        for item_id in self.query_bbox(min_lat, min_lng, max_lat, max_lng):
+            _, _, p_lat, p_lng = self.points[item_id]
+            distance = haversine_km(lat, lng, p_lat, p_lng)
+            if distance <= radius_km:
+                matches.append((item_id, distance))
+        matches.sort(key=lambda m: m[1])
+        return matches[:limit] if limit else matches
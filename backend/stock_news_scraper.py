@@ -6,6 +6,8 @@ from dotenv import load_dotenv
 import json
 import hashlib
 from datetime import datetime, timedelta
+from atomic_file import write_json_atomic
+from metrics import record_cache
 
 load_dotenv()
 
@@ -70,13 +72,13 @@ class BaseScraper:
     def save_to_cache(self, ticker, data):
         cache_path = self.get_cache_path(ticker)
         try:
-            with open(cache_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            write_json_atomic(cache_path, data, indent=2)
         except Exception as e:
             print("failed to save cache: {e}")
     async def scrape(self, ticker, use_cache=True):
         if use_cache:
             cached = self.get_cached_data(ticker)
+            record_cache('stock_news', bool(cached))
             if cached:
                 print(f"cache data for: {self.source_name}")
                 return cached
@@ -1,13 +1,12 @@
 """Stock prediction module using news data and AI-driven market analysis"""
 
-import os
 from datetime import datetime, timedelta
 import json
 from typing import List, Dict, Any
 import asyncio
-import numpy as np
-import yfinance as yf
-from dedalus_labs import AsyncDedalus, DedalusRunner
+from async_runtime import shared_dedalus_client
+from metrics import load_yfinance, upstream_call
+from tracing import traced
 
 class StockPredictor:
     """Predicts stock prices based on news sentiment and market data using AI"""
@@ -22,6 +21,7 @@ class StockPredictor:
             last_price = weekly_prices[-1] if weekly_prices else 100.0
             return [last_price] * self.weeks_ahead
         
+        import numpy as np
         x = np.arange(len(weekly_prices))
         y = np.array(weekly_prices)
         coeffs = np.polyfit(x, y, 1)
@@ -101,6 +101,7 @@ Return ONLY the JSON, no other text."""
         
         return prompt
     
+    @traced('llm.predictions')
     async def _generate_predictions_with_ai(self, prompt: str) -> Dict[str, Any]:
         """
         Use dedalus_labs AI endpoint to analyze the prompt and generate predictions.
@@ -111,51 +112,32 @@ Return ONLY the JSON, no other text."""
         Returns:
             Dictionary with AI-generated predictions and data points for relevant assets only
         """
-        api_key = os.getenv('DEDALUS_API_KEY')
-
-        # Initialize AsyncDedalus without positional args (constructor may not accept api_key)
+        # Shared per event loop so connections are reused across requests
         try:
-            client = AsyncDedalus()
+            client = shared_dedalus_client()
         except Exception as e:
             return {
                 'status': 'error',
                 'message': f'Failed to initialize AsyncDedalus client: {str(e)}'
             }
 
-        # Best-effort: set API key if provided using common patterns
-        if api_key:
-            try:
-                if hasattr(client, 'configure'):
-                    client.configure(api_key=api_key)
-                elif hasattr(client, 'set_api_key'):
-                    client.set_api_key(api_key)
-                else:
-                    setattr(client, 'api_key', api_key)
-            except Exception:
-                # non-fatal — continue and let the request surface errors
-                pass
-
+        from dedalus_labs import DedalusRunner
         runner = DedalusRunner(client)
 
         try:
-            response = await runner.run(input=prompt, model="google/gemini-2.5-flash")
+            with upstream_call('dedalus'):
+                response = await runner.run(input=prompt, model="google/gemini-2.5-flash")
         except Exception as e:
             return {
                 'status': 'error',
                 'message': f'AI request failed: {str(e)}'
             }
-        finally:
-            # Ensure client cleanup happens in a safe way
-            try:
-                if hasattr(client, 'aclose'):
-                    try:
-                        await client.aclose()
-                    except RuntimeError:
-                        # Event loop might be closing; ignore
-                        pass
-            except Exception:
-                pass
 
+        return self._parse_ai_response(response)
+
+    @traced('json.parse')
+    def _parse_ai_response(self, response) -> Dict[str, Any]:
+        """Pull the JSON predictions out of the model's reply, however it was wrapped"""
         # Helper: find JSON substring with balanced braces/brackets
         def find_balanced_json(s: str) -> str | None:
             if not s:
@@ -269,6 +251,7 @@ Return ONLY the JSON, no other text."""
         return {'raw': possible_texts[0] if possible_texts else ''}
 
     
+    @traced('market_data.historical')
     def _fetch_historical_data(self, symbol: str, months: int = 12) -> Dict[str, Any]:
         """
         Fetch historical stock data for the given symbol.
@@ -285,7 +268,7 @@ Return ONLY the JSON, no other text."""
             end_date = datetime.now()
             start_date = end_date - timedelta(days=30*months)
 
-            ticker = yf.Ticker(symbol)
+            ticker = load_yfinance().Ticker(symbol)
             hist = ticker.history(start=start_date, end=end_date)
 
             if hist.empty:
@@ -343,6 +326,7 @@ Return ONLY the JSON, no other text."""
                 'error': f'Failed to fetch historical data: {str(e)}'
             }
     
+    @traced('predict.article_impact')
     async def predict_article_impact(self, assets: List[str], article: Dict[str, Any]) -> Dict[str, Any]:
         """
         Main method to predict article impact on multiple assets.
@@ -364,10 +348,12 @@ Return ONLY the JSON, no other text."""
         # Normalize asset symbols
         assets = [symbol.upper().strip() for symbol in assets]
         
-        # Fetch historical data for all assets (1 year of weekly data)
-        historical_data = {}
-        for symbol in assets:
-            historical_data[symbol] = self._fetch_historical_data(symbol, months=12)
+        # Fetch historical data for all assets (1 year of weekly data) in
+        # parallel, on executor threads so yfinance doesn't block the event loop
+        histories = await asyncio.gather(*[
+            asyncio.to_thread(self._fetch_historical_data, symbol, 12) for symbol in assets
+        ])
+        historical_data = dict(zip(assets, histories))
         
         # Generate baseline statistical predictions for each asset
         baseline_predictions = {}
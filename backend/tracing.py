@@ -0,0 +1,204 @@
+"""Lightweight tracing spans, exported as OTLP/JSON lines"""
+
+import asyncio
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: one writer process at a time
+    fcntl = None
+
+# Finished traces are appended here, one OTLP ExportTraceServiceRequest per
+# line (the OTLP file exporter format); unset disables export
+TRACE_FILE = os.getenv('TRACE_FILE', '')
+# Only export traces whose root span took at least this long
+TRACE_MIN_DURATION_MS = float(os.getenv('TRACE_MIN_DURATION_MS', 0))
+SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'news-map-backend')
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+_current: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+_write_lock = threading.Lock()
+
+
+def _attribute(key: str, value) -> Dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Span:
+    """
+    One timed stage. Spans started while another is current become its
+    children; the outermost one (usually the request) is the trace root and
+    collects its finished descendants until it ends itself.
+    """
+
+    __slots__ = ('name', 'kind', 'attributes', 'trace_id', 'span_id', 'parent', 'root',
+                 'start_ns', 'end_ns', 'error', 'finished', 'exported')
+
+    def __init__(self, name: str, kind: int = INTERNAL, parent: Optional['Span'] = None, **attributes):
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.parent = parent
+        self.root = parent.root if parent else self
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+        # Filled on the root only: finished descendants, and whether they were written
+        self.finished: List['Span'] = []
+        self.exported = False
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self, error: Optional[BaseException] = None):
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        root = self.root
+        if root is not self:
+            if root.end_ns is None:
+                root.finished.append(self)
+            elif root.exported:
+                # Outlived its request (e.g. background work); write it on its own
+                _export([self])
+            return
+        if TRACE_FILE and self.duration_ms >= TRACE_MIN_DURATION_MS:
+            self.exported = True
+            _export(self.finished + [self])
+        self.finished = []
+
+    def to_otlp(self) -> Dict:
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_ns),
+            'endTimeUnixNano': str(self.end_ns),
+            'attributes': [_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': 2, 'message': self.error} if self.error else {'code': 1}
+        }
+        if self.parent is not None:
+            span['parentSpanId'] = self.parent.span_id
+        return span
+
+
+def _export(spans: List[Span]):
+    line = json.dumps({'resourceSpans': [{
+        'resource': {'attributes': [_attribute('service.name', SERVICE_NAME),
+                                    _attribute('process.pid', os.getpid())]},
+        'scopeSpans': [{'scope': {'name': 'tracing'}, 'spans': [span.to_otlp() for span in spans]}]
+    }]}) + '\n'
+    try:
+        with _write_lock, open(TRACE_FILE, 'a') as f:
+            # Several worker processes append to the same file
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.write(line)
+                f.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    except OSError as e:
+        print(f"Error writing trace: {e}")
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def start_span(name: str, kind: int = INTERNAL, **attributes):
+    """Start a span as a child of the current one and make it current; returns (span, token)"""
+    span = Span(name, kind, _current.get(), **attributes)
+    return span, _current.set(span)
+
+
+def end_span(span: Span, token, error: Optional[BaseException] = None):
+    span.end(error)
+    try:
+        _current.reset(token)
+    except ValueError:
+        # Ended from a different context than it started in; nothing to restore
+        pass
+
+
+@contextmanager
+def span(name: str, kind: int = INTERNAL, **attributes):
+    current, token = start_span(name, kind, **attributes)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, token, e)
+        raise
+    end_span(current, token)
+
+
+def traced(name: Optional[str] = None, **attributes):
+    """Decorator running a function or coroutine function inside a span"""
+
+    def decorate(fn):
+        span_name = name or fn.__qualname__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name, **attributes):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
+
+
+def init_tracing(app):
+    """Run every request inside a root SERVER span"""
+    from flask import g, request
+
+    @app.before_request
+    def start_request_span():
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.trace_span, g.trace_token = start_span(f"{request.method} {route}", SERVER,
+                                                 **{'http.method': request.method, 'http.route': route,
+                                                    'http.target': request.full_path.rstrip('?')})
+
+    @app.after_request
+    def record_status(response):
+        root = g.get('trace_span')
+        if root is not None:
+            root.set_attribute('http.status_code', response.status_code)
+        return response
+
+    @app.teardown_request
+    def end_request_span(error=None):
+        root = g.pop('trace_span', None)
+        if root is not None:
+            end_span(root, g.pop('trace_token'), error)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Warm, export and import the geocoding and Places caches.
+
+A fresh node starts with empty caches, which makes its first refresh very
+slow. Run this from the backend directory before taking traffic:
+
+    python warm_geocoding_cache.py warm [--concurrency 4] [--rate 5]
+    python warm_geocoding_cache.py export snapshot.json
+    python warm_geocoding_cache.py import snapshot.json [--overwrite]
+
+`warm` geocodes every location in the article store, the default landmark
+tables and a list of top cities, and runs the landmark searches for those
+cities so their Places responses are cached. Only cache misses reach the
+upstream APIs, at most `--rate` requests per second across all workers.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from news_processor import NewsProcessor
+from rate_limit import RateLimiter
+
+SNAPSHOT_VERSION = 1
+
+# Cities that most articles end up in
+TOP_CITIES = [
+    'New York', 'Washington', 'London', 'Paris', 'Berlin', 'Frankfurt', 'Brussels', 'Madrid',
+    'Rome', 'Milan', 'Zurich', 'Geneva', 'Amsterdam', 'Tokyo', 'Beijing', 'Shanghai', 'Hong Kong',
+    'Singapore', 'Seoul', 'Mumbai', 'New Delhi', 'Dubai', 'Moscow', 'Kyiv', 'Jerusalem', 'Toronto',
+    'Ottawa', 'Mexico City', 'Sao Paulo', 'Sydney', 'San Francisco', 'Chicago', 'Los Angeles'
+]
+
+# Article categories whose landmark searches are worth caching
+LANDMARK_CATEGORIES = ['finance', 'political']
+
+
+def collect_locations(processor: NewsProcessor):
+    """Location strings to geocode: article store, landmark tables and top cities"""
+    locations = []
+    for article in processor.processed_articles:
+        if article.get('location') and article['location'] != 'Unknown':
+            locations.append(article['location'])
+    for landmarks in processor.country_default_landmarks.values():
+        locations.extend(landmarks.values())
+    locations.extend(TOP_CITIES)
+    # Case-insensitive dedupe, matching the geocoding cache key
+    unique = {}
+    for location in locations:
+        unique.setdefault(location.lower().strip(), location)
+    return list(unique.values())
+
+
+def warm(args):
+    processor = NewsProcessor()
+    processor.rate_limiter = RateLimiter(args.rate)
+
+    tasks = [(processor._geocode_location, (location,)) for location in collect_locations(processor)]
+    if processor.google_api_key and not args.skip_places:
+        for city in TOP_CITIES:
+            for category in LANDMARK_CATEGORIES:
+                tasks.append((processor._find_landmark_for_city_aggressive, (city, category, category)))
+    elif not args.skip_places:
+        print("GOOGLE_MAPS_API_KEY not set; skipping Places warm-up")
+
+    geocoded_before = len(processor.geocoding_cache)
+    places_before = len(processor.places_cache)
+    print(f"Warming caches with {len(tasks)} lookups "
+          f"(concurrency {args.concurrency}, {args.rate} upstream requests/s)...")
+    start = time.time()
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        futures = [executor.submit(fn, *fn_args) for fn, fn_args in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+            except Exception as e:
+                failures += 1
+                print(f"Lookup failed: {e}")
+            if done % 25 == 0:
+                print(f"  {done}/{len(tasks)} lookups done")
+
+    print(f"✓ Done in {time.time() - start:.1f}s: "
+          f"{len(processor.geocoding_cache) - geocoded_before} new geocodes, "
+          f"{len(processor.places_cache) - places_before} new Places responses, {failures} failures")
+
+
+def export_snapshot(args):
+    processor = NewsProcessor()
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'exported_at': datetime.now(timezone.utc).isoformat(),
+        # Failed geocodes are worth retrying on the new node
+        'geocoding': {k: v for k, v in processor.geocoding_cache.items() if v.get('lat') or v.get('lng')},
+        'places': processor.places_cache
+    }
+    with open(args.path, 'w') as f:
+        json.dump(snapshot, f)
+    print(f"✓ Exported {len(snapshot['geocoding'])} geocodes and {len(snapshot['places'])} "
+          f"Places responses to {args.path}")
+
+
+def import_snapshot(args):
+    with open(args.path, 'r') as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        print(f"Error: unsupported snapshot version {snapshot.get('version')}")
+        sys.exit(1)
+
+    processor = NewsProcessor()
+    counts = []
+    for cache, entries in ((processor.geocoding_cache, snapshot.get('geocoding', {})),
+                           (processor.places_cache, snapshot.get('places', {}))):
+        added = 0
+        for key, value in entries.items():
+            if args.overwrite or key not in cache:
+                cache[key] = value
+                added += 1
+        counts.append(added)
+    processor.save_geocoding_cache()
+    processor.save_places_cache()
+    print(f"✓ Imported {counts[0]} geocodes and {counts[1]} Places responses from {args.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    warm_parser = subparsers.add_parser('warm', help='Fill the caches from articles, landmark tables and top cities')
+    warm_parser.add_argument('--concurrency', type=int, default=4, help='Parallel lookups')
+    warm_parser.add_argument('--rate', type=float, default=5.0, help='Max upstream requests per second (0 = unlimited)')
+    warm_parser.add_argument('--skip-places', action='store_true', help='Only warm the geocoding cache')
+    warm_parser.set_defaults(func=warm)
+
+    export_parser = subparsers.add_parser('export', help='Write a cache snapshot')
+    export_parser.add_argument('path')
+    export_parser.set_defaults(func=export_snapshot)
+
+    import_parser = subparsers.add_parser('import', help='Merge a cache snapshot into the local caches')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--overwrite', action='store_true', help='Replace entries that already exist')
+    import_parser.set_defaults(func=import_snapshot)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
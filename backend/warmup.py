@@ -0,0 +1,146 @@
+"""Warm-up phase run when a worker starts, gating the readiness probe"""
+
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from atomic_file import write_json_atomic
+from processes import process_alive
+from tracing import span
+
+# Report ready after this many seconds even if a step is still running
+# (e.g. yfinance hanging), so a slow upstream can't keep every worker out
+WARMUP_TIMEOUT = float(os.getenv('WARMUP_TIMEOUT', 60))
+# Each worker's warm-up status, one <pid>.json per worker, so any worker can
+# tell whether the whole instance is warm
+WARMUP_DIR = os.getenv('WARMUP_DIR', 'warmup')
+
+
+def _write_marker(status: str, started_at: float, timeout: float = WARMUP_TIMEOUT):
+    try:
+        os.makedirs(WARMUP_DIR, exist_ok=True)
+        write_json_atomic(os.path.join(WARMUP_DIR, f"{os.getpid()}.json"),
+                          {'status': status, 'started_at': started_at, 'timeout': timeout})
+    except OSError as e:
+        print(f"Error saving warm-up marker: {e}")
+
+
+def clear_markers():
+    """Forget the workers of a previous run; call once, before any worker starts"""
+    shutil.rmtree(WARMUP_DIR, ignore_errors=True)
+
+
+def register_worker():
+    """
+    Record a new worker as not warm yet, right after it forks, so the other
+    workers don't report the instance ready while it loads the app.
+    """
+    _write_marker('pending', time.time())
+
+
+class Warmup:
+    """
+    Runs named steps once, in order, on a background thread, recording how
+    each went. A failed step is logged and skipped: the instance still
+    becomes ready, it just serves that data cold.
+
+    ready() is true once every step has finished, or WARMUP_TIMEOUT seconds
+    after the start. Progress is also written to WARMUP_DIR, so that
+    workers() can report on every worker of the instance.
+    """
+
+    def __init__(self, steps: List[Tuple[str, Callable[[], object]]], timeout: float = WARMUP_TIMEOUT):
+        self.steps = steps
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict] = {}
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._pid = None
+
+    def start(self):
+        """Start warming up in this process, unless it already has"""
+        with self._lock:
+            # A fork (gunicorn with preload_app) starts over with its own caches
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._results = {name: {'status': 'pending'} for name, _ in self.steps}
+            self._started_at = time.monotonic()
+            self._finished_at = None
+        _write_marker('running', time.time(), self.timeout)
+        threading.Thread(target=self._run, name='warmup', daemon=True).start()
+
+    def _run(self):
+        for name, step in self.steps:
+            self._results[name] = {'status': 'running'}
+            start = time.monotonic()
+            try:
+                with span(f"warmup {name}"):
+                    step()
+                result = {'status': 'done'}
+            except Exception as e:
+                print(f"Warm-up step {name} failed: {e}")
+                result = {'status': 'failed', 'error': str(e)}
+            result['seconds'] = round(time.monotonic() - start, 3)
+            self._results[name] = result
+        self._finished_at = time.monotonic()
+        _write_marker('done', time.time(), self.timeout)
+        print(f"Warm-up finished in {self._finished_at - self._started_at:.1f}s")
+
+    @property
+    def started(self) -> bool:
+        return self._pid == os.getpid()
+
+    def ready(self) -> bool:
+        if not self.started:
+            return False
+        return self._finished_at is not None or time.monotonic() - self._started_at >= self.timeout
+
+    def state(self) -> Dict:
+        if not self.started:
+            return {'status': 'not_started', 'steps': {}}
+        if self._finished_at is not None:
+            status = 'done'
+        elif self.ready():
+            status = 'timed_out'
+        else:
+            status = 'running'
+        end = self._finished_at if self._finished_at is not None else time.monotonic()
+        return {'status': status, 'seconds': round(end - self._started_at, 3), 'steps': dict(self._results)}
+
+    def workers(self) -> Dict[int, Dict]:
+        """
+        {pid: {'status', 'ready'}} for every live worker of the instance: this
+        one from memory, the others from their markers in WARMUP_DIR. Markers
+        of workers that have exited are removed.
+        """
+        now = time.time()
+        workers = {}
+        for path in glob.glob(os.path.join(WARMUP_DIR, '*.json')):
+            try:
+                pid = int(os.path.basename(path)[:-len('.json')])
+            except ValueError:
+                continue
+            if pid == os.getpid():
+                continue
+            if not process_alive(pid):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(path, 'r') as f:
+                    marker = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            # Same timeout as ready(): a worker stuck on a step still counts after it
+            ready = marker['status'] == 'done' or now - marker['started_at'] >= marker['timeout']
+            workers[pid] = {'status': marker['status'], 'ready': ready}
+        workers[os.getpid()] = {'status': self.state()['status'], 'ready': self.ready()}
+        return workers
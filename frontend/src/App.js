@@ -154,6 +154,8 @@ function App() {
   };
 
   const [articles, setArticles] = useState([]);
+  // Article event seq the current list was read at (X-Events-Seq), null until fetched
+  const [eventsSeq, setEventsSeq] = useState(null);
   const [mode, setMode] = useState('economic'); // 'economic' or 'political'
   const [demoArticles, setDemoArticles] = useState(() => generateDemoArticles('economic'));
   const [popularArticles, setPopularArticles] = useState(() => getDefaultArticles('economic'));
@@ -339,12 +341,75 @@ function App() {
     if (isAuthenticated) {
       // Clear existing articles when mode changes
       setArticles([]);
+      setEventsSeq(null);
       // Fetch new articles for the current mode
       fetchNews();
       fetchPopularNews();
     }
   }, [isAuthenticated, mode]);
 
+  // Follow new, updated and removed articles as the backend processes them,
+  // instead of re-fetching the whole list
+  useEffect(() => {
+    if (!isAuthenticated || eventsSeq === null) {
+      return;
+    }
+
+    const STREAM_RETRY_MS = 30000; // Matches the server's Retry-After when it is at its stream limit
+    let lastSeq = eventsSeq;
+    let source;
+    let retryTimer;
+
+    const upsertArticle = (event) => {
+      lastSeq = event.lastEventId;
+      const { article } = JSON.parse(event.data);
+      setArticles(prevArticles => {
+        const index = prevArticles.findIndex(a => a.id === article.id);
+        if (index === -1) {
+          return [article, ...prevArticles];
+        }
+        const updated = [...prevArticles];
+        updated[index] = article;
+        return updated;
+      });
+    };
+
+    const removeArticle = (event) => {
+      lastSeq = event.lastEventId;
+      const { id } = JSON.parse(event.data);
+      setArticles(prevArticles => prevArticles.filter(a => a.id !== id));
+    };
+
+    // Start from the seq the list was read at, so nothing that changed between
+    // the fetch and the connect is lost; EventSource then resumes from the last
+    // event it saw when it reconnects
+    const connect = () => {
+      source = new EventSource(`${API_BASE_URL}/news/events?mode=${mode}&last_event_id=${lastSeq}`);
+      source.addEventListener('add', upsertArticle);
+      source.addEventListener('update', upsertArticle);
+      source.addEventListener('remove', removeArticle);
+      // Too far behind for the event log to catch us up; reload the full list
+      // (which reconnects from its seq)
+      source.addEventListener('reset', (event) => {
+        lastSeq = event.lastEventId;
+        fetchNews();
+      });
+      source.onerror = () => {
+        // An error response (e.g. 503 when the server has too many streams open)
+        // closes the EventSource for good instead of retrying, so retry later
+        if (source.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(connect, STREAM_RETRY_MS);
+        }
+      };
+    };
+    connect();
+
+    return () => {
+      clearTimeout(retryTimer);
+      source.close();
+    };
+  }, [isAuthenticated, mode, eventsSeq]);
+
   // Startup animations (only after logo animation completes) - using CSS classes for performance
   useEffect(() => {
     if (!authLoading && logoAnimationComplete && !hasAnimatedStartup.current) {
@@ -562,6 +627,8 @@ function App() {
       }
       const data = await response.json();
       setArticles(Array.isArray(data) ? data : []);
+      // Without the header the stream starts from the server's current head
+      setEventsSeq(response.headers.get('X-Events-Seq') || '');
     } catch (error) {
       console.error('Error fetching news:', error);
       if (error.message.includes('Failed to fetch') || error.message.includes('CORS')) {
@@ -674,6 +741,22 @@ function App() {
     }
   };
 
+  const waitForJob = async (jobId, intervalMs = 2000, timeoutMs = 15 * 60 * 1000) => {
+    const deadline = Date.now() + timeoutMs;
+    while (Date.now() < deadline) {
+      const response = await fetch(`${API_BASE_URL}/jobs/${jobId}`);
+      if (!response.ok) {
+        return null;
+      }
+      const { job } = await response.json();
+      if (job.status === 'succeeded' || job.status === 'failed') {
+        return job;
+      }
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+    }
+    return null;
+  };
+
   const handleRefreshNews = async () => {
     setLoading(true);
     try {
@@ -683,11 +766,16 @@ function App() {
 
       // Also try to fetch real news if backend is available
       try {
-        await fetch(`${API_BASE_URL}/news/refresh`, {
+        const refreshResponse = await fetch(`${API_BASE_URL}/news/refresh`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({ mode: mode })
         });
+        // The refresh runs as a background job; wait for it before reloading
+        if (refreshResponse.status === 202) {
+          const { job } = await refreshResponse.json();
+          await waitForJob(job.id);
+        }
         await fetchNews();
 
         // Fetch popular news and replace existing articles
@@ -100,110 +100,100 @@ const PortfolioOverlay = ({ isWindow = false }) => {
     setStockSymbolsString(symbolsStr);
   }, [stocks.length, stocks.map(s => s.symbol).filter(Boolean).sort().join(',')]);
 
-  // Fetch real-time stock prices from backend
+  // Stream real-time stock prices from backend
   useEffect(() => {
     if (!isAuthenticated || stocks.length === 0) {
-      console.log('Skipping price fetch - not authenticated or no stocks');
+      console.log('Skipping price stream - not authenticated or no stocks');
       return;
     }
 
     // Use the same API URL as App.js for consistency
     const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:5004/api';
+    // Use ref to get current symbols without causing dependency issues
+    const symbols = stockSymbolsRef.current;
+    if (symbols.length === 0) {
+      console.log('No symbols to stream prices for');
+      return;
+    }
     let errorCount = 0;
     const MAX_ERROR_LOG = 3; // Log first few errors
+    const STREAM_RETRY_MS = 30000; // Matches the server's Retry-After when it is at its stream limit
+    let source;
+    let retryTimer;
     
-    console.log('Portfolio: Setting up price fetcher. API URL:', API_BASE_URL, 'Stocks:', stocks.length);
+    console.log('Portfolio: Subscribing to price stream. API URL:', API_BASE_URL, 'Symbols:', symbols);
 
-    const fetchPrices = async () => {
-      try {
-        // Use ref to get current symbols without causing dependency issues
-        const symbols = stockSymbolsRef.current;
-        if (symbols.length === 0) {
-          console.log('No symbols to fetch prices for');
-          return;
-        }
-        console.log('Fetching prices for symbols:', symbols);
-        
-        const response = await fetch(`${API_BASE_URL}/stocks/prices`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-          },
-          body: JSON.stringify({ symbols }),
-        });
+    const handlePrices = (event) => {
+      // Reset error count on success
+      errorCount = 0;
 
-        if (!response.ok) {
-          if (errorCount < MAX_ERROR_LOG) {
-            const errorText = await response.text().catch(() => '');
-            console.error(`Failed to fetch stock prices: ${response.status} ${response.statusText}. Backend may not be running on ${API_BASE_URL}. Error: ${errorText}`);
-            errorCount++;
-          }
-          return;
+      let data;
+      try {
+        data = JSON.parse(event.data);
+      } catch (error) {
+        console.warn('Unexpected price event format:', event.data);
+        return;
+      }
+      
+      // Create a map of new prices for quick lookup
+      const priceMap = {};
+      (data.stocks || []).forEach(stock => {
+        if (stock.price !== null && stock.price !== undefined) {
+          priceMap[stock.symbol] = {
+            price: stock.price,
+            change: stock.change || 0,
+            name: stock.name || stock.symbol
+          };
         }
+      });
 
-        const data = await response.json();
-        console.log('Price fetch response:', data);
-        
-        if (data.status === 'success' && data.stocks) {
-          // Reset error count on success
-          errorCount = 0;
-          
-          // Create a map of new prices for quick lookup
-          const priceMap = {};
-          data.stocks.forEach(stock => {
-            if (stock.price !== null && stock.price !== undefined) {
-              priceMap[stock.symbol] = {
-                price: stock.price,
-                change: stock.change || 0,
-                name: stock.name || stock.symbol
-              };
-            }
-          });
+      if (Object.keys(priceMap).length === 0) {
+        return;
+      }
 
-          console.log('Updating stocks with prices:', priceMap);
-
-          // Update stocks with new prices, preserving existing data
-          setStocks(prevStocks => {
-            const updated = prevStocks.map(stock => {
-              const updatedPrice = priceMap[stock.symbol];
-              if (updatedPrice) {
-                return {
-                  ...stock,
-                  price: updatedPrice.price,
-                  change: updatedPrice.change,
-                  name: updatedPrice.name || stock.name || stock.symbol
-                };
-              }
-              return stock;
-            });
-            console.log('Updated stocks:', updated);
-            return updated;
-          });
-        } else {
-          console.warn('Unexpected price response format:', data);
+      // Update stocks with new prices, preserving existing data
+      setStocks(prevStocks => prevStocks.map(stock => {
+        const updatedPrice = priceMap[stock.symbol];
+        if (updatedPrice) {
+          return {
+            ...stock,
+            price: updatedPrice.price,
+            change: updatedPrice.change,
+            name: updatedPrice.name || stock.name || stock.symbol
+          };
         }
-      } catch (error) {
-        // Only log connection errors once to avoid spam
+        return stock;
+      }));
+    };
+
+    // The server pushes a `prices` event with the current quotes on connect,
+    // then only the quotes that changed; EventSource reconnects on its own
+    const connect = () => {
+      source = new EventSource(`${API_BASE_URL}/stocks/stream?symbols=${encodeURIComponent(symbols.join(','))}`);
+      source.addEventListener('prices', handlePrices);
+      source.onerror = () => {
+        // Only log connection errors a few times to avoid spam while EventSource retries
         if (errorCount < MAX_ERROR_LOG) {
-          if (error.message.includes('Failed to fetch') || error.message.includes('ERR_CONNECTION_REFUSED')) {
-            console.warn(`Cannot connect to backend at ${API_BASE_URL}. Make sure the backend server is running.`);
+          console.warn(`Price stream disconnected from ${API_BASE_URL}; retrying. Make sure the backend server is running.`);
+          if (errorCount === 0) {
             console.warn('To start the backend, run: ./start-backend.sh');
-          } else {
-            console.error('Error fetching stock prices:', error);
           }
           errorCount++;
         }
-      }
+        // An error response (e.g. 503 when the server has too many streams open)
+        // closes the EventSource for good instead of retrying, so retry later
+        if (source.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(connect, STREAM_RETRY_MS);
+        }
+      };
     };
-
-    // Fetch immediately
-    fetchPrices();
+    connect();
     
-    // Then fetch every 10 seconds for real-time updates
-    const interval = setInterval(fetchPrices, 10000);
-    
-    return () => clearInterval(interval);
-  }, [isAuthenticated, stockSymbolsString, stocks.length]); // Re-run when symbols change or stocks are added/removed
+    return () => {
+      clearTimeout(retryTimer);
+      source.close();
+    };
+  }, [isAuthenticated, stockSymbolsString, stocks.length]); // Re-subscribe when symbols change or stocks are added/removed
 
   // Helper function to round numbers
   const round = (num, decimals = 2) => {